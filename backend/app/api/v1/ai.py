@@ -3,10 +3,16 @@ from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 import json
 
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal, get_db
 from app.core.security import require_user
 from app.services.ai_service import ai_service
+from app.services.auto_solve_service import AutoSolveSession
 from app.services.game_service import GameService
+from app.services.game_state import GameState
+from app.services.group_solver import group_solver
+from app.services.hint_bank_service import HintBankService
+from app.services.puzzle_service import PuzzleService
+from app.services.llm_scheduler import LLMOverloaded, llm_scheduler
 from app.schemas.ai import HintRequest, HintResponse, AutoSolveRequest
 
 router = APIRouter(prefix="/ai", tags=["ai"])
@@ -35,16 +41,46 @@ async def get_hint(
             detail="Game already completed",
         )
 
+    # Serve from the pre-generated bank, else ask the AI
+    solved_count = len(session.categories_solved or [])
+    puzzle = await PuzzleService(db).get_puzzle_by_id(session.puzzle_id)
+    hint = None
+    if puzzle:
+        hint = await HintBankService(db).get_hint(
+            puzzle_id=puzzle.id,
+            solved_mask=puzzle.solved_mask(session.categories_solved or []),
+            model=ai_service.model,
+        )
+
+    if hint is None:
+        # Local solver fast path when one group clearly stands out
+        candidate = group_solver.confident(request.remaining_words, exclude=puzzle)
+        if candidate:
+            hint = group_solver.hint(candidate)
+
+    if hint is None:
+        try:
+            hint = await ai_service.get_hint(
+                puzzle_id=session.puzzle_id,
+                remaining_words=request.remaining_words,
+                solved_count=solved_count,
+            )
+        except LLMOverloaded as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="AI is busy, please try again shortly",
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        hint = {
+            **hint,
+            "suggested_words": group_solver.repair(
+                hint["suggested_words"], request.remaining_words, exclude=puzzle
+            ),
+        }
+
     # Mark hint as used
     await service.mark_hint_used(request.session_id, user_id)
 
-    # Get hint from AI
-    solved_count = len(session.categories_solved or [])
-    hint = await ai_service.get_hint(
-        remaining_words=request.remaining_words,
-        solved_count=solved_count,
-    )
-
     return HintResponse(
         hint=hint["hint"],
         confidence=hint["confidence"],
@@ -58,7 +94,11 @@ async def start_auto_solve(
     user_id: str = Depends(require_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Start AI auto-solve and stream the results."""
+    """Auto-solve the game server-side, streaming every step over one SSE connection.
+
+    Each guess is applied to the game session as soon as it is chosen, so
+    a client that disconnects mid-solve still pays for what it was shown.
+    """
     # Verify session belongs to user
     service = GameService(db)
     session = await service.get_session(request.session_id)
@@ -69,16 +109,44 @@ async def start_auto_solve(
             detail="Game session not found",
         )
 
+    if session.completed_at:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Game already completed",
+        )
+
+    puzzle = await PuzzleService(db).get_puzzle_by_id(session.puzzle_id)
+    if not puzzle:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Puzzle not found",
+        )
+
+    async def record(guess: list[str]) -> GameState:
+        # The request's DB session is closed once streaming starts
+        async with AsyncSessionLocal() as write_db:
+            return await GameService(write_db).apply_guesses(session.id, user_id, [guess])
+
+    solver = AutoSolveSession(puzzle, session, record)
+
+    # Refuse up front rather than open a stream that will only report overload
+    if group_solver.confident(solver.remaining_words(), exclude=puzzle) is None:
+        try:
+            llm_scheduler.check_capacity()
+        except LLMOverloaded as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="AI is busy, please try again shortly",
+                headers={"Retry-After": str(e.retry_after)},
+            )
+
     async def generate():
-        mistakes_remaining = 4 - session.mistakes
-        solved_categories = session.categories_solved or []
-
-        async for step in ai_service.auto_solve_step(
-            remaining_words=request.remaining_words,
-            mistakes_remaining=mistakes_remaining,
-            solved_categories=solved_categories,
-        ):
-            yield f"data: {json.dumps(step)}\n\n"
+        try:
+            async for event in solver.run():
+                yield f"data: {json.dumps(event)}\n\n"
+        except ValueError as e:
+            # e.g. the player finished the game meanwhile
+            yield f"data: {json.dumps({'type': 'error', 'content': str(e)})}\n\n"
 
         yield "data: [DONE]\n\n"
 
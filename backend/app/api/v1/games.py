@@ -108,7 +108,7 @@ async def submit_guess(
     service = GameService(db)
 
     try:
-        result, category, one_away, session = await service.submit_guess(
+        result, category, one_away, session, puzzle = await service.submit_guess(
             session_id=session_id,
             user_id=user_id,
             words=request.words,
@@ -119,10 +119,6 @@ async def submit_guess(
             detail=str(e),
         )
 
-    # Get puzzle for remaining words calculation
-    puzzle_service = PuzzleService(db)
-    puzzle = await puzzle_service.get_puzzle_by_id(session.puzzle_id)
-
     return GuessResponse(
         result=result,
         one_away=one_away if result == "wrong" else None,
@@ -0,0 +1,52 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.security import require_user
+from app.services.leaderboard_service import LeaderboardService
+from app.services.puzzle_service import PuzzleService
+from app.schemas.leaderboard import (
+    LeaderboardEntry,
+    LeaderboardResponse,
+    LeaderboardStatsResponse,
+)
+
+router = APIRouter(prefix="/leaderboard", tags=["leaderboard"])
+
+
+@router.get("", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    board: Literal["wins", "streak", "avg_time"] = "wins",
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get a ranked leaderboard (by wins, longest streak or average solve time)."""
+    service = LeaderboardService(db)
+    entries = await service.get_board(board, limit=limit, offset=offset)
+
+    return LeaderboardResponse(
+        board=board,
+        entries=[LeaderboardEntry(**entry) for entry in entries],
+    )
+
+
+@router.get("/me", response_model=LeaderboardStatsResponse)
+async def get_my_stats(
+    user_id: str = Depends(require_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get the current user's stats and ranks."""
+    latest = await PuzzleService(db).get_latest_puzzle()
+    service = LeaderboardService(db)
+    stats = await service.get_user_stats(user_id, latest.date if latest else None)
+
+    if not stats:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No stats found for user",
+        )
+
+    return LeaderboardStatsResponse(**stats)
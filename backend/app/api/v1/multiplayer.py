@@ -0,0 +1,189 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.database import AsyncSessionLocal, get_db
+from app.core.security import decode_token, require_user
+from app.services.matchmaking_service import matchmaker
+from app.services.multiplayer_service import Room, RoomCodeUnavailable, multiplayer_engine
+from app.services.room_protocol import negotiate
+from app.services.spectator_service import spectator_hub
+from app.schemas.multiplayer import RoomCreateRequest, RoomPlayerResponse, RoomResponse
+
+router = APIRouter(prefix="/multiplayer", tags=["multiplayer"])
+
+
+def _room_response(room: Room) -> RoomResponse:
+    return RoomResponse(
+        **room.info(),
+        players=[RoomPlayerResponse(**player.progress()) for player in room.players.values()],
+    )
+
+
+async def _get_room(room_code: str) -> Room:
+    room = await multiplayer_engine.get_room(room_code)
+    if room is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Room not found",
+        )
+    return room
+
+
+@router.post("/rooms", response_model=RoomResponse)
+async def create_room(
+    request: RoomCreateRequest,
+    user_id: str = Depends(require_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Create a race room; the creator joins as host."""
+    if not 2 <= request.max_players <= settings.multiplayer_max_players:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"max_players must be between 2 and {settings.multiplayer_max_players}",
+        )
+
+    try:
+        room = await multiplayer_engine.create_room(
+            db,
+            host_id=user_id,
+            puzzle_id=request.puzzle_id,
+            max_players=request.max_players,
+        )
+    except RoomCodeUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    return _room_response(room)
+
+
+@router.post("/quick-match", response_model=RoomResponse)
+async def quick_match(
+    user_id: str = Depends(require_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Join the quick-match room that is filling up, or open the next one."""
+    try:
+        room = await matchmaker.quick_match(db, user_id)
+    except (ValueError, RoomCodeUnavailable) as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        )
+    return _room_response(room)
+
+
+@router.get("/rooms/{room_code}", response_model=RoomResponse)
+async def get_room(room_code: str):
+    """Get a room's status and players' progress."""
+    return _room_response(await _get_room(room_code))
+
+
+@router.post("/rooms/{room_code}/join", response_model=RoomResponse)
+async def join_room(
+    room_code: str,
+    user_id: str = Depends(require_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Join a room that has not started yet."""
+    room = await _get_room(room_code)
+    try:
+        await multiplayer_engine.join(db, room, user_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
+    return _room_response(room)
+
+
+@router.websocket("/rooms/{room_code}/ws")
+async def room_socket(
+    websocket: WebSocket,
+    room_code: str,
+    token: str = Query(...),
+):
+    """Race over one socket.
+
+    Send ``{"type": "guess", "words": [...]}``, ``{"type": "start"}`` (host),
+    ``{"type": "sync"}`` or ``{"type": "ping"}``. The server sends a ``state``
+    snapshot on connect, then ``player_joined``, ``started``, ``progress``,
+    ``guess_result``, ``error`` and finally ``closed`` with the standings.
+    Connecting joins the room if it has not started yet.
+
+    Clients offering the ``connections.v1.binary`` subprotocol get events as
+    compact binary frames (see ``room_protocol``) and may send guesses as
+    word indices; everyone else gets JSON.
+    """
+    try:
+        user_id = decode_token(token).get("sub")
+    except HTTPException:
+        user_id = None
+    if not user_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Authentication required")
+        return
+
+    room = await multiplayer_engine.get_room(room_code)
+    if room is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Room not found")
+        return
+    if user_id not in room.players:
+        try:
+            async with AsyncSessionLocal() as db:
+                await multiplayer_engine.join(db, room, user_id)
+        except ValueError as e:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e))
+            return
+
+    offered = websocket.scope.get("subprotocols", [])
+    codec = negotiate(offered)
+    await websocket.accept(subprotocol=codec.subprotocol if codec.subprotocol in offered else None)
+    connection = await multiplayer_engine.connect(room, user_id, websocket, codec)
+    try:
+        while not connection.closed:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            frame = message.get("text")
+            await multiplayer_engine.handle(room, connection, frame if frame is not None else message.get("bytes", b""))
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: the server side already closed the socket
+        pass
+    finally:
+        await multiplayer_engine.disconnect(room, connection)
+
+
+@router.websocket("/rooms/{room_code}/spectate")
+async def spectate_room(websocket: WebSocket, room_code: str):
+    """Watch a race without playing.
+
+    The server sends a ``spectate`` snapshot (room and standings, no words)
+    on connect and whenever the race changed, at most
+    ``multiplayer_spectator_rate`` times a second; a slow client skips
+    snapshots. Messages from the client are ignored. Subprotocols work as
+    for players.
+    """
+    room = await multiplayer_engine.get_room(room_code)
+    if room is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Room not found")
+        return
+
+    offered = websocket.scope.get("subprotocols", [])
+    codec = negotiate(offered)
+    await websocket.accept(subprotocol=codec.subprotocol if codec.subprotocol in offered else None)
+    spectator = await spectator_hub.watch(room, websocket, codec)
+    try:
+        while not spectator.closed:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        await spectator_hub.unwatch(room, spectator)
@@ -1,11 +1,14 @@
 from datetime import date
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.security import get_current_user_id
 from app.services.puzzle_service import PuzzleService
-from app.schemas.puzzle import PuzzleResponse
+from app.services.puzzle_stats_service import PuzzleStatsService
+from app.schemas.puzzle import PuzzleResponse, PuzzleStatsResponse
 
 router = APIRouter(prefix="/puzzles", tags=["puzzles"])
 
@@ -34,27 +37,72 @@ async def get_todays_puzzle(
 
 @router.get("/archive")
 async def get_archive(
-    limit: int = 50,
-    offset: int = 0,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    include_status: bool = False,
+    user_id: Optional[str] = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get list of all available puzzles."""
+    """Get list of all available puzzles.
+
+    Pass ``next_cursor`` from the previous page as ``cursor`` for flat-latency
+    paging; ``include_status`` adds the caller's completion status.
+    """
     service = PuzzleService(db)
-    puzzles, total = await service.get_archive(limit=limit, offset=offset)
+    try:
+        page, total, next_cursor = await service.get_archive(
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            user_id=user_id if include_status else None,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    puzzles = []
+    for p, game_status in page:
+        entry = {
+            "id": p.id,
+            "puzzle_number": p.puzzle_number,
+            "date": p.date.isoformat(),
+        }
+        if include_status:
+            entry["status"] = game_status
+        puzzles.append(entry)
 
     return {
-        "puzzles": [
-            {
-                "id": p.id,
-                "puzzle_number": p.puzzle_number,
-                "date": p.date.isoformat(),
-            }
-            for p in puzzles
-        ],
+        "puzzles": puzzles,
         "total": total,
+        "next_cursor": next_cursor,
     }
 
 
+@router.get("/{puzzle_id}/stats", response_model=PuzzleStatsResponse)
+async def get_puzzle_stats(
+    puzzle_id: str,
+    solve_time_ms: Optional[int] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get aggregate stats for a puzzle.
+
+    Pass ``solve_time_ms`` to also get ``beat_percent``, the share of players
+    who lost or finished slower.
+    """
+    puzzle = await PuzzleService(db).get_puzzle_by_id(puzzle_id)
+
+    if not puzzle:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Puzzle not found",
+        )
+
+    return await PuzzleStatsService(db).get_stats(puzzle, solve_time_ms)
+
+
 @router.get("/{puzzle_date}", response_model=PuzzleResponse)
 async def get_puzzle_by_date(
     puzzle_date: str,
@@ -88,13 +136,15 @@ async def get_puzzle_by_date(
 
 @router.post("/sync")
 async def sync_puzzles(
+    full: bool = False,
     db: AsyncSession = Depends(get_db),
 ):
-    """Sync puzzles from GitHub source."""
+    """Sync puzzles from GitHub source (incrementally unless full=true)."""
     service = PuzzleService(db)
-    count = await service.sync_puzzles_from_github()
+    report = await service.sync_puzzles(full=full)
 
     return {
-        "message": f"Synced {count} new puzzles",
-        "synced_count": count,
+        "message": f"Synced {report['inserted']} new puzzles",
+        "synced_count": report["inserted"],
+        **report,
     }
@@ -12,6 +12,15 @@ class Settings(BaseSettings):
 
     # Redis
     redis_url: str = "redis://localhost:6379/0"
+    redis_key_prefix: str = "connections"
+    redis_socket_timeout: float = 0.5
+    redis_retry_seconds: int = 30
+    redis_puzzle_ttl_seconds: int = 86400
+    redis_game_state_ttl_seconds: int = 6 * 3600
+
+    # Game session write-behind
+    game_flush_interval_seconds: float = 1.0
+    game_flush_batch_size: int = 500
 
     # JWT
     jwt_secret: str = "your-secret-key-change-in-production"
@@ -22,8 +31,66 @@ class Settings(BaseSettings):
     ollama_url: str = "http://localhost:11434"
     ollama_model: str = "llama3:8b"
 
+    # LLM backend: "ollama", "stub" (no model needed), "record" (Ollama, saving
+    # every response to llm_recording_path) or "replay" (only those responses)
+    llm_backend: str = "ollama"
+    llm_stub_latency_seconds: float = 0.2
+    llm_stub_tokens_per_second: float = 40.0
+    llm_recording_path: str = "data/llm_recordings.jsonl"
+    llm_replay_realtime: bool = False
+
+    # LLM usage summary: last N calls per endpoint
+    llm_accounting_window: int = 500
+
+    # LLM scheduling (one Ollama pod serves every replica's requests). The
+    # concurrency limit is shared by all replicas through Redis, and only
+    # applies per replica while Redis is down; the queue is per replica.
+    llm_max_concurrency: int = 2
+    llm_queue_size: int = 32
+    llm_hint_deadline_seconds: float = 20.0
+    llm_solve_deadline_seconds: float = 90.0
+
+    # Word co-occurrence index, rewritten by each sync that adds puzzles
+    cooccurrence_index_path: str = "data/cooccurrence.idx"
+
+    # Local group solver: skip the LLM when the top group is this clear
+    solver_min_score: float = 6.0
+    solver_min_margin: float = 0.25
+
+    # Auto-solve streaming: flush thinking tokens at this size or age
+    solve_sse_batch_chars: int = 256
+    solve_sse_batch_seconds: float = 0.1
+
+    # Multiplayer races
+    multiplayer_max_players: int = 8
+    multiplayer_send_queue_size: int = 64
+    # Snapshots per second sent to spectators, at most
+    multiplayer_spectator_rate: float = 4.0
+    # Room events between full progress snapshots
+    multiplayer_snapshot_every: int = 16
+    # Each room is owned by one replica; peers take over after the lease lapses
+    multiplayer_lease_seconds: float = 10.0
+    multiplayer_state_ttl_seconds: int = 6 * 3600
+    # Quick-match rooms start when full, or after this wait with two players
+    multiplayer_match_size: int = 4
+    multiplayer_match_wait_seconds: float = 20.0
+    # Rooms without an event for this long are closed; unstarted ones deleted
+    multiplayer_waiting_ttl_seconds: int = 1800
+    multiplayer_playing_ttl_seconds: int = 2 * 3600
+    multiplayer_reap_interval_seconds: float = 60.0
+    multiplayer_reap_batch_size: int = 500
+
+    # AI hint cache
+    hint_cache_size: int = 4096
+    hint_cache_variants: int = 3
+    hint_cache_ttl_seconds: int = 86400
+
     # Puzzle source
     puzzle_source_url: str = "https://raw.githubusercontent.com/Eyefyre/NYT-Connections-Answers/main/connections.json"
+    puzzle_sync_batch_size: int = 200
+
+    # Puzzle cache
+    puzzle_cache_latest_ttl_seconds: int = 60
 
     class Config:
         env_file = ".env"
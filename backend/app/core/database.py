@@ -1,3 +1,4 @@
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
@@ -31,6 +32,26 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+# Changes to tables that already exist, which create_all leaves alone.
+# Each statement must be idempotent: they all run on every startup.
+MIGRATIONS = (
+    "CREATE INDEX IF NOT EXISTS ix_puzzles_date_id ON puzzles (date, id)",
+    "CREATE INDEX IF NOT EXISTS ix_game_sessions_user_puzzle ON game_sessions (user_id, puzzle_id)",
+    "ALTER TABLE leaderboard ADD COLUMN IF NOT EXISTS last_win_date DATE",
+    "CREATE INDEX IF NOT EXISTS ix_leaderboard_total_wins ON leaderboard (total_wins)",
+    "CREATE INDEX IF NOT EXISTS ix_leaderboard_max_streak ON leaderboard (max_streak)",
+    "CREATE INDEX IF NOT EXISTS ix_leaderboard_avg_solve_time_ms ON leaderboard (avg_solve_time_ms)",
+    "ALTER TABLE leaderboard ADD COLUMN IF NOT EXISTS total_solve_time_ms BIGINT NOT NULL DEFAULT 0",
+    "ALTER TABLE leaderboard ADD COLUMN IF NOT EXISTS timed_wins INTEGER NOT NULL DEFAULT 0",
+    # Seed the sums of older rows from their stored mean; the rebuild job gives exact ones
+    "UPDATE leaderboard SET timed_wins = total_wins, "
+    "total_solve_time_ms = avg_solve_time_ms::bigint * total_wins "
+    "WHERE timed_wins = 0 AND avg_solve_time_ms IS NOT NULL AND total_wins > 0",
+)
+
+
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        for statement in MIGRATIONS:
+            await conn.execute(text(statement))
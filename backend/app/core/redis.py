@@ -0,0 +1,27 @@
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from app.config import settings
+
+_client: Optional[Redis] = None
+
+
+def get_redis() -> Redis:
+    """Get the shared Redis client (connections are opened lazily)."""
+    global _client
+    if _client is None:
+        _client = Redis.from_url(
+            settings.redis_url,
+            decode_responses=True,
+            socket_timeout=settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_socket_timeout,
+        )
+    return _client
+
+
+async def close_redis() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
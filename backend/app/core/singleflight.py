@@ -0,0 +1,120 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Coalesce concurrent calls that share a key into one in-flight call.
+
+    The call runs in its own task, so a caller that gives up (e.g. a client
+    disconnect) does not cancel it for the others waiting on the same key.
+    The key is released as soon as the call finishes; later callers start a
+    new flight.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+
+class _Broadcast(Generic[T]):
+    def __init__(self):
+        self.items: list[T] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.task: asyncio.Task | None = None
+
+
+class StreamFlight(Generic[T]):
+    """Fan one async stream out to every concurrent subscriber with the same key.
+
+    The first subscriber starts the producer; later ones replay what has been
+    produced so far and then follow along live. The producer is cancelled if
+    every subscriber leaves before it finishes.
+    """
+
+    def __init__(self):
+        self._streams: dict[Hashable, _Broadcast[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._streams)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._streams
+
+    async def subscribe(
+        self,
+        key: Hashable,
+        factory: Callable[[], AsyncIterator[T]],
+    ) -> AsyncIterator[T]:
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.task = asyncio.create_task(self._produce(key, broadcast, factory))
+
+        broadcast.subscribers += 1
+        try:
+            position = 0
+            while True:
+                async with broadcast.changed:
+                    await broadcast.changed.wait_for(
+                        lambda: position < len(broadcast.items) or broadcast.done
+                    )
+                    pending = broadcast.items[position:]
+                    finished = broadcast.done
+                for item in pending:
+                    yield item
+                position += len(pending)
+                if finished and position == len(broadcast.items):
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.done:
+                if self._streams.get(key) is broadcast:
+                    del self._streams[key]
+                broadcast.task.cancel()
+
+    async def _produce(
+        self,
+        key: Hashable,
+        broadcast: _Broadcast[T],
+        factory: Callable[[], AsyncIterator[T]],
+    ) -> None:
+        stream = factory()
+        try:
+            async for item in stream:
+                async with broadcast.changed:
+                    broadcast.items.append(item)
+                    broadcast.changed.notify_all()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            broadcast.error = e
+        finally:
+            # Release whatever the stream holds even if we stopped mid-item
+            await stream.aclose()
+            # New subscribers from here on start a fresh stream
+            if self._streams.get(key) is broadcast:
+                del self._streams[key]
+            broadcast.done = True
+            async with broadcast.changed:
+                broadcast.changed.notify_all()
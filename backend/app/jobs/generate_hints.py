@@ -0,0 +1,145 @@
+"""Pre-generate the hint bank for synced puzzles.
+
+Usage:
+    python -m app.jobs.generate_hints [--variants N] [--concurrency N]
+                                      [--rate PER_SECOND] [--after-number N]
+                                      [--stub]
+
+Every puzzle has at most 2^4 board states (one per subset of solved
+categories), so hints for all of them can be generated ahead of time and
+served by ``/ai/hint`` without touching Ollama. States already banked for the
+current model and ``HINT_PROMPT_VERSION`` are skipped, so an interrupted run
+simply resumes when rerun. ``--concurrency`` workers share one rate limit.
+``--stub`` swaps Ollama for the deterministic stub backend (with no added
+latency) to exercise the job offline.
+"""
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.core.database import AsyncSessionLocal, init_db
+from app.models.puzzle import Puzzle
+from app.services.ai_service import ai_service
+from app.services.hint_bank_service import HintBankService, open_states, remaining_words
+from app.services.llm_backend import StubBackend
+from app.services.puzzle_cache import PuzzleSnapshot
+
+HintGenerator = Callable[[list[str], int, str], Awaitable[dict]]
+
+
+class RateLimiter:
+    """Space calls at least ``1 / rate`` seconds apart across all workers."""
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1 / rate if rate else 0.0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_at > now:
+                await asyncio.sleep(self._next_at - now)
+            self._next_at = max(now, self._next_at) + self.interval
+
+
+async def bank_state(
+    puzzle: PuzzleSnapshot,
+    mask: int,
+    variants: int,
+    generate: HintGenerator,
+    limiter: RateLimiter,
+    model: str,
+) -> int:
+    """Generate and store hints for one board state; returns how many were kept."""
+    words = remaining_words(puzzle, mask)
+    solved_count = bin(mask).count("1")
+    hints: dict[str, dict] = {}
+    for _ in range(variants):
+        await limiter.wait()
+        try:
+            hint = await generate(words, solved_count, puzzle.id)
+        except Exception as e:
+            print(f"Puzzle #{puzzle.puzzle_number} state {mask:04b}: {e}")
+            continue
+        hints.setdefault(hint["hint"], hint)
+
+    if hints:
+        async with AsyncSessionLocal() as db:
+            await HintBankService(db).store(puzzle.id, mask, model, list(hints.values()))
+            await db.commit()
+    return len(hints)
+
+
+async def run(args: argparse.Namespace) -> None:
+    if args.stub:
+        ai_service.backend = StubBackend()
+    generate: HintGenerator = ai_service.generate_hint
+    model = ai_service.model
+    limiter = RateLimiter(args.rate)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=args.concurrency * 2)
+    started = time.perf_counter()
+    states = 0
+    hints = 0
+
+    async def worker() -> None:
+        nonlocal states, hints
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                hints += await bank_state(*item, args.variants, generate, limiter, model)
+                states += 1
+                if states % 50 == 0:
+                    elapsed = time.perf_counter() - started
+                    print(f"{states} states, {hints} hints in {elapsed:.1f}s")
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(args.concurrency)]
+    try:
+        query = (
+            select(Puzzle)
+            .options(selectinload(Puzzle.categories))
+            .where(Puzzle.puzzle_number > args.after_number)
+            .order_by(Puzzle.puzzle_number)
+            .execution_options(yield_per=100)
+        )
+        async with AsyncSessionLocal() as db:
+            bank = HintBankService(db)
+            result = await db.stream(query)
+            async for puzzle in result.scalars():
+                snapshot = PuzzleSnapshot.from_model(puzzle)
+                banked = await bank.banked_states(snapshot.id, model)
+                for mask in open_states(snapshot):
+                    if mask not in banked:
+                        await queue.put((snapshot, mask))
+    finally:
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+    elapsed = time.perf_counter() - started
+    print(f"Done: {states} states, {hints} hints in {elapsed:.1f}s")
+
+
+async def main(args: argparse.Namespace) -> None:
+    await init_db()
+    await run(args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate the AI hint bank")
+    parser.add_argument("--variants", type=int, default=3, help="hints per board state")
+    parser.add_argument("--concurrency", type=int, default=2, help="parallel LLM calls")
+    parser.add_argument("--rate", type=float, help="max LLM calls per second")
+    parser.add_argument("--after-number", type=int, default=0, help="skip puzzles up to this number")
+    parser.add_argument("--stub", action="store_true", help="use the stub LLM backend")
+    asyncio.run(main(parser.parse_args()))
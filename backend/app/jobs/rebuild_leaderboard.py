@@ -0,0 +1,194 @@
+"""Recompute every leaderboard row from game_sessions.
+
+Usage:
+    python -m app.jobs.rebuild_leaderboard [--batch-size N] [--checkpoint PATH]
+                                           [--after-user-id ID]
+
+Users are processed in batches by id, each in its own transaction. A batch's
+leaderboard rows are locked (FOR UPDATE), then the finished sessions of those
+users are streamed in (user, puzzle date) order and folded into one aggregate
+per user. Games finished live during the rebuild are therefore never
+overwritten, and memory stays bounded by one batch. Rows of users with no
+finished sessions are reset. The last committed user id is written to the
+checkpoint file, and a rerun with the same checkpoint resumes after it. Use
+this to backfill, or to repair drift after an incident.
+"""
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional
+from uuid import uuid4
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.database import AsyncSessionLocal, init_db
+from app.core.redis import close_redis
+from app.models.game import GameSession
+from app.models.leaderboard import Leaderboard
+from app.models.puzzle import Puzzle
+from app.models.user import User
+from app.services.cache_service import redis_cache
+from app.services.leaderboard_service import LeaderboardService, apply_game_result
+
+
+@dataclass
+class UserTotals:
+    user_id: str
+    total_games: int = 0
+    total_wins: int = 0
+    current_streak: int = 0
+    max_streak: int = 0
+    last_win_date: Optional[date] = None
+    avg_solve_time_ms: Optional[int] = None
+    total_mistakes: int = 0
+    perfect_games: int = 0
+    total_solve_time_ms: int = 0
+    timed_wins: int = 0
+
+    def add(self, is_won: bool, mistakes: int, solve_time_ms: Optional[int], puzzle_date: date) -> None:
+        apply_game_result(self, is_won, mistakes, solve_time_ms, puzzle_date)
+
+    def row(self) -> dict:
+        return {
+            "id": str(uuid4()),
+            "user_id": self.user_id,
+            "total_games": self.total_games,
+            "total_wins": self.total_wins,
+            "current_streak": self.current_streak,
+            "max_streak": self.max_streak,
+            "last_win_date": self.last_win_date,
+            "avg_solve_time_ms": self.avg_solve_time_ms,
+            "total_mistakes": self.total_mistakes,
+            "perfect_games": self.perfect_games,
+            "total_solve_time_ms": self.total_solve_time_ms,
+            "timed_wins": self.timed_wins,
+            "updated_at": datetime.utcnow(),
+        }
+
+
+async def rebuild_batch(user_ids: list[str]) -> tuple[int, int]:
+    """Recompute the rows of a batch of users in one transaction.
+
+    Their rows are locked before their sessions are read, so a game that
+    finishes meanwhile either is already committed and counted here, or
+    waits for the lock and is applied on top of the rebuilt row. Users
+    without a row yet get a placeholder first, which a concurrent first game
+    has to wait for as well. Rows of users without finished sessions are
+    reset. Returns the (users, sessions) rebuilt.
+    """
+    finished = GameSession.completed_at.isnot(None)
+    async with AsyncSessionLocal() as db:
+        played = await db.scalars(
+            select(GameSession.user_id)
+            .where(GameSession.user_id.in_(user_ids), finished)
+            .distinct()
+        )
+        placeholders = [UserTotals(user_id=user_id).row() for user_id in played]
+        if placeholders:
+            await db.execute(
+                insert(Leaderboard)
+                .values(placeholders)
+                .on_conflict_do_nothing(index_elements=[Leaderboard.user_id])
+            )
+
+        result = await db.execute(
+            select(Leaderboard.id, Leaderboard.user_id)
+            .where(Leaderboard.user_id.in_(user_ids))
+            .order_by(Leaderboard.user_id)
+            .with_for_update()
+        )
+        row_ids = dict(result.all())
+        if not row_ids:
+            return 0, 0
+
+        totals = {}
+        sessions = 0
+        result = await db.stream(
+            select(
+                GameSession.user_id,
+                GameSession.is_won,
+                GameSession.mistakes,
+                GameSession.solve_time_ms,
+                Puzzle.date,
+            )
+            .join(Puzzle, Puzzle.id == GameSession.puzzle_id)
+            .where(GameSession.user_id.in_(list(row_ids.values())), finished)
+            .order_by(GameSession.user_id, Puzzle.date, GameSession.completed_at)
+        )
+        async for user_id, is_won, mistakes, solve_time_ms, puzzle_date in result:
+            if user_id not in totals:
+                totals[user_id] = UserTotals(user_id=user_id)
+            totals[user_id].add(bool(is_won), mistakes or 0, solve_time_ms, puzzle_date)
+            sessions += 1
+
+        rows = []
+        for row_id, user_id in row_ids.items():
+            row = totals.get(user_id, UserTotals(user_id=user_id)).row()
+            row["id"] = row_id
+            rows.append(row)
+        # Bulk UPDATE by primary key
+        await db.execute(update(Leaderboard), rows)
+        await db.commit()
+    return len(totals), sessions
+
+
+async def rebuild(after_user_id: Optional[str], batch_size: int, checkpoint: Optional[Path]) -> None:
+    started = time.perf_counter()
+    sessions = 0
+    users = 0
+
+    # Page through users by id; each page is rebuilt in its own transaction
+    while True:
+        async with AsyncSessionLocal() as db:
+            query = select(User.id).order_by(User.id).limit(batch_size)
+            if after_user_id:
+                query = query.where(User.id > after_user_id)
+            user_ids = list(await db.scalars(query))
+        if not user_ids:
+            break
+
+        rebuilt_users, rebuilt_sessions = await rebuild_batch(user_ids)
+        users += rebuilt_users
+        sessions += rebuilt_sessions
+        after_user_id = user_ids[-1]
+        if checkpoint:
+            checkpoint.write_text(after_user_id)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{users} users, {sessions} sessions in {elapsed:.1f}s "
+            f"({sessions / elapsed if elapsed else 0:.0f} sessions/s)"
+        )
+
+    # Refresh the ranked boards from the repaired table, after any rebuild in progress
+    while True:
+        async with AsyncSessionLocal() as db:
+            if await LeaderboardService(db).rebuild_index() is not None or not redis_cache.available:
+                break
+        print("Another leaderboard rebuild is running, retrying")
+        await asyncio.sleep(5)
+
+
+async def main(args: argparse.Namespace) -> None:
+    await init_db()
+    checkpoint = Path(args.checkpoint) if args.checkpoint else None
+    after_user_id = args.after_user_id
+    if after_user_id is None and checkpoint and checkpoint.exists():
+        after_user_id = checkpoint.read_text().strip() or None
+        print(f"Resuming after user {after_user_id}")
+
+    try:
+        await rebuild(after_user_id, args.batch_size, checkpoint)
+    finally:
+        await close_redis()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute leaderboard rows from game sessions")
+    parser.add_argument("--batch-size", type=int, default=500, help="users per transaction")
+    parser.add_argument("--checkpoint", help="file recording the last committed user id")
+    parser.add_argument("--after-user-id", help="only rebuild users with a greater id")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,33 @@
+"""Sync puzzles into the database.
+
+Usage:
+    python -m app.jobs.sync_puzzles [--source URL_OR_PATH] [--full]
+
+The source defaults to ``settings.puzzle_source_url``; pass a local file such
+as ``fixtures/connections.json`` to sync offline. Runs are incremental against
+the stored checkpoint, so this is cheap to schedule frequently; ``--full``
+ignores the checkpoint and re-walks the whole source.
+"""
+import argparse
+import asyncio
+import json
+
+from app.core.database import AsyncSessionLocal, init_db
+from app.core.redis import close_redis
+from app.services.puzzle_service import PuzzleService
+
+
+async def main(source: str | None, full: bool) -> None:
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        report = await PuzzleService(db).sync_puzzles(source, full=full)
+    await close_redis()
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync puzzles into the database")
+    parser.add_argument("--source", help="http(s) URL, file:// URL or local path")
+    parser.add_argument("--full", action="store_true", help="ignore the sync checkpoint")
+    args = parser.parse_args()
+    asyncio.run(main(args.source, args.full))
@@ -1,10 +1,22 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.config import settings
-from app.core.database import init_db
+from app.core.database import init_db, AsyncSessionLocal
+from app.core.metrics import registry
+from app.core.redis import close_redis
+from app.services.cooccurrence_index import cooccurrence_index
+from app.services.game_engine import game_engine
+from app.services.leaderboard_service import warm_leaderboard_index
+from app.services.llm_accounting import llm_accounting
+from app.services.matchmaking_service import matchmaker, room_reaper
+from app.services.multiplayer_service import multiplayer_engine
+from app.services.puzzle_cache import puzzle_cache
+from app.services.spectator_service import spectator_hub
 from app.api.v1.router import api_router
 
 
@@ -12,8 +24,24 @@ from app.api.v1.router import api_router
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    async with AsyncSessionLocal() as db:
+        await puzzle_cache.load(db)
+    await cooccurrence_index.warm()
+    game_engine.start()
+    multiplayer_engine.start()
+    matchmaker.start()
+    room_reaper.start()
+    spectator_hub.start()
+    leaderboard_warmup = asyncio.create_task(warm_leaderboard_index())
     yield
     # Shutdown
+    leaderboard_warmup.cancel()
+    await game_engine.stop()
+    await spectator_hub.stop()
+    await matchmaker.stop()
+    await room_reaper.stop()
+    await multiplayer_engine.stop()
+    await close_redis()
 
 
 app = FastAPI(
@@ -51,6 +79,17 @@ async def liveness():
     return {"status": "alive"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return registry.render()
+
+
+@app.get("/metrics/llm")
+async def llm_usage():
+    """Rolling LLM token and latency summary per AI endpoint."""
+    return llm_accounting.summary()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -3,6 +3,9 @@ from app.models.puzzle import Puzzle, Category
 from app.models.game import GameSession
 from app.models.leaderboard import Leaderboard
 from app.models.multiplayer import MultiplayerRoom, RoomPlayer
+from app.models.sync import SyncCheckpoint
+from app.models.stats import PuzzleStats
+from app.models.hint import HintBankEntry
 
 __all__ = [
     "User",
@@ -12,4 +15,7 @@ __all__ = [
     "Leaderboard",
     "MultiplayerRoom",
     "RoomPlayer",
+    "SyncCheckpoint",
+    "PuzzleStats",
+    "HintBankEntry",
 ]
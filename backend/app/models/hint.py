@@ -0,0 +1,36 @@
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import String, Integer, DateTime, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.database import Base
+
+
+class HintBankEntry(Base):
+    """Pre-generated hints for one board state of a puzzle."""
+
+    __tablename__ = "hint_bank"
+    __table_args__ = (
+        UniqueConstraint(
+            "puzzle_id", "solved_mask", "model", "prompt_version",
+            name="uq_hint_bank_state",
+        ),
+    )
+
+    id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False),
+        primary_key=True,
+        default=lambda: str(uuid4()),
+    )
+    puzzle_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False),
+        ForeignKey("puzzles.id", ondelete="CASCADE"),
+    )
+    # Bitmask of solved category indices (see PuzzleSnapshot.solved_mask)
+    solved_mask: Mapped[int] = mapped_column(Integer)
+    model: Mapped[str] = mapped_column(String(100))
+    prompt_version: Mapped[int] = mapped_column(Integer)
+    hints: Mapped[list] = mapped_column(JSON, default=list)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
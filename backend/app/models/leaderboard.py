@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import datetime, date
 from uuid import uuid4
 
-from sqlalchemy import Integer, DateTime, ForeignKey
+from sqlalchemy import BigInteger, Integer, Date, DateTime, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -23,10 +23,13 @@ class Leaderboard(Base):
         index=True,
     )
     total_games: Mapped[int] = mapped_column(Integer, default=0)
-    total_wins: Mapped[int] = mapped_column(Integer, default=0)
+    total_wins: Mapped[int] = mapped_column(Integer, default=0, index=True)
     current_streak: Mapped[int] = mapped_column(Integer, default=0)
-    max_streak: Mapped[int] = mapped_column(Integer, default=0)
-    avg_solve_time_ms: Mapped[int] = mapped_column(Integer, nullable=True)
+    max_streak: Mapped[int] = mapped_column(Integer, default=0, index=True)
+    last_win_date: Mapped[date] = mapped_column(Date, nullable=True)  # Puzzle date ending the current streak
+    avg_solve_time_ms: Mapped[int] = mapped_column(Integer, nullable=True, index=True)
+    total_solve_time_ms: Mapped[int] = mapped_column(BigInteger, default=0)  # Over timed wins
+    timed_wins: Mapped[int] = mapped_column(Integer, default=0)
     total_mistakes: Mapped[int] = mapped_column(Integer, default=0)
     perfect_games: Mapped[int] = mapped_column(Integer, default=0)
     updated_at: Mapped[datetime] = mapped_column(
@@ -1,7 +1,7 @@
 from datetime import datetime, date
 from uuid import uuid4
 
-from sqlalchemy import String, Integer, Date, DateTime, ForeignKey, ARRAY
+from sqlalchemy import String, Integer, Date, DateTime, ForeignKey, ARRAY, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -10,6 +10,10 @@ from app.core.database import Base
 
 class Puzzle(Base):
     __tablename__ = "puzzles"
+    __table_args__ = (
+        # Keyset pagination of the archive
+        Index("ix_puzzles_date_id", "date", "id"),
+    )
 
     id: Mapped[str] = mapped_column(
         UUID(as_uuid=False),
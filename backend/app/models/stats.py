@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from sqlalchemy import Integer, DateTime, ForeignKey, ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.database import Base
+
+
+class PuzzleStats(Base):
+    __tablename__ = "puzzle_stats"
+
+    puzzle_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False),
+        ForeignKey("puzzles.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    plays: Mapped[int] = mapped_column(Integer, default=0)
+    wins: Mapped[int] = mapped_column(Integer, default=0)
+    hint_uses: Mapped[int] = mapped_column(Integer, default=0)
+    # Games finished with N mistakes, N = 0..4
+    mistakes_histogram: Mapped[list[int]] = mapped_column(ARRAY(Integer, zero_indexes=True))
+    # Won games per log-scaled solve time bucket (see puzzle_stats_service)
+    solve_time_histogram: Mapped[list[int]] = mapped_column(ARRAY(Integer, zero_indexes=True))
+    # Flattened 4x4 matrix: solve position * 4 + category index
+    solve_order: Mapped[list[int]] = mapped_column(ARRAY(Integer, zero_indexes=True))
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
@@ -0,0 +1,26 @@
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import String, Integer, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.database import Base
+
+
+class SyncCheckpoint(Base):
+    __tablename__ = "sync_checkpoints"
+
+    id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False),
+        primary_key=True,
+        default=lambda: str(uuid4()),
+    )
+    source_url: Mapped[str] = mapped_column(String(500), unique=True, index=True)
+    etag: Mapped[str] = mapped_column(String(255), nullable=True)
+    last_modified: Mapped[str] = mapped_column(String(100), nullable=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=True)
+    max_puzzle_number: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
@@ -1,5 +1,5 @@
 from app.schemas.user import UserCreate, UserLogin, UserResponse, TokenResponse
-from app.schemas.puzzle import PuzzleResponse, CategoryResponse
+from app.schemas.puzzle import PuzzleResponse, CategoryResponse, PuzzleStatsResponse
 from app.schemas.game import (
     GameStartRequest,
     GameStartResponse,
@@ -8,6 +8,12 @@ from app.schemas.game import (
     GameStateResponse,
 )
 from app.schemas.ai import HintRequest, HintResponse
+from app.schemas.leaderboard import (
+    LeaderboardEntry,
+    LeaderboardResponse,
+    LeaderboardStatsResponse,
+)
+from app.schemas.multiplayer import RoomCreateRequest, RoomPlayerResponse, RoomResponse
 
 __all__ = [
     "UserCreate",
@@ -16,6 +22,7 @@ __all__ = [
     "TokenResponse",
     "PuzzleResponse",
     "CategoryResponse",
+    "PuzzleStatsResponse",
     "GameStartRequest",
     "GameStartResponse",
     "GuessRequest",
@@ -23,4 +30,10 @@ __all__ = [
     "GameStateResponse",
     "HintRequest",
     "HintResponse",
+    "LeaderboardEntry",
+    "LeaderboardResponse",
+    "LeaderboardStatsResponse",
+    "RoomCreateRequest",
+    "RoomPlayerResponse",
+    "RoomResponse",
 ]
@@ -14,11 +14,17 @@ class HintResponse(BaseModel):
 
 class AutoSolveRequest(BaseModel):
     session_id: str
-    remaining_words: list[str]
+    remaining_words: list[str] = []  # Derived server-side; kept for older clients
 
 
 class AutoSolveStep(BaseModel):
-    type: str  # "thinking", "guess", "result"
-    content: str
+    type: str  # "section", "thinking", "guess", "result", "error", "done"
+    step: int | None = None
+    section: str | None = None  # "observations", "analysis", "reasoning", "guess"
+    content: str | None = None
+    source: str | None = None  # "solver" or "llm"
     words: list[str] | None = None
     is_correct: bool | None = None
+    one_away: bool | None = None
+    category: dict | None = None
+    mistakes_remaining: int | None = None
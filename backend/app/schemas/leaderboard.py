@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class LeaderboardEntry(BaseModel):
+    rank: Optional[int] = None
+    user_id: str
+    username: str
+    total_games: int
+    total_wins: int
+    current_streak: int
+    max_streak: int
+    avg_solve_time_ms: Optional[int] = None
+    total_mistakes: int
+    perfect_games: int
+
+
+class LeaderboardResponse(BaseModel):
+    board: str
+    entries: list[LeaderboardEntry]
+
+
+class LeaderboardStatsResponse(LeaderboardEntry):
+    ranks: dict[str, Optional[int]]
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class RoomCreateRequest(BaseModel):
+    puzzle_id: Optional[str] = None  # Latest puzzle when omitted
+    max_players: int = 4
+
+
+class RoomPlayerResponse(BaseModel):
+    user_id: str
+    username: str
+    slot: int
+    solved_mask: int
+    mistakes: int
+    finished: bool
+    won: bool
+    finish_time_ms: Optional[int] = None
+
+
+class RoomResponse(BaseModel):
+    room_code: str
+    puzzle_id: str
+    puzzle_number: int
+    host_id: Optional[str] = None
+    status: str
+    max_players: int
+    started_at: Optional[str] = None
+    players: list[RoomPlayerResponse]
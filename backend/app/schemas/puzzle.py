@@ -26,3 +26,22 @@ class PuzzleResponse(BaseModel):
 
 class PuzzleWithCategoriesResponse(PuzzleResponse):
     categories: list[CategoryResponse]
+
+
+class CategoryStatsResponse(BaseModel):
+    id: str
+    name: str
+    color: str
+    solve_order: list[int]  # Times solved 1st, 2nd, 3rd, 4th
+
+
+class PuzzleStatsResponse(BaseModel):
+    puzzle_id: str
+    plays: int
+    wins: int
+    solve_rate: Optional[float] = None
+    hint_rate: Optional[float] = None
+    mistakes_histogram: list[int]
+    solve_time_percentiles_ms: dict[str, Optional[int]]
+    categories: list[CategoryStatsResponse]
+    beat_percent: Optional[int] = None
@@ -1,22 +1,113 @@
+import asyncio
 import json
-from typing import AsyncGenerator
-
-from ollama import AsyncClient
+from typing import AsyncGenerator, Optional
 
 from app.config import settings
+from app.core.singleflight import SingleFlight, StreamFlight
+from app.services.cooccurrence_index import cooccurrence_index
+from app.services.hint_cache import hint_cache, hint_key
+from app.services.llm_accounting import LLMCall, llm_accounting
+from app.services.llm_backend import LLMBackend, create_backend
+from app.services.llm_scheduler import (
+    PRIORITY_HINT,
+    PRIORITY_SOLVE,
+    LLMOverloaded,
+    llm_scheduler,
+)
+from app.services.solve_parser import SolveStreamParser
+
+# Bump when the hint prompt changes so banked hints from the old one are ignored
+HINT_PROMPT_VERSION = 2
+
+# Past categories quoted in the hint prompt to ground it
+HINT_PAST_CATEGORIES = 3
 
 
 class AIService:
-    def __init__(self):
-        self.client = AsyncClient(host=settings.ollama_url)
-        self.model = settings.ollama_model
+    def __init__(self, backend: Optional[LLMBackend] = None):
+        self.backend = backend or create_backend()
+        # Identical concurrent requests share one Ollama call
+        self._hint_flights: SingleFlight[dict] = SingleFlight()
+        self._solve_flights: StreamFlight[dict] = StreamFlight()
+
+    @property
+    def model(self) -> str:
+        # Part of every cache key, so stub or replayed hints never mix with live ones
+        return self.backend.model
 
     async def get_hint(
         self,
+        puzzle_id: str,
         remaining_words: list[str],
         solved_count: int = 0,
     ) -> dict:
-        """Generate a hint for the player."""
+        """Get a hint for the player, generating one only on a cache miss.
+
+        Raises LLMOverloaded when the LLM queue cannot take the request.
+        """
+        key = hint_key(f"{self.model}:v{HINT_PROMPT_VERSION}", puzzle_id, remaining_words, solved_count)
+        cached = await hint_cache.get(key)
+        if cached:
+            llm_accounting.outcome("hint", "cache_hit")
+            return cached
+
+        if key in self._hint_flights:
+            llm_accounting.outcome("hint", "coalesced")
+        try:
+            hint = await self._hint_flights.do(
+                key,
+                lambda: self._generate_and_cache_hint(key, remaining_words, solved_count, puzzle_id),
+            )
+        except LLMOverloaded:
+            raise
+        except Exception as e:
+            print(f"AI hint error: {e}")
+            return {
+                "hint": "Try grouping words by a common theme or pattern.",
+                "confidence": 0.3,
+                "suggested_words": remaining_words[:4] if remaining_words else [],
+            }
+        return hint
+
+    async def _generate_and_cache_hint(
+        self,
+        key: str,
+        remaining_words: list[str],
+        solved_count: int,
+        puzzle_id: str,
+    ) -> dict:
+        hint = await self.generate_hint(remaining_words, solved_count, puzzle_id)
+        await hint_cache.add(key, hint)
+        return hint
+
+    def _past_categories(self, remaining_words: list[str], puzzle_id: Optional[str]) -> str:
+        """Prompt lines for earlier categories that reused several of the words."""
+        index = cooccurrence_index.current()
+        if index is None:
+            return ""
+        hits = index.categories_with(remaining_words, min_matches=2, exclude_puzzle_id=puzzle_id)
+        if not hits:
+            return ""
+        lines = [
+            f"- {category.name}: {', '.join(words)}"
+            for category, words in hits[:HINT_PAST_CATEGORIES]
+        ]
+        return (
+            "\nPast puzzle categories that grouped some of these words "
+            "(they may be red herrings this time):\n" + "\n".join(lines) + "\n"
+        )
+
+    async def generate_hint(
+        self,
+        remaining_words: list[str],
+        solved_count: int,
+        puzzle_id: Optional[str] = None,
+    ) -> dict:
+        """Ask the LLM for a fresh hint, bypassing caches (raises on failure).
+
+        ``puzzle_id`` keeps the puzzle's own categories out of the grounding.
+        """
+        past_categories = self._past_categories(remaining_words, puzzle_id)
         prompt = f"""You are helping solve a NYT Connections puzzle.
 
 The game has 16 words that form 4 groups of 4 related words each.
@@ -25,7 +116,7 @@ The harder categories often involve wordplay, puns, or less obvious connections.
 
 Remaining words: {', '.join(remaining_words)}
 Already solved: {solved_count} categories
-
+{past_categories}
 Your task: Identify ONE group of 4 words that share a connection.
 
 Think step by step:
@@ -41,40 +132,78 @@ Respond with ONLY valid JSON in this exact format:
 """
 
         try:
-            response = await self.client.chat(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                format="json",
-            )
-
-            content = response["message"]["content"]
+            async with llm_scheduler.slot(
+                PRIORITY_HINT, len(prompt), settings.llm_hint_deadline_seconds
+            ) as deadline:
+                call = LLMCall("hint")
+                async with asyncio.timeout_at(deadline):
+                    content = await self.backend.complete(prompt, json_format=True, call=call)
             result = json.loads(content)
+        except LLMOverloaded:
+            llm_accounting.outcome("hint", "rejected")
+            raise
+        except Exception:
+            llm_accounting.outcome("hint", "error")
+            raise
+        llm_accounting.record(call)
 
-            return {
-                "hint": result.get("hint", "Look for words that might share a common theme."),
-                "confidence": float(result.get("confidence", 0.5)),
-                "suggested_words": result.get("suggested_words", [])[:4],
-            }
-        except Exception as e:
-            print(f"AI hint error: {e}")
-            return {
-                "hint": "Try grouping words by a common theme or pattern.",
-                "confidence": 0.3,
-                "suggested_words": remaining_words[:4] if remaining_words else [],
-            }
+        return {
+            "hint": result.get("hint", "Look for words that might share a common theme."),
+            "confidence": float(result.get("confidence", 0.5)),
+            "suggested_words": result.get("suggested_words", [])[:4],
+        }
 
     async def auto_solve_step(
         self,
         remaining_words: list[str],
         mistakes_remaining: int,
         solved_categories: list[dict],
+        wrong_guesses: Optional[list[dict]] = None,
+    ) -> AsyncGenerator[dict, None]:
+        """Generate step-by-step solve with reasoning (streaming).
+
+        ``wrong_guesses`` ({"words", "one_away"}) are fed back so the model
+        does not repeat them. Concurrent solves of the same board state share
+        one token stream.
+        """
+        wrong_guesses = wrong_guesses or []
+        key = (
+            self.model,
+            tuple(sorted(word.strip().upper() for word in remaining_words)),
+            mistakes_remaining,
+            tuple(cat["name"] for cat in solved_categories),
+            tuple(
+                (tuple(sorted(guess["words"])), bool(guess.get("one_away")))
+                for guess in wrong_guesses
+            ),
+        )
+        if key in self._solve_flights:
+            llm_accounting.outcome("solve", "coalesced")
+        async for step in self._solve_flights.subscribe(
+            key,
+            lambda: self._auto_solve_stream(
+                remaining_words, mistakes_remaining, solved_categories, wrong_guesses
+            ),
+        ):
+            yield step
+
+    async def _auto_solve_stream(
+        self,
+        remaining_words: list[str],
+        mistakes_remaining: int,
+        solved_categories: list[dict],
+        wrong_guesses: list[dict],
     ) -> AsyncGenerator[dict, None]:
-        """Generate step-by-step solve with reasoning (streaming)."""
         solved_info = ""
         if solved_categories:
             solved_info = "\nAlready solved:\n"
             for cat in solved_categories:
                 solved_info += f"- {cat['name']}: {', '.join(cat['words'])}\n"
+        if wrong_guesses:
+            solved_info += "\nWrong guesses so far (do not repeat them):\n"
+            for guess in wrong_guesses:
+                note = " (one away!)" if guess.get("one_away") else ""
+                solved_info += f"- {', '.join(guess['words'])}{note}\n"
 
         prompt = f"""You are solving a NYT Connections puzzle step by step.
 
@@ -96,41 +225,33 @@ GUESS: ["word1", "word2", "word3", "word4"]
 """
 
         try:
-            stream = await self.client.chat(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                stream=True,
-            )
-
-            buffer = ""
-            async for chunk in stream:
-                content = chunk.get("message", {}).get("content", "")
-                buffer += content
-
-                yield {
-                    "type": "thinking",
-                    "content": content,
-                }
-
-            # Extract the guess from the buffer
-            if "GUESS:" in buffer:
-                guess_part = buffer.split("GUESS:")[-1].strip()
-                # Try to parse the guess
+            loop = asyncio.get_running_loop()
+            async with llm_scheduler.slot(
+                PRIORITY_SOLVE, len(prompt), settings.llm_solve_deadline_seconds
+            ) as deadline:
+                call = LLMCall("solve")
+                stream = self.backend.stream(prompt, call)
+                parser = SolveStreamParser()
                 try:
-                    import re
-                    match = re.search(r'\[([^\]]+)\]', guess_part)
-                    if match:
-                        words_str = match.group(1)
-                        words = [w.strip().strip('"\'') for w in words_str.split(',')]
-                        yield {
-                            "type": "guess",
-                            "content": "Making my guess...",
-                            "words": words[:4],
-                        }
-                except Exception:
-                    pass
+                    while not parser.done:
+                        # The deadline bounds every wait, including the first token
+                        try:
+                            chunk = await asyncio.wait_for(anext(stream), deadline - loop.time())
+                        except StopAsyncIteration:
+                            for event in parser.finish():
+                                yield event
+                            break
+                        except TimeoutError:
+                            raise TimeoutError("auto-solve deadline exceeded") from None
+                        for event in parser.feed(chunk):
+                            yield event
+                finally:
+                    # Stop generating as soon as the guess is in
+                    await stream.aclose()
+            llm_accounting.record(call)
 
         except Exception as e:
+            llm_accounting.outcome("solve", "rejected" if isinstance(e, LLMOverloaded) else "error")
             print(f"AI solve error: {e}")
             yield {
                 "type": "error",
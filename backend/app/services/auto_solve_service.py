@@ -0,0 +1,182 @@
+import time
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from app.config import settings
+from app.services.ai_service import ai_service
+from app.services.group_solver import group_solver, normalize
+from app.services.game_state import GameState
+from app.services.puzzle_cache import PuzzleSnapshot
+
+MAX_MISTAKES = 4
+
+
+class AutoSolveSession:
+    """Server-driven auto-solve of one board, recorded guess by guess on the game session.
+
+    Steps loop until every category is solved or the mistakes run out. Each
+    guess comes from the local solver when it is confident, else from the
+    LLM (falling back to the solver if the LLM fails or repeats itself). It
+    is passed to ``record`` as soon as it is chosen, which applies it to the
+    live game session and returns that session; the outcome is read back
+    from it and fed into the next step. Guesses the player makes meanwhile
+    are thus taken into account, and a dropped stream loses nothing already
+    shown. ``guesses`` collects the guesses that were recorded.
+    """
+
+    def __init__(
+        self,
+        puzzle: PuzzleSnapshot,
+        session: GameState,
+        record: Callable[[list[str]], Awaitable[GameState]],
+    ):
+        self.puzzle = puzzle
+        self.record = record
+        self.guesses: list[list[str]] = []
+        self.steps = 0
+        self.sync(session)
+
+    def sync(self, session: GameState) -> None:
+        """Take over the progress of the live game session."""
+        self.solved_categories = list(session.categories_solved or [])
+        self.solved_mask = self.puzzle.solved_mask(self.solved_categories)
+        self.mistakes = session.mistakes
+        self.wrong_guesses = [
+            {"words": guess["words"], "one_away": bool(guess.get("one_away"))}
+            for guess in session.guesses or []
+            if guess.get("result") == "wrong"
+        ]
+
+    @property
+    def solved(self) -> bool:
+        return self.solved_mask == (1 << len(self.puzzle.categories)) - 1
+
+    @property
+    def finished(self) -> bool:
+        return self.solved or self.mistakes >= MAX_MISTAKES
+
+    def remaining_words(self) -> list[str]:
+        # Sorted, so the order never gives the grouping away
+        return sorted(
+            word
+            for index, category in enumerate(self.puzzle.categories)
+            if not self.solved_mask & (1 << index)
+            for word in category.words
+        )
+
+    async def run(self) -> AsyncIterator[dict]:
+        """Yield thinking/guess/result events per step, then a final done event."""
+        while not self.finished:
+            self.steps += 1
+            step = self.steps
+            words = self.remaining_words()
+            tried = {frozenset(map(normalize, guess["words"])) for guess in self.wrong_guesses}
+            source = "solver"
+            guess: Optional[list[str]] = None
+
+            candidate = group_solver.confident(words, exclude=self.puzzle) if len(words) > 4 else None
+            if len(words) == 4:
+                guess = words
+            elif candidate and frozenset(map(normalize, candidate.words)) not in tried:
+                guess = list(candidate.words)
+                yield {"type": "thinking", "step": step, "content": group_solver.hint(candidate)["hint"]}
+            else:
+                source = "llm"
+                async for event in self._llm_step(step, words):
+                    if event["type"] == "guess":
+                        guess = event["words"]
+                    else:
+                        yield event
+
+            guess = self._usable_guess(guess, words, tried)
+            if guess is None:
+                yield {"type": "error", "step": step, "content": "No guess available"}
+                break
+
+            yield {"type": "guess", "step": step, "source": source, "words": guess}
+            yield self._check(step, guess, await self.record(guess))
+
+        yield {
+            "type": "done",
+            "solved": self.solved,
+            "steps": self.steps,
+            "mistakes": self.mistakes,
+        }
+
+    async def _llm_step(self, step: int, words: list[str]) -> AsyncIterator[dict]:
+        """One LLM step, with token chunks batched into fewer thinking events.
+
+        Section events flush the batch, so a thinking event never spans two
+        sections of the model's answer.
+        """
+        pending: list[str] = []
+        size = 0
+        section: Optional[str] = None
+        flushed_at = time.monotonic()
+
+        async for event in ai_service.auto_solve_step(
+            remaining_words=words,
+            mistakes_remaining=MAX_MISTAKES - self.mistakes,
+            solved_categories=self.solved_categories,
+            wrong_guesses=self.wrong_guesses,
+        ):
+            if event["type"] == "thinking":
+                pending.append(event["content"])
+                size += len(event["content"])
+                section = event.get("section")
+                if (
+                    size >= settings.solve_sse_batch_chars
+                    or time.monotonic() - flushed_at >= settings.solve_sse_batch_seconds
+                ):
+                    yield {"type": "thinking", "step": step, "section": section, "content": "".join(pending)}
+                    pending, size, flushed_at = [], 0, time.monotonic()
+                continue
+
+            if pending:
+                yield {"type": "thinking", "step": step, "section": section, "content": "".join(pending)}
+                pending, size = [], 0
+            yield {**event, "step": step}
+
+        if pending:
+            yield {"type": "thinking", "step": step, "section": section, "content": "".join(pending)}
+
+    def _usable_guess(
+        self,
+        guess: Optional[list[str]],
+        words: list[str],
+        tried: set[frozenset[str]],
+    ) -> Optional[list[str]]:
+        """The guess as board words if valid and new, else the best untried solver group."""
+        board = {normalize(word): word for word in words}
+        if guess:
+            picked = frozenset(map(normalize, guess))
+            if len(guess) == 4 and len(picked) == 4 and picked <= board.keys() and picked not in tried:
+                return [board[word] for word in map(normalize, guess)]
+
+        for candidate in group_solver.rank(words, exclude=self.puzzle, limit=len(tried) + 1):
+            if frozenset(map(normalize, candidate.words)) not in tried:
+                return list(candidate.words)
+        return None
+
+    def _check(self, step: int, guess: list[str], session: GameState) -> dict:
+        """The result of a recorded guess, read back from the live session."""
+        self.sync(session)
+        last = session.guesses[-1] if session.guesses else None
+        if last is None or last["words"] != guess:
+            # Overtaken by the player's own guesses; plan the next step afresh
+            return {
+                "type": "result",
+                "step": step,
+                "skipped": True,
+                "mistakes_remaining": MAX_MISTAKES - self.mistakes,
+            }
+
+        self.guesses.append(guess)
+        is_correct = last["result"] == "correct"
+        return {
+            "type": "result",
+            "step": step,
+            "is_correct": is_correct,
+            "one_away": last["one_away"] if not is_correct else None,
+            "category": self.solved_categories[-1] if is_correct else None,
+            "mistakes_remaining": MAX_MISTAKES - self.mistakes,
+        }
@@ -0,0 +1,650 @@
+import json
+import time
+from datetime import date
+from typing import Any, Optional
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.core.redis import get_redis
+from app.services.game_state import GameState
+from app.services.puzzle_cache import PuzzleSnapshot
+
+# Bump when the cached payload format changes so old entries are ignored
+CACHE_VERSION = 1
+
+
+class RedisCache:
+    """Cache shared between backend replicas.
+
+    Every operation degrades to a miss (or a no-op) when Redis is unreachable,
+    and Redis is skipped entirely for ``redis_retry_seconds`` after a failure so
+    callers fall back to Postgres without paying a connect timeout each time.
+    """
+
+    def __init__(self):
+        self._retry_at = 0.0
+        # Keys written to Postgres while Redis was unreachable
+        self._stale_keys: set[str] = set()
+
+    def key(self, *parts: Any) -> str:
+        return ":".join([settings.redis_key_prefix, f"v{CACHE_VERSION}", *map(str, parts)])
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._retry_at
+
+    def _failed(self, error: Exception) -> None:
+        print(f"Redis cache error: {error}")
+        self._retry_at = time.monotonic() + settings.redis_retry_seconds
+
+    async def _evict_stale(self) -> None:
+        """Drop cached copies that went stale while Redis was unreachable."""
+        keys = list(self._stale_keys)
+        await get_redis().delete(*keys)
+        self._stale_keys.difference_update(keys)
+
+    async def _get(self, key: str) -> Optional[dict]:
+        if not self.available:
+            return None
+        try:
+            if self._stale_keys:
+                await self._evict_stale()
+            raw = await get_redis().get(key)
+        except RedisError as e:
+            self._failed(e)
+            return None
+        return json.loads(raw) if raw else None
+
+    async def _set(self, items: dict[str, dict], ttl: int) -> bool:
+        if not self.available:
+            return False
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(key, json.dumps(value), ex=ttl)
+                await pipe.execute()
+        except RedisError as e:
+            self._failed(e)
+            return False
+        return True
+
+    async def _delete(self, *keys: str, force: bool = False) -> None:
+        if not self.available and not force:
+            return
+        try:
+            await get_redis().delete(*keys)
+        except RedisError as e:
+            self._failed(e)
+
+    # Puzzles
+
+    async def get_puzzle_by_id(self, puzzle_id: str) -> Optional[PuzzleSnapshot]:
+        return await self._get_puzzle(self.key("puzzle", "id", puzzle_id))
+
+    async def get_puzzle_by_date(self, puzzle_date: date) -> Optional[PuzzleSnapshot]:
+        return await self._get_puzzle(self.key("puzzle", "date", puzzle_date.isoformat()))
+
+    async def get_puzzle_by_number(self, puzzle_number: int) -> Optional[PuzzleSnapshot]:
+        return await self._get_puzzle(self.key("puzzle", "number", puzzle_number))
+
+    async def get_latest_puzzle(self) -> Optional[PuzzleSnapshot]:
+        return await self._get_puzzle(self.key("puzzle", "latest"))
+
+    async def _get_puzzle(self, key: str) -> Optional[PuzzleSnapshot]:
+        data = await self._get(key)
+        return PuzzleSnapshot.from_dict(data) if data else None
+
+    async def set_puzzle(self, snapshot: PuzzleSnapshot, latest: bool = False) -> None:
+        data = snapshot.to_dict()
+        await self._set(
+            {
+                self.key("puzzle", "id", snapshot.id): data,
+                self.key("puzzle", "date", snapshot.date.isoformat()): data,
+                self.key("puzzle", "number", snapshot.puzzle_number): data,
+            },
+            settings.redis_puzzle_ttl_seconds,
+        )
+        if latest:
+            await self._set(
+                {self.key("puzzle", "latest"): data},
+                settings.puzzle_cache_latest_ttl_seconds,
+            )
+
+    async def invalidate_puzzles(self) -> None:
+        """Drop pointers that a sync can change; snapshots themselves are immutable."""
+        await self._delete(self.key("puzzle", "latest"))
+
+    # Game sessions
+
+    async def get_game_state(self, session_id: str) -> Optional[GameState]:
+        data = await self._get(self.key("game", session_id))
+        return GameState.from_dict(data) if data else None
+
+    async def set_game_state(self, state: GameState) -> None:
+        """Cache an in-progress session; finished sessions are evicted."""
+        key = self.key("game", state.id)
+        if state.completed_at:
+            await self._delete(key)
+        else:
+            await self._set({key: state.to_dict()}, settings.redis_game_state_ttl_seconds)
+
+        if not self.available:
+            # Never leave a stale copy behind that could shadow the DB row
+            self._stale_keys.add(key)
+
+    async def stage_game_state(self, state: GameState) -> bool:
+        """Store a session and queue it for write-behind to Postgres.
+
+        Returns False when Redis is unavailable and the caller must persist
+        the session itself.
+        """
+        if not self.available:
+            return False
+        try:
+            async with get_redis().pipeline(transaction=True) as pipe:
+                pipe.set(
+                    self.key("game", state.id),
+                    json.dumps(state.to_dict()),
+                    ex=settings.redis_game_state_ttl_seconds,
+                )
+                pipe.zadd(self.key("game", "dirty"), {state.id: time.time()})
+                await pipe.execute()
+        except RedisError as e:
+            self._failed(e)
+            self._stale_keys.add(self.key("game", state.id))
+            return False
+        return True
+
+    async def claim_game_flush(self, owner: str, lease_ms: int) -> bool:
+        """Take the lease that lets one replica at a time flush queued sessions."""
+        if not self.available:
+            return False
+        try:
+            return bool(
+                await get_redis().set(self.key("game", "flush-lease"), owner, nx=True, px=lease_ms)
+            )
+        except RedisError as e:
+            self._failed(e)
+            return False
+
+    async def get_dirty_game_states(
+        self,
+        count: int,
+    ) -> tuple[list[GameState], list[tuple[str, float]]]:
+        """
+        Read the oldest queued sessions without dequeuing them.
+        Returns: (states_to_write, queue_entries_to_ack_once_written)
+        """
+        if not self.available:
+            return [], []
+        try:
+            entries = await get_redis().zrange(
+                self.key("game", "dirty"), 0, count - 1, withscores=True
+            )
+            if not entries:
+                return [], []
+            values = await get_redis().mget([self.key("game", sid) for sid, _ in entries])
+        except RedisError as e:
+            self._failed(e)
+            return [], []
+        # Sessions that finished in the meantime were already written through
+        states = [GameState.from_dict(json.loads(raw)) for raw in values if raw]
+        return states, entries
+
+    async def ack_dirty_game_states(self, entries: list[tuple[str, float]]) -> None:
+        """Dequeue flushed sessions unless they were staged again since being read."""
+        if not entries or not self.available:
+            return
+        try:
+            await get_redis().eval(
+                _ACK_DIRTY_SCRIPT,
+                1,
+                self.key("game", "dirty"),
+                *[part for sid, score in entries for part in (sid, repr(score))],
+            )
+        except RedisError as e:
+            self._failed(e)
+
+    async def discard_dirty_game_state(self, session_id: str) -> None:
+        if not self.available:
+            return
+        try:
+            await get_redis().zrem(self.key("game", "dirty"), session_id)
+        except RedisError as e:
+            self._failed(e)
+
+    # Leaderboards
+
+    async def update_leaderboards(self, user_id: str, scores: dict[str, Optional[float]]) -> None:
+        """Set a user's score on each ranked board (None removes them from it).
+
+        While a rebuild runs the score goes to the boards being rebuilt too,
+        so the swap at its end does not roll it back.
+        """
+        if not self.available:
+            return
+        keys = [self.key("leaderboard", "rebuild-lease")]
+        for board in scores:
+            keys += [self.key("leaderboard", board), self.key("leaderboard", board, "building")]
+        try:
+            await get_redis().eval(
+                _UPDATE_LEADERBOARDS_SCRIPT,
+                len(keys),
+                *keys,
+                user_id,
+                *["" if score is None else repr(score) for score in scores.values()],
+            )
+        except RedisError as e:
+            self._failed(e)
+
+    async def leaderboards_ready(self) -> bool:
+        if not self.available:
+            return False
+        try:
+            return bool(await get_redis().exists(self.key("leaderboard", "ready")))
+        except RedisError as e:
+            self._failed(e)
+            return False
+
+    async def claim_leaderboard_rebuild(self, owner: str, lease_ms: int) -> bool:
+        """Take the lease that lets one replica at a time rebuild the boards."""
+        if not self.available:
+            return False
+        try:
+            return bool(
+                await get_redis().set(self.key("leaderboard", "rebuild-lease"), owner, nx=True, px=lease_ms)
+            )
+        except RedisError as e:
+            self._failed(e)
+            return False
+
+    async def renew_leaderboard_rebuild(self, owner: str, lease_ms: int) -> bool:
+        if not self.available:
+            return False
+        try:
+            return bool(
+                await get_redis().eval(
+                    _RENEW_LEASE_SCRIPT, 1, self.key("leaderboard", "rebuild-lease"), owner, lease_ms
+                )
+            )
+        except RedisError as e:
+            self._failed(e)
+            return False
+
+    async def release_leaderboard_rebuild(self, owner: str) -> None:
+        if not self.available:
+            return
+        try:
+            await get_redis().eval(_RELEASE_LEASE_SCRIPT, 1, self.key("leaderboard", "rebuild-lease"), owner)
+        except RedisError as e:
+            self._failed(e)
+
+    async def reset_rebuilt_leaderboards(self, boards: list[str]) -> None:
+        """Discard boards left over from an interrupted rebuild."""
+        await self._delete(*[self.key("leaderboard", board, "building") for board in boards])
+
+    async def add_rebuilt_scores(self, boards: dict[str, dict[str, float]]) -> None:
+        """Append scores to the boards being rebuilt (see swap_rebuilt_leaderboards).
+
+        Scores published since the rebuild started are newer and kept.
+        """
+        if not self.available:
+            return
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for board, scores in boards.items():
+                    if scores:
+                        pipe.zadd(self.key("leaderboard", board, "building"), scores, nx=True)
+                await pipe.execute()
+        except RedisError as e:
+            self._failed(e)
+
+    async def swap_rebuilt_leaderboards(self, boards: list[str], owner: str) -> bool:
+        """Atomically replace the live boards with the rebuilt ones and mark them ready.
+
+        Only while ``owner`` still holds the rebuild lease; returns whether it did.
+        """
+        if not self.available:
+            return False
+        keys = [self.key("leaderboard", "rebuild-lease"), self.key("leaderboard", "ready")]
+        for board in boards:
+            keys += [self.key("leaderboard", board), self.key("leaderboard", board, "building")]
+        try:
+            return bool(await get_redis().eval(_SWAP_LEADERBOARDS_SCRIPT, len(keys), *keys, owner))
+        except RedisError as e:
+            self._failed(e)
+            return False
+
+    async def get_leaderboard(
+        self,
+        board: str,
+        offset: int,
+        limit: int,
+        descending: bool,
+    ) -> Optional[list[tuple[str, float]]]:
+        """A page of (user_id, score), or None if the index is not usable."""
+        if not self.available:
+            return None
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                pipe.exists(self.key("leaderboard", "ready"))
+                pipe.zrange(
+                    self.key("leaderboard", board),
+                    offset,
+                    offset + limit - 1,
+                    desc=descending,
+                    withscores=True,
+                )
+                ready, entries = await pipe.execute()
+        except RedisError as e:
+            self._failed(e)
+            return None
+        return entries if ready else None
+
+    async def get_leaderboard_rank(
+        self,
+        board: str,
+        user_id: str,
+        descending: bool,
+    ) -> Optional[int]:
+        """Zero-based rank of a user on a board, or None if unknown."""
+        if not self.available:
+            return None
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                pipe.exists(self.key("leaderboard", "ready"))
+                if descending:
+                    pipe.zrevrank(self.key("leaderboard", board), user_id)
+                else:
+                    pipe.zrank(self.key("leaderboard", board), user_id)
+                ready, rank = await pipe.execute()
+        except RedisError as e:
+            self._failed(e)
+            return None
+        return rank if ready else None
+
+    # AI hints
+
+    async def get_hints(self, key: str) -> list[dict]:
+        """Cached hint variants for a board state (see hint_cache)."""
+        if not self.available:
+            return []
+        try:
+            values = await get_redis().lrange(self.key("hint", key), 0, -1)
+        except RedisError as e:
+            self._failed(e)
+            return []
+        return [json.loads(raw) for raw in values]
+
+    async def add_hint(self, key: str, hint: dict, max_variants: int) -> None:
+        """Append a hint variant, keeping the newest ``max_variants``."""
+        if not self.available:
+            return
+        try:
+            async with get_redis().pipeline(transaction=True) as pipe:
+                pipe.rpush(self.key("hint", key), json.dumps(hint))
+                pipe.ltrim(self.key("hint", key), -max_variants, -1)
+                pipe.expire(self.key("hint", key), settings.hint_cache_ttl_seconds)
+                await pipe.execute()
+        except RedisError as e:
+            self._failed(e)
+
+    # Multiplayer rooms
+
+    def room_channel(self, code: str) -> str:
+        return self.key("room", code, "events")
+
+    async def claim_room(self, code: str, owner: str, lease_ms: int) -> Optional[bool]:
+        """Take (or extend) ownership of a room; None when Redis cannot tell."""
+        if not self.available:
+            return None
+        try:
+            return bool(
+                await get_redis().eval(_CLAIM_ROOM_SCRIPT, 1, self.key("room", code, "owner"), owner, lease_ms)
+            )
+        except RedisError as e:
+            self._failed(e)
+            return None
+
+    async def renew_rooms(self, codes: list[str], owner: str, lease_ms: int) -> Optional[list[bool]]:
+        """Extend leases still held by ``owner``; None when Redis cannot tell."""
+        if not codes:
+            return []
+        if not self.available:
+            return None
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for code in codes:
+                    pipe.eval(_RENEW_ROOM_SCRIPT, 1, self.key("room", code, "owner"), owner, lease_ms)
+                return [bool(renewed) for renewed in await pipe.execute()]
+        except RedisError as e:
+            self._failed(e)
+            return None
+
+    async def release_room(self, code: str, owner: str) -> None:
+        if not self.available:
+            return
+        try:
+            await get_redis().eval(_RELEASE_ROOM_SCRIPT, 1, self.key("room", code, "owner"), owner)
+        except RedisError as e:
+            self._failed(e)
+
+    async def next_room_number(self, seed: int) -> Optional[int]:
+        """The next room number, counting on from ``seed`` if the counter is gone; None without Redis."""
+        if not self.available:
+            return None
+        try:
+            return await get_redis().eval(_NEXT_ROOM_SCRIPT, 1, self.key("room", "counter"), seed)
+        except RedisError as e:
+            self._failed(e)
+            return None
+
+    async def owned_rooms(self, codes: list[str]) -> Optional[list[bool]]:
+        """Whether some replica holds each room's lease; None when Redis cannot tell."""
+        if not codes:
+            return []
+        if not self.available:
+            return None
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for code in codes:
+                    pipe.exists(self.key("room", code, "owner"))
+                return [bool(exists) for exists in await pipe.execute()]
+        except RedisError as e:
+            self._failed(e)
+            return None
+
+    async def claim_room_reaper(self, owner: str, lease_ms: int) -> bool:
+        """Take the lease that lets one replica at a time clean up stale rooms."""
+        if not self.available:
+            return False
+        try:
+            return bool(
+                await get_redis().set(self.key("room", "reaper-lease"), owner, nx=True, px=lease_ms)
+            )
+        except RedisError as e:
+            self._failed(e)
+            return False
+
+    # LLM slots
+
+    async def acquire_llm_slot(self, holder: str, limit: int, ttl_ms: int) -> Optional[bool]:
+        """Take one of ``limit`` LLM slots shared by every replica for ``ttl_ms`` at most.
+
+        None when Redis cannot tell, so callers fall back to their own limit.
+        """
+        if not self.available:
+            return None
+        try:
+            return bool(
+                await get_redis().eval(_ACQUIRE_SLOT_SCRIPT, 1, self.key("llm", "slots"), holder, limit, ttl_ms)
+            )
+        except RedisError as e:
+            self._failed(e)
+            return None
+
+    async def release_llm_slot(self, holder: str) -> None:
+        if not self.available:
+            return
+        try:
+            await get_redis().zrem(self.key("llm", "slots"), holder)
+        except RedisError as e:
+            self._failed(e)
+
+    async def get_match_room(self) -> Optional[str]:
+        """Code of the quick-match room currently filling up."""
+        if not self.available:
+            return None
+        try:
+            return await get_redis().get(self.key("match", "room"))
+        except RedisError as e:
+            self._failed(e)
+            return None
+
+    async def swap_match_room(self, expected: Optional[str], code: str, ttl_ms: int) -> Optional[bool]:
+        """Point quick-match at ``code`` unless another replica moved it from ``expected`` first."""
+        if not self.available:
+            return None
+        try:
+            return bool(
+                await get_redis().eval(_SWAP_MATCH_SCRIPT, 1, self.key("match", "room"), expected or "", code, ttl_ms)
+            )
+        except RedisError as e:
+            self._failed(e)
+            return None
+
+    async def get_room_state(self, code: str) -> Optional[dict]:
+        return await self._get(self.key("room", code, "state"))
+
+    async def write_rooms(self, ops: list[tuple[str, str, Optional[dict]]]) -> bool:
+        """Apply (op, code, payload) in order: "publish" an event, or "state" to checkpoint (None deletes)."""
+        if not self.available:
+            return False
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for op, code, payload in ops:
+                    if op == "publish":
+                        pipe.publish(self.room_channel(code), json.dumps(payload, separators=(",", ":")))
+                    elif payload is None:
+                        pipe.delete(self.key("room", code, "state"))
+                    else:
+                        pipe.set(
+                            self.key("room", code, "state"),
+                            json.dumps(payload),
+                            ex=settings.multiplayer_state_ttl_seconds,
+                        )
+                await pipe.execute()
+        except RedisError as e:
+            self._failed(e)
+            return False
+        return True
+
+
+# Remove (member, score) pairs from a sorted set only if the score is unchanged
+_ACK_DIRTY_SCRIPT = """
+for i = 1, #ARGV, 2 do
+    local score = redis.call('ZSCORE', KEYS[1], ARGV[i])
+    if score and tonumber(score) == tonumber(ARGV[i + 1]) then
+        redis.call('ZREM', KEYS[1], ARGV[i])
+    end
+end
+return 0
+"""
+
+# Leaderboard score on (live, building) board pairs; building ones only while a rebuild
+# holds KEYS[1]. An empty score removes the user from the board.
+_UPDATE_LEADERBOARDS_SCRIPT = """
+local rebuilding = redis.call('EXISTS', KEYS[1]) == 1
+for i = 2, #KEYS, 2 do
+    local score = ARGV[i / 2 + 1]
+    local last = i + (rebuilding and 1 or 0)
+    for k = i, last do
+        if score == '' then
+            redis.call('ZREM', KEYS[k], ARGV[1])
+        else
+            redis.call('ZADD', KEYS[k], score, ARGV[1])
+        end
+    end
+end
+return 0
+"""
+
+# Replace (live, building) board pairs if ARGV[1] holds the lease in KEYS[1], then mark
+# KEYS[2] ready. RENAME fails on a missing key, so only boards that exist are renamed.
+_SWAP_LEADERBOARDS_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+for i = 3, #KEYS, 2 do
+    redis.call('DEL', KEYS[i])
+    if redis.call('EXISTS', KEYS[i + 1]) == 1 then
+        redis.call('RENAME', KEYS[i + 1], KEYS[i])
+    end
+end
+redis.call('SET', KEYS[2], 1)
+return 1
+"""
+
+# Room ownership leases: claim if free (or already ours), renew and release only our own
+_CLAIM_ROOM_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+elseif not current then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+_RENEW_ROOM_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_ROOM_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# The same checks for any other lease
+_RENEW_LEASE_SCRIPT = _RENEW_ROOM_SCRIPT
+_RELEASE_LEASE_SCRIPT = _RELEASE_ROOM_SCRIPT
+
+# INCR that starts from ARGV[1] when the counter does not exist yet
+_NEXT_ROOM_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'NX')
+return redis.call('INCR', KEYS[1])
+"""
+
+# Counting semaphore: holders scored by expiry time (ms), so a crashed holder's slot lapses
+_ACQUIRE_SLOT_SCRIPT = """
+local now = redis.call('TIME')
+local ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ms)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ms + tonumber(ARGV[3]), ARGV[1])
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+# Compare-and-set; an empty expected value matches a missing key
+_SWAP_MATCH_SCRIPT = """
+if (redis.call('GET', KEYS[1]) or '') == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'PX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+# Singleton instance
+redis_cache = RedisCache()
@@ -0,0 +1,368 @@
+import asyncio
+import json
+import mmap
+import os
+import re
+import struct
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.puzzle import Category, Puzzle
+from app.services.puzzle_cache import PuzzleSnapshot, puzzle_cache
+
+_MAGIC = b"COOCIDX1"
+# word count, category count, membership count, vocab bytes, meta bytes, puzzle count
+_HEADER = struct.Struct("<8s6I")
+_NON_LETTERS = re.compile(r"[^A-Z]")
+
+
+def normalize(word: str) -> str:
+    return _NON_LETTERS.sub("", word.upper())
+
+
+@dataclass(frozen=True, slots=True)
+class PastCategory:
+    id: int
+    puzzle_id: str
+    puzzle_number: int
+    name: str
+    difficulty: int
+    words: tuple[str, ...]
+
+
+class CooccurrenceIndex:
+    """Read-only word/category incidence matrix of every synced category.
+
+    The matrix is stored in CSR form in both directions (word -> categories
+    and category -> words) as flat uint32 arrays, after a small header, a
+    sorted vocabulary and the category metadata. Arrays are read in place
+    through memoryviews, so an index file can be memory-mapped and shared
+    by every worker on the host without parsing.
+    """
+
+    def __init__(self, buffer, source: Optional[mmap.mmap] = None):
+        self._buffer = memoryview(buffer)
+        self._mmap = source
+        magic, n_words, n_categories, n_members, vocab_bytes, meta_bytes, puzzles = (
+            _HEADER.unpack_from(self._buffer, 0)
+        )
+        if magic != _MAGIC:
+            raise ValueError("Not a co-occurrence index")
+        self.word_count = n_words
+        self.category_count = n_categories
+        self.puzzle_count = puzzles
+
+        offset = _HEADER.size
+        sections = []
+        for length in (n_words + 1, n_words + 1, n_members, n_categories + 1, n_members):
+            sections.append(self._buffer[offset:offset + 4 * length].cast("I"))
+            offset += 4 * length
+        (
+            self._word_offsets,
+            self._word_indptr,
+            self._word_categories,
+            self._category_indptr,
+            self._category_words,
+        ) = sections
+        self._vocab = self._buffer[offset:offset + vocab_bytes]
+        offset += vocab_bytes
+        self._meta_view = self._buffer[offset:offset + meta_bytes]
+        self._meta: Optional[list] = None
+
+    @classmethod
+    def build(cls, categories: Iterable[tuple[str, int, str, int, Iterable[str]]], puzzle_count: int) -> bytes:
+        """Serialize (puzzle_id, puzzle_number, name, difficulty, words) rows."""
+        meta = []
+        members: list[list[str]] = []
+        for puzzle_id, puzzle_number, name, difficulty, words in categories:
+            meta.append([puzzle_id, puzzle_number, name, difficulty])
+            members.append(sorted({normalize(word) for word in words} - {""}))
+
+        vocab = sorted({word for words in members for word in words})
+        word_ids = {word: i for i, word in enumerate(vocab)}
+
+        category_indptr = array("I", [0])
+        category_words = array("I")
+        postings: list[list[int]] = [[] for _ in vocab]
+        for category_id, words in enumerate(members):
+            for word in words:
+                category_words.append(word_ids[word])
+                postings[word_ids[word]].append(category_id)
+            category_indptr.append(len(category_words))
+
+        word_indptr = array("I", [0])
+        word_categories = array("I")
+        for categories_of_word in postings:
+            word_categories.extend(categories_of_word)
+            word_indptr.append(len(word_categories))
+
+        encoded = [word.encode("utf-8") for word in vocab]
+        word_offsets = array("I", [0])
+        for word in encoded:
+            word_offsets.append(word_offsets[-1] + len(word))
+        vocab_blob = b"".join(encoded)
+        meta_blob = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+
+        for arr in (word_offsets, word_indptr, word_categories, category_indptr, category_words):
+            if arr.itemsize != 4:
+                raise RuntimeError("uint32 arrays are required")
+        return b"".join([
+            _HEADER.pack(
+                _MAGIC, len(vocab), len(members), len(category_words),
+                len(vocab_blob), len(meta_blob), puzzle_count,
+            ),
+            word_offsets.tobytes(),
+            word_indptr.tobytes(),
+            word_categories.tobytes(),
+            category_indptr.tobytes(),
+            category_words.tobytes(),
+            vocab_blob,
+            meta_blob,
+        ])
+
+    @classmethod
+    def open(cls, path: Path) -> "CooccurrenceIndex":
+        with path.open("rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, source=mapped)
+
+    # Lookups
+
+    def word(self, word_id: int) -> str:
+        start, end = self._word_offsets[word_id], self._word_offsets[word_id + 1]
+        return bytes(self._vocab[start:end]).decode("utf-8")
+
+    def word_id(self, word: str) -> Optional[int]:
+        """Binary search of the sorted vocabulary."""
+        target = normalize(word).encode("utf-8")
+        lo, hi = 0, self.word_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = bytes(self._vocab[self._word_offsets[mid]:self._word_offsets[mid + 1]])
+            if current < target:
+                lo = mid + 1
+            elif current > target:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def vocabulary(self) -> Iterable[str]:
+        return (self.word(i) for i in range(self.word_count))
+
+    def categories_of(self, word: str, exclude_puzzle_id: Optional[str] = None) -> list[int]:
+        """Ids of past categories containing ``word``, ascending."""
+        word_id = self.word_id(word)
+        if word_id is None:
+            return []
+        ids = self._word_categories[self._word_indptr[word_id]:self._word_indptr[word_id + 1]].tolist()
+        if exclude_puzzle_id is not None:
+            meta = self._metadata()
+            ids = [i for i in ids if meta[i][0] != exclude_puzzle_id]
+        return ids
+
+    def category(self, category_id: int) -> PastCategory:
+        puzzle_id, puzzle_number, name, difficulty = self._metadata()[category_id]
+        start, end = self._category_indptr[category_id], self._category_indptr[category_id + 1]
+        return PastCategory(
+            id=category_id,
+            puzzle_id=puzzle_id,
+            puzzle_number=puzzle_number,
+            name=name,
+            difficulty=difficulty,
+            words=tuple(self.word(i) for i in self._category_words[start:end]),
+        )
+
+    def comembers(self, word: str, exclude_puzzle_id: Optional[str] = None) -> Counter:
+        """How often each other word shared a category with ``word``."""
+        own = self.word_id(word)
+        counts: Counter = Counter()
+        for category_id in self.categories_of(word, exclude_puzzle_id):
+            start, end = self._category_indptr[category_id], self._category_indptr[category_id + 1]
+            for word_id in self._category_words[start:end]:
+                if word_id != own:
+                    counts[self.word(word_id)] += 1
+        return counts
+
+    def cooccurring(
+        self,
+        words: list[str],
+        exclude_puzzle_id: Optional[str] = None,
+    ) -> list[tuple[str, str, int]]:
+        """Pairs of ``words`` that shared past categories, most frequent first."""
+        postings = [set(self.categories_of(word, exclude_puzzle_id)) for word in words]
+        pairs = []
+        for i, a in enumerate(words):
+            if not postings[i]:
+                continue
+            for j in range(i + 1, len(words)):
+                count = len(postings[i] & postings[j])
+                if count:
+                    pairs.append((a, words[j], count))
+        pairs.sort(key=lambda pair: -pair[2])
+        return pairs
+
+    def categories_with(
+        self,
+        words: list[str],
+        min_matches: int = 2,
+        exclude_puzzle_id: Optional[str] = None,
+    ) -> list[tuple[PastCategory, list[str]]]:
+        """Past categories containing at least ``min_matches`` of ``words``."""
+        matched: dict[int, list[str]] = {}
+        for word in words:
+            for category_id in self.categories_of(word, exclude_puzzle_id):
+                matched.setdefault(category_id, []).append(word)
+        hits = [
+            (self.category(category_id), hit_words)
+            for category_id, hit_words in matched.items()
+            if len(hit_words) >= min_matches
+        ]
+        hits.sort(key=lambda hit: (-len(hit[1]), hit[0].puzzle_number))
+        return hits
+
+    def find_recycled(
+        self,
+        words: list[str],
+        min_overlap: int = 3,
+        exclude_puzzle_id: Optional[str] = None,
+    ) -> list[PastCategory]:
+        """Past categories that reuse most of a category's words."""
+        return [
+            category
+            for category, _ in self.categories_with(words, min_overlap, exclude_puzzle_id)
+        ]
+
+    def categories(self) -> Iterable[PastCategory]:
+        return (self.category(i) for i in range(self.category_count))
+
+    def _metadata(self) -> list:
+        # Parsed on first use; most lookups never need names
+        if self._meta is None:
+            self._meta = json.loads(bytes(self._meta_view))
+        return self._meta
+
+
+class CooccurrenceIndexStore:
+    """Keeps the current index: the shared file when fresh, else built in memory.
+
+    The sync writes a new file atomically; serving processes pick it up on
+    their next check. Without a usable file the index is built from the
+    in-process puzzle cache in a worker thread, and the previous index is
+    served until it is ready, so it soon catches up with the cache.
+    """
+
+    CHECK_SECONDS = 10.0
+
+    def __init__(self):
+        self._index: Optional[CooccurrenceIndex] = None
+        self._file_mtime: Optional[int] = None
+        self._checked_at = 0.0
+        self._building: Optional[asyncio.Task] = None
+
+    @property
+    def path(self) -> Path:
+        return Path(settings.cooccurrence_index_path)
+
+    def current(self) -> Optional[CooccurrenceIndex]:
+        now = time.monotonic()
+        if self._index is None or now - self._checked_at >= self.CHECK_SECONDS:
+            self._checked_at = now
+            self._refresh_from_file()
+            if len(puzzle_cache) and (self._index is None or self._index.puzzle_count < len(puzzle_cache)):
+                self._build_from_cache()
+        return self._index
+
+    async def warm(self) -> None:
+        """Load or build the index at startup, so the first requests have one."""
+        self.current()
+        if self._building is not None:
+            await self._building
+
+    def _refresh_from_file(self) -> None:
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._file_mtime:
+            return
+        try:
+            index = CooccurrenceIndex.open(self.path)
+        except (OSError, ValueError) as e:
+            print(f"Co-occurrence index load error: {e}")
+            return
+        self._file_mtime = mtime
+        if self._index is None or index.puzzle_count >= self._index.puzzle_count:
+            self._index = index
+
+    def _build_from_cache(self) -> None:
+        snapshots = puzzle_cache.snapshots()
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to keep responsive (scripts)
+            self._index = CooccurrenceIndex(_build_from_snapshots(snapshots))
+            return
+        if self._building is None or self._building.done():
+            self._building = asyncio.create_task(self._build_in_thread(snapshots))
+
+    async def _build_in_thread(self, snapshots: list[PuzzleSnapshot]) -> None:
+        try:
+            index = CooccurrenceIndex(await asyncio.to_thread(_build_from_snapshots, snapshots))
+        except Exception as e:
+            print(f"Co-occurrence index build error: {e}")
+            return
+        if self._index is None or index.puzzle_count > self._index.puzzle_count:
+            self._index = index
+
+    async def rebuild(self, db: AsyncSession) -> CooccurrenceIndex:
+        """Rebuild from the categories table and publish it to the index file."""
+        result = await db.stream(
+            select(Puzzle.id, Puzzle.puzzle_number, Category.name, Category.difficulty, Category.words)
+            .join(Category, Category.puzzle_id == Puzzle.id)
+            .order_by(Puzzle.puzzle_number, Category.difficulty)
+            .execution_options(yield_per=2000)
+        )
+        rows = [tuple(row) async for row in result]
+        # Building and writing are CPU and disk work; keep them off the event loop
+        data = await asyncio.to_thread(
+            CooccurrenceIndex.build, rows, puzzle_count=len({row[0] for row in rows})
+        )
+
+        try:
+            await asyncio.to_thread(self._write, data)
+        except OSError as e:
+            # Still serve the fresh index from memory
+            print(f"Co-occurrence index write error: {e}")
+        self._index = CooccurrenceIndex(data)
+        self._checked_at = time.monotonic()
+        return self._index
+
+    def _write(self, data: bytes) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, self.path)
+
+
+def _build_from_snapshots(snapshots: list[PuzzleSnapshot]) -> bytes:
+    return CooccurrenceIndex.build(
+        (
+            (puzzle.id, puzzle.puzzle_number, category.name, category.difficulty, category.words)
+            for puzzle in sorted(snapshots, key=lambda p: p.puzzle_number)
+            for category in puzzle.categories
+        ),
+        puzzle_count=len(snapshots),
+    )
+
+
+# Singleton instance
+cooccurrence_index = CooccurrenceIndexStore()
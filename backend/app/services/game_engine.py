@@ -0,0 +1,129 @@
+import asyncio
+import os
+import socket
+from typing import Optional
+from weakref import WeakValueDictionary
+
+from sqlalchemy import bindparam, func, update
+
+from app.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.game import GameSession
+from app.services.cache_service import redis_cache
+from app.services.game_state import GameState
+
+_table = GameSession.__table__
+
+# Flushes never overwrite a finished game or a row that already has more guesses
+_FLUSH_STATEMENT = (
+    update(_table)
+    .where(
+        _table.c.id == bindparam("_id"),
+        _table.c.completed_at.is_(None),
+        func.json_array_length(_table.c.guesses) <= bindparam("_guess_count"),
+    )
+    .values(
+        mistakes=bindparam("mistakes"),
+        guesses=bindparam("guesses"),
+        categories_solved=bindparam("categories_solved"),
+        used_ai_hint=bindparam("used_ai_hint"),
+    )
+)
+
+
+class GameEngine:
+    """Write-behind persistence for in-progress game sessions.
+
+    Guesses are applied to the session state held in Redis and queued; a
+    background task writes queued sessions to ``game_sessions`` in batches.
+    Finished games are written through immediately, and the queue lives in
+    Redis so a restarted replica (or its peer) picks up where it left off.
+    """
+
+    def __init__(self):
+        self._locks: WeakValueDictionary[str, asyncio.Lock] = WeakValueDictionary()
+        self._task: Optional[asyncio.Task] = None
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    def lock(self, session_id: str) -> asyncio.Lock:
+        """Per-session lock serializing guesses handled by this replica."""
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[session_id] = lock
+        return lock
+
+    async def stage(self, state: GameState) -> bool:
+        """Queue an in-progress session for write-behind.
+
+        Returns False if the session must be written through by the caller.
+        """
+        if state.completed_at:
+            return False
+        return await redis_cache.stage_game_state(state)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task and drain whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        try:
+            while await self.flush():
+                pass
+        except Exception as e:
+            print(f"Game flush error on shutdown: {e}")
+
+    async def _run(self) -> None:
+        lease_ms = int(settings.game_flush_interval_seconds * 1000)
+        while True:
+            await asyncio.sleep(settings.game_flush_interval_seconds)
+            try:
+                if not await redis_cache.claim_game_flush(self._owner, lease_ms):
+                    continue
+                # Keep draining while batches come back full
+                while await self.flush() >= settings.game_flush_batch_size:
+                    pass
+            except Exception as e:
+                print(f"Game flush error: {e}")
+
+    async def flush(self) -> int:
+        """Write one batch of queued sessions to Postgres. Returns the batch size."""
+        states, entries = await redis_cache.get_dirty_game_states(
+            settings.game_flush_batch_size
+        )
+        if not entries:
+            return 0
+
+        if states:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    _FLUSH_STATEMENT,
+                    [
+                        {
+                            "_id": state.id,
+                            "_guess_count": len(state.guesses),
+                            "mistakes": state.mistakes,
+                            "guesses": state.guesses,
+                            "categories_solved": state.categories_solved,
+                            "used_ai_hint": state.used_ai_hint,
+                        }
+                        for state in states
+                    ],
+                )
+                await db.commit()
+
+        await redis_cache.ack_dirty_game_states(entries)
+        return len(entries)
+
+
+# Singleton instance
+game_engine = GameEngine()
@@ -1,13 +1,17 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.models.game import GameSession
-from app.models.puzzle import Puzzle, Category
+from app.services.cache_service import redis_cache
+from app.services.game_engine import game_engine
+from app.services.game_state import GameState
+from app.services.leaderboard_service import LeaderboardService
+from app.services.puzzle_cache import CategorySnapshot, PuzzleSnapshot
 from app.services.puzzle_service import PuzzleService
+from app.services.puzzle_stats_service import PuzzleStatsService
 
 
 class GameService:
@@ -20,7 +24,7 @@ class GameService:
         user_id: str,
         puzzle_id: Optional[str] = None,
         puzzle_date: Optional[str] = None,
-    ) -> tuple[GameSession, Puzzle, list[str]]:
+    ) -> tuple[GameState, PuzzleSnapshot, list[str]]:
         """Start a new game session."""
         # Get puzzle
         if puzzle_id:
@@ -37,18 +41,18 @@ class GameService:
             raise ValueError("Puzzle not found")
 
         # Check for existing session
-        existing = await self.db.execute(
-            select(GameSession)
+        session_id = await self.db.scalar(
+            select(GameSession.id)
             .where(
                 GameSession.user_id == user_id,
                 GameSession.puzzle_id == puzzle.id,
             )
         )
-        session = existing.scalar_one_or_none()
 
-        if session:
-            # Return existing session
-            shuffled_words = self._get_remaining_words(puzzle, session.categories_solved)
+        if session_id:
+            # Resume it from Redis first: guesses staged there may not be flushed yet
+            state = await self.get_session(session_id)
+            shuffled_words = self._get_remaining_words(puzzle, state.categories_solved)
         else:
             # Create new session
             session = GameSession(
@@ -57,53 +61,114 @@ class GameService:
             )
             self.db.add(session)
             await self.db.commit()
-            await self.db.refresh(session)
             shuffled_words = self.puzzle_service.get_shuffled_words(puzzle)
+            state = GameState.from_model(session)
+            await redis_cache.set_game_state(state)
 
-        return session, puzzle, shuffled_words
+        return state, puzzle, shuffled_words
 
     async def submit_guess(
         self,
         session_id: str,
         user_id: str,
         words: list[str],
-    ) -> tuple[str, Optional[Category], bool, GameSession]:
+    ) -> tuple[str, Optional[CategorySnapshot], bool, GameState, PuzzleSnapshot]:
         """
         Submit a guess and return result.
-        Returns: (result, category_if_correct, one_away, updated_session)
+        Returns: (result, category_if_correct, one_away, updated_session, puzzle)
         """
+        async with game_engine.lock(session_id):
+            return await self._apply_guess(session_id, user_id, words)
+
+    async def _apply_guess(
+        self,
+        session_id: str,
+        user_id: str,
+        words: list[str],
+    ) -> tuple[str, Optional[CategorySnapshot], bool, GameState, PuzzleSnapshot]:
         # Get session
-        result = await self.db.execute(
-            select(GameSession)
-            .where(
-                GameSession.id == session_id,
-                GameSession.user_id == user_id,
-            )
-            .options(selectinload(GameSession.puzzle).selectinload(Puzzle.categories))
-        )
-        session = result.scalar_one_or_none()
+        session = await self.get_session(session_id)
 
-        if not session:
+        if not session or session.user_id != user_id:
             raise ValueError("Game session not found")
 
         if session.completed_at:
             raise ValueError("Game already completed")
 
-        # Check if guess is correct
-        correct_category = None
-        for category in session.puzzle.categories:
-            if set(category.words) == set(words):
-                correct_category = category
-                break
-
-        # Check for "one away" (3 of 4 words correct)
-        one_away = False
-        if not correct_category:
-            for category in session.puzzle.categories:
-                matching = len(set(category.words) & set(words))
-                if matching == 3:
-                    one_away = True
+        puzzle = await self.puzzle_service.get_puzzle_by_id(session.puzzle_id)
+        if not puzzle:
+            raise ValueError("Puzzle not found")
+
+        correct_category, one_away = self._apply(session, puzzle, words)
+
+        if session.completed_at:
+            await self._finish(session, puzzle)
+        else:
+            await self._save(session)
+
+        return (
+            "correct" if correct_category else "wrong",
+            correct_category,
+            one_away,
+            session,
+            puzzle,
+        )
+
+    async def apply_guesses(
+        self,
+        session_id: str,
+        user_id: str,
+        guesses: list[list[str]],
+    ) -> GameState:
+        """Apply guesses (e.g. from auto-solve) with a single write.
+
+        Each guess is checked against the live session first: one using a
+        word that is already solved, or repeating an earlier guess, is skipped.
+        """
+        async with game_engine.lock(session_id):
+            session = await self.get_session(session_id)
+
+            if not session or session.user_id != user_id:
+                raise ValueError("Game session not found")
+
+            if session.completed_at:
+                raise ValueError("Game already completed")
+
+            puzzle = await self.puzzle_service.get_puzzle_by_id(session.puzzle_id)
+            if not puzzle:
+                raise ValueError("Puzzle not found")
+
+            applied = False
+            for words in guesses:
+                if session.completed_at:
                     break
+                solved = {word for category in session.categories_solved for word in category["words"]}
+                tried = {frozenset(guess["words"]) for guess in session.guesses}
+                if solved.intersection(words) or frozenset(words) in tried:
+                    continue
+                self._apply(session, puzzle, words)
+                applied = True
+
+            if not applied:
+                return session
+            if session.completed_at:
+                await self._finish(session, puzzle)
+            else:
+                await self._save(session)
+            return session
+
+    def _apply(
+        self,
+        session: GameState,
+        puzzle: PuzzleSnapshot,
+        words: list[str],
+    ) -> tuple[Optional[CategorySnapshot], bool]:
+        """Evaluate a guess and update the session in memory."""
+        # Evaluate against the precomputed word index
+        correct_category, one_away = puzzle.evaluate_guess(
+            words,
+            solved_mask=puzzle.solved_mask(session.categories_solved),
+        )
 
         # Update session
         guesses = session.guesses or []
@@ -121,7 +186,7 @@ class GameService:
                 "id": correct_category.id,
                 "name": correct_category.name,
                 "difficulty": correct_category.difficulty,
-                "words": correct_category.words,
+                "words": list(correct_category.words),
                 "color": correct_category.color,
             })
             session.categories_solved = solved
@@ -145,34 +210,56 @@ class GameService:
                     (session.completed_at - session.started_at).total_seconds() * 1000
                 )
 
-        await self.db.commit()
-        await self.db.refresh(session)
-
-        return (
-            "correct" if correct_category else "wrong",
-            correct_category,
-            one_away,
-            session,
-        )
+        return correct_category, one_away
 
     async def mark_hint_used(self, session_id: str, user_id: str) -> None:
         """Mark that AI hint was used in session."""
+        async with game_engine.lock(session_id):
+            session = await self.get_session(session_id)
+
+            if session and session.user_id == user_id and not session.used_ai_hint:
+                session.used_ai_hint = True
+                await self._save(session)
+
+    async def _finish(self, session: GameState, puzzle: PuzzleSnapshot) -> None:
+        """Write a finished game through, together with its aggregate updates."""
         result = await self.db.execute(
-            select(GameSession)
+            update(GameSession)
             .where(
-                GameSession.id == session_id,
-                GameSession.user_id == user_id,
+                GameSession.id == session.id,
+                GameSession.completed_at.is_(None),
             )
+            .values(**session.column_values())
         )
-        session = result.scalar_one_or_none()
+        if result.rowcount == 0:
+            await self.db.rollback()
+            raise ValueError("Game already completed")
 
-        if session:
-            session.used_ai_hint = True
-            await self.db.commit()
+        leaderboard_service = LeaderboardService(self.db)
+        entry = await leaderboard_service.record_game(session, puzzle.date)
+        await PuzzleStatsService(self.db).record_game(session, puzzle)
+        await self.db.commit()
+
+        await redis_cache.set_game_state(session)
+        await redis_cache.discard_dirty_game_state(session.id)
+        await leaderboard_service.publish(entry)
+
+    async def _save(self, session: GameState) -> None:
+        """Persist an in-progress session, write-behind unless Redis is unavailable."""
+        if await game_engine.stage(session):
+            return
+
+        await self.db.execute(
+            update(GameSession)
+            .where(GameSession.id == session.id)
+            .values(**session.column_values())
+        )
+        await self.db.commit()
+        await redis_cache.set_game_state(session)
 
     def _get_remaining_words(
         self,
-        puzzle: Puzzle,
+        puzzle: PuzzleSnapshot,
         solved_categories: list[dict],
     ) -> list[str]:
         """Get words not yet solved."""
@@ -191,11 +278,20 @@ class GameService:
         random.shuffle(remaining)
         return remaining
 
-    async def get_session(self, session_id: str) -> Optional[GameSession]:
+    async def get_session(self, session_id: str) -> Optional[GameState]:
         """Get a game session by ID."""
+        cached = await redis_cache.get_game_state(session_id)
+        if cached:
+            return cached
+
         result = await self.db.execute(
             select(GameSession)
             .where(GameSession.id == session_id)
-            .options(selectinload(GameSession.puzzle).selectinload(Puzzle.categories))
         )
-        return result.scalar_one_or_none()
+        session = result.scalar_one_or_none()
+        if not session:
+            return None
+
+        state = GameState.from_model(session)
+        await redis_cache.set_game_state(state)
+        return state
@@ -0,0 +1,65 @@
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Optional
+
+from app.models.game import GameSession
+
+
+@dataclass
+class GameState:
+    """Detached copy of a GameSession row that can live outside the DB session."""
+
+    id: str
+    user_id: str
+    puzzle_id: str
+    started_at: datetime
+    completed_at: Optional[datetime] = None
+    mistakes: int = 0
+    solve_time_ms: Optional[int] = None
+    guesses: list[dict] = field(default_factory=list)
+    categories_solved: list[dict] = field(default_factory=list)
+    is_won: Optional[bool] = None
+    used_ai_hint: bool = False
+
+    @classmethod
+    def from_model(cls, session: GameSession) -> "GameState":
+        return cls(
+            id=session.id,
+            user_id=session.user_id,
+            puzzle_id=session.puzzle_id,
+            started_at=session.started_at,
+            completed_at=session.completed_at,
+            mistakes=session.mistakes or 0,
+            solve_time_ms=session.solve_time_ms,
+            guesses=list(session.guesses or []),
+            categories_solved=list(session.categories_solved or []),
+            is_won=session.is_won,
+            used_ai_hint=bool(session.used_ai_hint),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GameState":
+        data = dict(data)
+        data["started_at"] = datetime.fromisoformat(data["started_at"])
+        if data.get("completed_at"):
+            data["completed_at"] = datetime.fromisoformat(data["completed_at"])
+        return cls(**data)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["started_at"] = self.started_at.isoformat()
+        if self.completed_at:
+            data["completed_at"] = self.completed_at.isoformat()
+        return data
+
+    def column_values(self) -> dict:
+        """Mutable columns, for UPDATE statements against game_sessions."""
+        return {
+            "completed_at": self.completed_at,
+            "mistakes": self.mistakes,
+            "solve_time_ms": self.solve_time_ms,
+            "guesses": self.guesses,
+            "categories_solved": self.categories_solved,
+            "is_won": self.is_won,
+            "used_ai_hint": self.used_ai_hint,
+        }
@@ -0,0 +1,301 @@
+import heapq
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from app.config import settings
+from app.services.cooccurrence_index import CooccurrenceIndex, cooccurrence_index, normalize
+from app.services.puzzle_cache import PuzzleSnapshot
+
+LEXICON_PATH = Path(__file__).resolve().parent.parent / "data" / "compound_partners.txt"
+
+# Blanks in category names mark a compound partner: "___ BALL", "FIRE ___"
+_BLANK_PARTNER = re.compile(r"_{2,}\s*-?\s*([A-Z]{3,})|([A-Z]{3,})\s*-?\s*_{2,}")
+
+# Pairwise feature weights
+W_COOCCUR = 3.0
+W_PARTNER = 2.0
+W_HIDDEN = 1.5
+W_AFFIX = 1.0
+MIN_AFFIX = 3
+MIN_HIDDEN = 3
+
+_HINTS = {
+    "cooccur": "Four of these words share a meaning you may have seen grouped before.",
+    "partner": "Some of these words can team up with the same extra word.",
+    "hidden": "Some of these words hide a shorter word inside them.",
+    "prefix": "Pay attention to how some of these words begin.",
+    "suffix": "Pay attention to how some of these words end.",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Candidate:
+    words: tuple[str, ...]
+    score: float
+    # Feature that contributed most across the group's pairs, e.g. ("suffix", "ING")
+    reason: str
+    detail: str
+
+
+class SolverIndex:
+    """Compound partners and lexicon derived from the co-occurrence index."""
+
+    def __init__(self, cooccurrence: Optional[CooccurrenceIndex] = None):
+        self.cooccurrence = cooccurrence
+        self.partners: dict[str, Counter] = {}
+        self.lexicon: set[str] = set()
+        self._hidden: dict[str, frozenset[str]] = {}
+
+    @classmethod
+    def build(
+        cls,
+        cooccurrence: Optional[CooccurrenceIndex],
+        seed: Optional[Path] = LEXICON_PATH,
+    ) -> "SolverIndex":
+        index = cls(cooccurrence)
+        if seed and seed.exists():
+            index._load_seed(seed)
+        if cooccurrence is not None:
+            index.lexicon.update(word for word in cooccurrence.vocabulary() if len(word) >= MIN_HIDDEN)
+            for category in cooccurrence.categories():
+                for partner in category_partners(category.name):
+                    for word in category.words:
+                        index.partners.setdefault(word, Counter())[partner] += 1
+        return index
+
+    def _load_seed(self, path: Path) -> None:
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if not line.strip() or line.startswith("#"):
+                continue
+            partner, _, words = line.partition(":")
+            partner = normalize(partner)
+            self.lexicon.add(partner)
+            for word in words.split():
+                word = normalize(word)
+                self.partners.setdefault(word, Counter())[partner] += 1
+                self.lexicon.add(word)
+
+    def hidden_words(self, word: str) -> frozenset[str]:
+        """Lexicon words found inside ``word`` (memoized per word)."""
+        hidden = self._hidden.get(word)
+        if hidden is None:
+            if len(self._hidden) >= 10_000:
+                self._hidden.clear()
+            hidden = frozenset(
+                word[start:end]
+                for start in range(len(word))
+                for end in range(start + MIN_HIDDEN, len(word) + 1)
+                if end - start < len(word) and word[start:end] in self.lexicon
+            )
+            self._hidden[word] = hidden
+        return hidden
+
+
+def category_partners(name: str) -> list[str]:
+    """Partner words marked by blanks in a category name."""
+    return [a or b for a, b in _BLANK_PARTNER.findall(name.upper())]
+
+
+def _common_prefix(a: str, b: str) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+class GroupSolver:
+    """Rank candidate groups of four by cheap pairwise features, without an LLM.
+
+    Pairwise scores combine co-occurrence in past categories, shared compound
+    partners, shared hidden words and shared prefixes/suffixes. A group's
+    score is the sum over its six pairs, enumerated for every 4-subset of the
+    remaining words (1820 for a fresh board).
+    """
+
+    def __init__(self):
+        self._index: Optional[SolverIndex] = None
+
+    @property
+    def index(self) -> SolverIndex:
+        # Rebuild lazily whenever a sync has published a new co-occurrence index
+        cooccurrence = cooccurrence_index.current()
+        if self._index is None or self._index.cooccurrence is not cooccurrence:
+            self._index = SolverIndex.build(cooccurrence)
+        return self._index
+
+    def rank(
+        self,
+        words: list[str],
+        exclude: Optional[PuzzleSnapshot] = None,
+        limit: int = 5,
+    ) -> list[Candidate]:
+        """Best-scoring groups of four, highest first.
+
+        Statistics contributed by ``exclude`` (normally the puzzle being
+        played) are discounted so the solver cannot read off its answer.
+        """
+        if len(words) < 4:
+            return []
+        normalized = [normalize(word) for word in words]
+        scores, reasons = self._pair_matrix(normalized, exclude)
+        n = len(words)
+
+        # tail_max[r][c]: best score of word r with any word at index >= c,
+        # an upper bound used to prune prefixes that cannot reach the top.
+        tail_max = []
+        for row in scores:
+            tail = [0.0] * (n + 1)
+            for c in range(n - 1, -1, -1):
+                tail[c] = max(row[c], tail[c + 1])
+            tail_max.append(tail)
+
+        # Sum pair scores with partial sums per prefix of the group; the
+        # innermost level scores a whole row slice at once and is only
+        # unpacked when it can beat the current top ``limit``.
+        top: list[tuple[float, int, int, int, int]] = []
+        threshold = float("-inf")
+        for i in range(n - 3):
+            row_i = scores[i]
+            for j in range(i + 1, n - 2):
+                row_j = scores[j]
+                s_ij = row_i[j]
+                if s_ij + 2 * (tail_max[i][j + 1] + tail_max[j][j + 1]) + max(
+                    tail_max[r][j + 2] for r in range(j + 1, n)
+                ) <= threshold:
+                    continue
+                for k in range(j + 1, n - 1):
+                    row_k = scores[k]
+                    base = s_ij + row_i[k] + row_j[k]
+                    if base + tail_max[i][k + 1] + tail_max[j][k + 1] + tail_max[k][k + 1] <= threshold:
+                        continue
+                    block = list(map(sum, zip(row_i[k + 1:], row_j[k + 1:], row_k[k + 1:])))
+                    for l, s in enumerate(block, k + 1):
+                        if base + s <= threshold:
+                            continue
+                        if len(top) < limit:
+                            heapq.heappush(top, (base + s, i, j, k, l))
+                        else:
+                            heapq.heapreplace(top, (base + s, i, j, k, l))
+                        if len(top) == limit:
+                            threshold = top[0][0]
+
+        ranked = []
+        for score, *members in sorted(top, reverse=True):
+            tally = Counter(
+                reasons[a][b]
+                for x, a in enumerate(members)
+                for b in members[x + 1:]
+                if reasons[a][b] is not None
+            )
+            reason, detail = tally.most_common(1)[0][0] if tally else ("none", "")
+            ranked.append(Candidate(tuple(words[m] for m in members), score, reason, detail))
+        return ranked
+
+    def best(self, words: list[str], exclude: Optional[PuzzleSnapshot] = None) -> Optional[tuple[Candidate, float]]:
+        """Top candidate and its confidence (relative margin over the runner-up)."""
+        ranked = self.rank(words, exclude, limit=2)
+        if not ranked or ranked[0].score <= 0:
+            return None
+        top = ranked[0]
+        runner_up = ranked[1].score if len(ranked) > 1 else 0.0
+        return top, (top.score - runner_up) / top.score
+
+    def confident(self, words: list[str], exclude: Optional[PuzzleSnapshot] = None) -> Optional[Candidate]:
+        """Top candidate if it is strong enough to skip the LLM."""
+        best = self.best(words, exclude)
+        if best is None:
+            return None
+        candidate, margin = best
+        if candidate.score >= settings.solver_min_score and margin >= settings.solver_min_margin:
+            return candidate
+        return None
+
+    def repair(
+        self,
+        suggested: list[str],
+        words: list[str],
+        exclude: Optional[PuzzleSnapshot] = None,
+    ) -> list[str]:
+        """Keep an LLM-suggested group if it is four distinct board words, else use the top candidate."""
+        board = {normalize(word): word for word in words}
+        picked = {normalize(word) for word in suggested}
+        if len(suggested) == 4 and len(picked) == 4 and picked <= board.keys():
+            return [board[word] for word in map(normalize, suggested)]
+        ranked = self.rank(words, exclude, limit=1)
+        return list(ranked[0].words) if ranked else suggested
+
+    def hint(self, candidate: Candidate, confidence: float = 0.8) -> dict:
+        return {
+            "hint": _HINTS.get(candidate.reason, "Look for four words with something in common."),
+            "confidence": confidence,
+            "suggested_words": list(candidate.words),
+        }
+
+    def _pair_matrix(
+        self,
+        words: list[str],
+        exclude: Optional[PuzzleSnapshot],
+    ) -> tuple[list[list[float]], list[list[Optional[tuple[str, str]]]]]:
+        index = self.index
+        n = len(words)
+
+        exclude_id = exclude.id if exclude is not None else None
+        excluded_partners: set[tuple[str, str]] = set()
+        if exclude is not None:
+            for category in exclude.categories:
+                for partner in category_partners(category.name):
+                    excluded_partners.update((normalize(word), partner) for word in category.words)
+
+        # Past categories per word, for co-occurrence counts by set intersection
+        postings = [
+            set(index.cooccurrence.categories_of(word, exclude_id)) if index.cooccurrence else set()
+            for word in words
+        ]
+
+        partners = []
+        for word in words:
+            counts = index.partners.get(word, Counter())
+            partners.append({
+                partner
+                for partner, count in counts.items()
+                if count - ((word, partner) in excluded_partners) > 0
+            })
+        hidden = [index.hidden_words(word) for word in words]
+
+        scores = [[0.0] * n for _ in range(n)]
+        reasons: list[list[Optional[tuple[str, str]]]] = [[None] * n for _ in range(n)]
+        for i in range(n):
+            for j in range(i + 1, n):
+                a, b = words[i], words[j]
+                features = []
+
+                count = len(postings[i] & postings[j])
+                if count > 0:
+                    features.append((W_COOCCUR * min(count, 3), ("cooccur", "")))
+                shared = partners[i] & partners[j]
+                if shared:
+                    features.append((W_PARTNER * len(shared), ("partner", min(shared))))
+                common = hidden[i] & hidden[j]
+                if common:
+                    features.append((W_HIDDEN, ("hidden", max(common, key=len))))
+                prefix = _common_prefix(a, b)
+                if prefix >= MIN_AFFIX:
+                    features.append((W_AFFIX, ("prefix", a[:prefix])))
+                suffix = _common_prefix(a[::-1], b[::-1])
+                if suffix >= MIN_AFFIX:
+                    features.append((W_AFFIX, ("suffix", a[-suffix:])))
+
+                if features:
+                    total = sum(weight for weight, _ in features)
+                    scores[i][j] = scores[j][i] = total
+                    reasons[i][j] = reasons[j][i] = max(features)[1]
+        return scores, reasons
+
+
+# Singleton instance
+group_solver = GroupSolver()
@@ -0,0 +1,79 @@
+import random
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import Counter
+from app.models.hint import HintBankEntry
+from app.services.ai_service import HINT_PROMPT_VERSION
+from app.services.puzzle_cache import PuzzleSnapshot
+
+hint_bank_requests = Counter(
+    "hint_bank_requests_total",
+    "Hint bank lookups by outcome",
+    labels=("result",),
+)
+
+
+def remaining_words(puzzle: PuzzleSnapshot, solved_mask: int) -> list[str]:
+    """Words still on the board once the categories in ``solved_mask`` are solved."""
+    return sorted(
+        word
+        for index, category in enumerate(puzzle.categories)
+        if not solved_mask & (1 << index)
+        for word in category.words
+    )
+
+
+def open_states(puzzle: PuzzleSnapshot) -> list[int]:
+    """Every reachable solved-subset mask that still has words left to hint."""
+    return list(range((1 << len(puzzle.categories)) - 1))
+
+
+class HintBankService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_hint(self, puzzle_id: str, solved_mask: int, model: str) -> Optional[dict]:
+        """A random banked hint for the board state, or None on a miss."""
+        result = await self.db.execute(
+            select(HintBankEntry.hints).where(
+                HintBankEntry.puzzle_id == puzzle_id,
+                HintBankEntry.solved_mask == solved_mask,
+                HintBankEntry.model == model,
+                HintBankEntry.prompt_version == HINT_PROMPT_VERSION,
+            )
+        )
+        hints = result.scalar_one_or_none()
+        if not hints:
+            hint_bank_requests.inc("miss")
+            return None
+        hint_bank_requests.inc("hit")
+        return random.choice(hints)
+
+    async def banked_states(self, puzzle_id: str, model: str) -> set[int]:
+        """Masks of a puzzle that already have hints for the current prompt."""
+        result = await self.db.execute(
+            select(HintBankEntry.solved_mask).where(
+                HintBankEntry.puzzle_id == puzzle_id,
+                HintBankEntry.model == model,
+                HintBankEntry.prompt_version == HINT_PROMPT_VERSION,
+            )
+        )
+        return set(result.scalars().all())
+
+    async def store(self, puzzle_id: str, solved_mask: int, model: str, hints: list[dict]) -> None:
+        """Bank hints for a board state (committed by the caller)."""
+        await self.db.execute(
+            insert(HintBankEntry)
+            .values(
+                puzzle_id=puzzle_id,
+                solved_mask=solved_mask,
+                model=model,
+                prompt_version=HINT_PROMPT_VERSION,
+                hints=hints,
+            )
+            .on_conflict_do_nothing(constraint="uq_hint_bank_state")
+        )
@@ -0,0 +1,101 @@
+import hashlib
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.config import settings
+from app.core.metrics import Counter
+from app.services.cache_service import redis_cache
+
+hint_cache_requests = Counter(
+    "hint_cache_requests_total",
+    "AI hint lookups by outcome",
+    labels=("result",),
+)
+
+
+def hint_key(model: str, puzzle_id: str, remaining_words: list[str], solved_count: int) -> str:
+    """Canonical key for a board state: word order and case do not matter."""
+    words = ",".join(sorted(word.strip().upper() for word in remaining_words))
+    raw = f"{model}|{puzzle_id}|{solved_count}|{words}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _HintEntry:
+    hints: list[dict] = field(default_factory=list)
+    expires_at: float = 0.0
+
+
+class HintCache:
+    """Two-tier cache of generated hints per board state.
+
+    Each key collects up to ``hint_cache_variants`` distinct hints. Until a
+    key is full, lookups miss so another variant gets generated; after that
+    every lookup is served from a random cached variant. The process-local
+    tier is a bounded LRU in front of Redis, which shares variants between
+    replicas.
+    """
+
+    def __init__(self):
+        self._entries: OrderedDict[str, _HintEntry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[dict]:
+        """A cached hint for the board state, or None if one should be generated."""
+        entry = self._local(key)
+        if entry and len(entry.hints) >= settings.hint_cache_variants:
+            hint_cache_requests.inc("local_hit")
+            return random.choice(entry.hints)
+
+        hints = await redis_cache.get_hints(key)
+        if hints:
+            entry = self._store(key, hints)
+            if len(entry.hints) >= settings.hint_cache_variants:
+                hint_cache_requests.inc("redis_hit")
+                return random.choice(entry.hints)
+
+        hint_cache_requests.inc("miss")
+        return None
+
+    async def add(self, key: str, hint: dict) -> None:
+        """Record a freshly generated hint as another variant for the key."""
+        entry = self._local(key)
+        if entry and any(h["hint"] == hint["hint"] for h in entry.hints):
+            return
+        self._store(key, [*(entry.hints if entry else []), hint])
+        await redis_cache.add_hint(key, hint, settings.hint_cache_variants)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _local(self, key: str) -> Optional[_HintEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, hints: list[dict]) -> _HintEntry:
+        # Keep distinct hint texts only, newest last
+        unique = list({h["hint"]: h for h in hints}.values())
+        entry = _HintEntry(
+            hints=unique[-settings.hint_cache_variants:],
+            expires_at=time.monotonic() + settings.hint_cache_ttl_seconds,
+        )
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > settings.hint_cache_size:
+            self._entries.popitem(last=False)
+        return entry
+
+
+# Singleton instance
+hint_cache = HintCache()
@@ -0,0 +1,245 @@
+import os
+import socket
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.models.leaderboard import Leaderboard
+from app.models.user import User
+from app.services.cache_service import redis_cache
+from app.services.game_state import GameState
+
+# Rebuilds hold a lease in Redis, renewed after every batch
+_REBUILD_LEASE_MS = 30_000
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+# Ranked boards: name -> (column, highest first)
+BOARDS = {
+    "wins": (Leaderboard.total_wins, True),
+    "streak": (Leaderboard.max_streak, True),
+    "avg_time": (Leaderboard.avg_solve_time_ms, False),
+}
+
+
+def apply_game_result(
+    entry,
+    is_won: bool,
+    mistakes: int,
+    solve_time_ms: Optional[int],
+    puzzle_date: date,
+) -> None:
+    """Fold one finished game into a user's aggregates in O(1).
+
+    Streaks follow puzzle dates: a win on the day after the last streak win
+    extends it, a later win starts a new one, and a loss on a newer puzzle
+    breaks it. Replays of older puzzles never touch the streak.
+    """
+    entry.total_games += 1
+    entry.total_mistakes += mistakes
+    last_win = entry.last_win_date
+    is_newer = last_win is None or puzzle_date > last_win
+
+    if is_won:
+        entry.total_wins += 1
+        if mistakes == 0:
+            entry.perfect_games += 1
+        if solve_time_ms is not None:
+            # Mean over timed wins, derived from exact totals so it never drifts
+            entry.total_solve_time_ms += solve_time_ms
+            entry.timed_wins += 1
+            entry.avg_solve_time_ms = round(entry.total_solve_time_ms / entry.timed_wins)
+        if is_newer:
+            if last_win is not None and puzzle_date - last_win == timedelta(days=1):
+                entry.current_streak += 1
+            else:
+                entry.current_streak = 1
+            entry.last_win_date = puzzle_date
+            entry.max_streak = max(entry.max_streak, entry.current_streak)
+    elif is_newer:
+        entry.current_streak = 0
+
+
+def board_scores(entry) -> dict[str, Optional[float]]:
+    """Scores for each ranked board (None keeps the user off that board)."""
+    return {
+        "wins": entry.total_wins if entry.total_games else None,
+        "streak": entry.max_streak if entry.max_streak else None,
+        "avg_time": entry.avg_solve_time_ms,
+    }
+
+
+class LeaderboardService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record_game(self, session: GameState, puzzle_date: date) -> Leaderboard:
+        """Apply a finished game to the user's row (committed by the caller)."""
+        result = await self.db.execute(
+            select(Leaderboard)
+            .where(Leaderboard.user_id == session.user_id)
+            .with_for_update()
+        )
+        entry = result.scalar_one_or_none()
+
+        if not entry:
+            entry = Leaderboard(
+                user_id=session.user_id,
+                total_games=0,
+                total_wins=0,
+                current_streak=0,
+                max_streak=0,
+                total_mistakes=0,
+                perfect_games=0,
+                total_solve_time_ms=0,
+                timed_wins=0,
+            )
+            self.db.add(entry)
+
+        apply_game_result(
+            entry,
+            is_won=bool(session.is_won),
+            mistakes=session.mistakes,
+            solve_time_ms=session.solve_time_ms,
+            puzzle_date=puzzle_date,
+        )
+        return entry
+
+    async def publish(self, entry: Leaderboard) -> None:
+        """Push a user's committed aggregates to the ranked Redis boards."""
+        await redis_cache.update_leaderboards(entry.user_id, board_scores(entry))
+
+    async def get_board(self, board: str, limit: int = 50, offset: int = 0) -> list[dict]:
+        """Get a ranked page of a board, from Redis when warm else from the indexed table."""
+        column, descending = BOARDS[board]
+
+        page = await redis_cache.get_leaderboard(board, offset, limit, descending)
+        if page is not None:
+            user_ids = [user_id for user_id, _ in page]
+            result = await self.db.execute(
+                select(Leaderboard, User.username)
+                .join(User, User.id == Leaderboard.user_id)
+                .where(Leaderboard.user_id.in_(user_ids))
+            )
+            rows = {entry.user_id: (entry, username) for entry, username in result.all()}
+            ordered = [rows[user_id] for user_id in user_ids if user_id in rows]
+        else:
+            result = await self.db.execute(
+                select(Leaderboard, User.username)
+                .join(User, User.id == Leaderboard.user_id)
+                .where(self._on_board(board))
+                .order_by(column.desc() if descending else column.asc(), Leaderboard.user_id)
+                .limit(limit)
+                .offset(offset)
+            )
+            ordered = result.all()
+
+        return [
+            self._to_dict(entry, username, rank=offset + i + 1)
+            for i, (entry, username) in enumerate(ordered)
+        ]
+
+    async def get_user_stats(self, user_id: str, latest_puzzle_date: Optional[date]) -> Optional[dict]:
+        """Get a user's aggregates and their rank on every board."""
+        result = await self.db.execute(
+            select(Leaderboard, User.username)
+            .join(User, User.id == Leaderboard.user_id)
+            .where(Leaderboard.user_id == user_id)
+        )
+        row = result.one_or_none()
+        if not row:
+            return None
+        entry, username = row
+
+        ranks = {}
+        scores = board_scores(entry)
+        for board, (column, descending) in BOARDS.items():
+            if scores[board] is None:
+                ranks[board] = None
+                continue
+            rank = await redis_cache.get_leaderboard_rank(board, user_id, descending)
+            if rank is None:
+                # Indexed range count on the board column
+                better = column > scores[board] if descending else column < scores[board]
+                count = await self.db.execute(
+                    select(func.count()).select_from(Leaderboard).where(better)
+                )
+                rank = count.scalar_one()
+            ranks[board] = rank + 1
+
+        stats = self._to_dict(entry, username, rank=None)
+        # A streak only counts while it reaches the latest puzzle
+        if (
+            latest_puzzle_date is None
+            or entry.last_win_date is None
+            or latest_puzzle_date - entry.last_win_date > timedelta(days=1)
+        ):
+            stats["current_streak"] = 0
+        stats["ranks"] = ranks
+        return stats
+
+    async def rebuild_index(self) -> Optional[int]:
+        """Reload the ranked Redis boards from the leaderboard table.
+
+        One replica rebuilds at a time, holding a lease in Redis; scores
+        published meanwhile reach the rebuilt boards too. Returns the rows
+        loaded, or None if another rebuild holds the lease or this one lost it.
+        """
+        if not await redis_cache.claim_leaderboard_rebuild(_OWNER, _REBUILD_LEASE_MS):
+            return None
+        try:
+            await redis_cache.reset_rebuilt_leaderboards(list(BOARDS))
+            count = 0
+            batch = {board: {} for board in BOARDS}
+            result = await self.db.stream(select(Leaderboard).execution_options(yield_per=1000))
+            async for entry in result.scalars():
+                for board, score in board_scores(entry).items():
+                    if score is not None:
+                        batch[board][entry.user_id] = score
+                count += 1
+                if count % 1000 == 0:
+                    await redis_cache.add_rebuilt_scores(batch)
+                    batch = {board: {} for board in BOARDS}
+                    if not await redis_cache.renew_leaderboard_rebuild(_OWNER, _REBUILD_LEASE_MS):
+                        return None
+
+            await redis_cache.add_rebuilt_scores(batch)
+            if not await redis_cache.swap_rebuilt_leaderboards(list(BOARDS), _OWNER):
+                return None
+            return count
+        finally:
+            await redis_cache.release_leaderboard_rebuild(_OWNER)
+
+    def _on_board(self, board: str):
+        if board == "wins":
+            return Leaderboard.total_games > 0
+        if board == "streak":
+            return Leaderboard.max_streak > 0
+        return Leaderboard.avg_solve_time_ms.isnot(None)
+
+    def _to_dict(self, entry: Leaderboard, username: str, rank: Optional[int]) -> dict:
+        return {
+            "rank": rank,
+            "user_id": entry.user_id,
+            "username": username,
+            "total_games": entry.total_games,
+            "total_wins": entry.total_wins,
+            "current_streak": entry.current_streak,
+            "max_streak": entry.max_streak,
+            "avg_solve_time_ms": entry.avg_solve_time_ms,
+            "total_mistakes": entry.total_mistakes,
+            "perfect_games": entry.perfect_games,
+        }
+
+
+async def warm_leaderboard_index() -> None:
+    """Build the ranked Redis boards at startup if no replica has yet (or is)."""
+    try:
+        if await redis_cache.leaderboards_ready() or not redis_cache.available:
+            return
+        async with AsyncSessionLocal() as db:
+            await LeaderboardService(db).rebuild_index()
+    except Exception as e:
+        print(f"Leaderboard warm-up error: {e}")
@@ -0,0 +1,170 @@
+import time
+from collections import Counter as Tally, deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from app.config import settings
+from app.core.metrics import Counter, Histogram
+
+# Ollama reports durations in nanoseconds
+_NS = 1e-9
+
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+llm_calls = Counter(
+    "llm_calls_total",
+    "AI requests by endpoint and outcome (cache_hit, coalesced, generated, error, rejected)",
+    labels=("endpoint", "outcome"),
+)
+llm_prompt_tokens = Histogram(
+    "llm_prompt_tokens", "Prompt tokens per LLM call", TOKEN_BUCKETS, labels=("endpoint",)
+)
+llm_completion_tokens = Histogram(
+    "llm_completion_tokens", "Completion tokens per LLM call", TOKEN_BUCKETS, labels=("endpoint",)
+)
+llm_total_duration = Histogram(
+    "llm_total_duration_seconds", "Model-reported total time per LLM call", SECONDS_BUCKETS, labels=("endpoint",)
+)
+llm_load_duration = Histogram(
+    "llm_load_duration_seconds", "Model load time per LLM call", SECONDS_BUCKETS, labels=("endpoint",)
+)
+llm_eval_duration = Histogram(
+    "llm_eval_duration_seconds", "Completion generation time per LLM call", SECONDS_BUCKETS, labels=("endpoint",)
+)
+llm_time_to_first_token = Histogram(
+    "llm_time_to_first_token_seconds", "Wall time until the first token arrived", SECONDS_BUCKETS, labels=("endpoint",)
+)
+llm_wall_duration = Histogram(
+    "llm_wall_duration_seconds", "Wall time per LLM call, after its queue wait", SECONDS_BUCKETS, labels=("endpoint",)
+)
+
+
+@dataclass(slots=True)
+class LLMCall:
+    """Usage of one LLM call, filled in by the backend as the reply arrives.
+
+    Durations are seconds. Model-reported fields stay ``None`` when the
+    backend does not report them, e.g. a stream closed before Ollama sent
+    its final chunk; ``chunks`` then stands in for the completion tokens.
+    """
+
+    endpoint: str
+    started_at: float = field(default_factory=time.monotonic)
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    total_duration: Optional[float] = None
+    load_duration: Optional[float] = None
+    prompt_eval_duration: Optional[float] = None
+    eval_duration: Optional[float] = None
+    time_to_first_token: Optional[float] = None
+    wall_duration: Optional[float] = None
+    chunks: int = 0
+
+    def token(self) -> None:
+        """Note one streamed chunk; the first sets the time to first token."""
+        self.chunks += 1
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.monotonic() - self.started_at
+
+    def update(self, usage: Any) -> None:
+        """Take the counters of an Ollama response (or final stream chunk)."""
+        get = usage.get
+        if get("prompt_eval_count") is not None:
+            self.prompt_tokens = get("prompt_eval_count")
+        if get("eval_count") is not None:
+            self.completion_tokens = get("eval_count")
+        for name in ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration"):
+            if get(name) is not None:
+                setattr(self, name, get(name) * _NS)
+
+    def usage(self) -> dict:
+        """Counters in Ollama's own format, for recordings."""
+        usage: dict[str, int] = {}
+        if self.prompt_tokens is not None:
+            usage["prompt_eval_count"] = self.prompt_tokens
+        if self.completion_tokens is not None:
+            usage["eval_count"] = self.completion_tokens
+        for name in ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration"):
+            value = getattr(self, name)
+            if value is not None:
+                usage[name] = round(value / _NS)
+        return usage
+
+    @property
+    def tokens_out(self) -> int:
+        return self.completion_tokens if self.completion_tokens is not None else self.chunks
+
+
+def _percentile(values: list[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 4)
+
+
+class LLMAccounting:
+    """Exports LLM usage as metrics and keeps a rolling summary per endpoint.
+
+    The summary covers the last ``llm_accounting_window`` calls and outcomes
+    of each endpoint in this process.
+    """
+
+    def __init__(self, window: Optional[int] = None):
+        self.window = window or settings.llm_accounting_window
+        self._calls: dict[str, deque[LLMCall]] = {}
+        self._outcomes: dict[str, deque[str]] = {}
+
+    def outcome(self, endpoint: str, outcome: str) -> None:
+        llm_calls.inc(endpoint, outcome)
+        self._outcomes.setdefault(endpoint, deque(maxlen=self.window)).append(outcome)
+
+    def record(self, call: LLMCall, outcome: str = "generated") -> None:
+        """Finish ``call`` and account for it."""
+        call.wall_duration = time.monotonic() - call.started_at
+        if call.time_to_first_token is None and outcome == "generated":
+            # Non-streaming: the whole reply is the first token
+            call.time_to_first_token = call.wall_duration
+        self.outcome(call.endpoint, outcome)
+        if outcome != "generated":
+            return
+
+        endpoint = call.endpoint
+        self._calls.setdefault(endpoint, deque(maxlen=self.window)).append(call)
+        if call.prompt_tokens is not None:
+            llm_prompt_tokens.observe(endpoint, value=call.prompt_tokens)
+        llm_completion_tokens.observe(endpoint, value=call.tokens_out)
+        if call.total_duration is not None:
+            llm_total_duration.observe(endpoint, value=call.total_duration)
+        if call.load_duration is not None:
+            llm_load_duration.observe(endpoint, value=call.load_duration)
+        if call.eval_duration is not None:
+            llm_eval_duration.observe(endpoint, value=call.eval_duration)
+        llm_time_to_first_token.observe(endpoint, value=call.time_to_first_token)
+        llm_wall_duration.observe(endpoint, value=call.wall_duration)
+
+    def summary(self) -> dict[str, dict]:
+        summary = {}
+        for endpoint in sorted(self._calls.keys() | self._outcomes.keys()):
+            calls = list(self._calls.get(endpoint, ()))
+            prompt = [c.prompt_tokens for c in calls if c.prompt_tokens is not None]
+            completion = [c.tokens_out for c in calls]
+            eval_seconds = sum(c.eval_duration for c in calls if c.eval_duration)
+            eval_tokens = sum(c.tokens_out for c in calls if c.eval_duration)
+            summary[endpoint] = {
+                "calls": len(calls),
+                "outcomes": dict(Tally(self._outcomes.get(endpoint, ()))),
+                "prompt_tokens_mean": round(sum(prompt) / len(prompt), 1) if prompt else None,
+                "completion_tokens_mean": round(sum(completion) / len(completion), 1) if completion else None,
+                "tokens_per_second": round(eval_tokens / eval_seconds, 1) if eval_seconds else None,
+                "load_seconds_total": round(sum(c.load_duration or 0.0 for c in calls), 3),
+                "time_to_first_token_p50": _percentile([c.time_to_first_token for c in calls], 0.5),
+                "time_to_first_token_p95": _percentile([c.time_to_first_token for c in calls], 0.95),
+                "wall_seconds_p50": _percentile([c.wall_duration for c in calls], 0.5),
+                "wall_seconds_p95": _percentile([c.wall_duration for c in calls], 0.95),
+            }
+        return summary
+
+
+# Singleton instance
+llm_accounting = LLMAccounting()
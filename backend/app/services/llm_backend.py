@@ -0,0 +1,272 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from ollama import AsyncClient
+
+from app.config import settings
+from app.services.llm_accounting import LLMCall
+
+_REMAINING_WORDS = re.compile(r"^Remaining words: (.+)$", re.MULTILINE)
+
+
+class LLMBackend(ABC):
+    """Chat completion backend used by ``AIService``.
+
+    ``complete`` returns a whole reply; ``stream`` yields its text in chunks
+    and stops generating when the caller closes it early. Both fill in the
+    token counts and timings of ``call`` when one is given.
+    """
+
+    model: str = ""
+
+    @abstractmethod
+    async def complete(self, prompt: str, json_format: bool = False, call: Optional[LLMCall] = None) -> str:
+        ...
+
+    @abstractmethod
+    def stream(self, prompt: str, call: Optional[LLMCall] = None) -> AsyncIterator[str]:
+        ...
+
+
+class OllamaBackend(LLMBackend):
+    def __init__(self, url: str, model: str):
+        self.client = AsyncClient(host=url)
+        self.model = model
+
+    async def complete(self, prompt: str, json_format: bool = False, call: Optional[LLMCall] = None) -> str:
+        options = {"format": "json"} if json_format else {}
+        response = await self.client.chat(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            **options,
+        )
+        if call is not None:
+            call.update(response)
+        return response["message"]["content"]
+
+    async def stream(self, prompt: str, call: Optional[LLMCall] = None) -> AsyncIterator[str]:
+        chunks = await self.client.chat(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True,
+        )
+        try:
+            async for chunk in chunks:
+                content = chunk.get("message", {}).get("content", "")
+                if call is not None:
+                    if content:
+                        call.token()
+                    if chunk.get("done"):
+                        # Only the final chunk carries the counters
+                        call.update(chunk)
+                yield content
+        finally:
+            # Closing the response makes Ollama stop generating
+            if hasattr(chunks, "aclose"):
+                await chunks.aclose()
+
+
+class StubBackend(LLMBackend):
+    """Deterministic local stand-in for a model, for benchmarks and offline runs.
+
+    Replies depend only on the prompt: the words after ``Remaining words:``
+    are shuffled with a prompt-seeded RNG and four are picked. ``latency``
+    is the time to first token and ``tokens_per_second`` paces the rest
+    (roughly one token per word); zero disables either delay.
+    """
+
+    model = "stub"
+
+    def __init__(self, latency_seconds: float = 0.0, tokens_per_second: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.tokens_per_second = tokens_per_second
+
+    async def complete(self, prompt: str, json_format: bool = False, call: Optional[LLMCall] = None) -> str:
+        reply = self._reply(prompt, json_format)
+        tokens = len(reply.split())
+        eval_seconds = tokens / self.tokens_per_second if self.tokens_per_second else 0.0
+        if self.latency_seconds + eval_seconds:
+            await asyncio.sleep(self.latency_seconds + eval_seconds)
+        if call is not None:
+            call.update(self._usage(prompt, tokens, eval_seconds))
+        return reply
+
+    async def stream(self, prompt: str, call: Optional[LLMCall] = None) -> AsyncIterator[str]:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        interval = 1 / self.tokens_per_second if self.tokens_per_second else 0.0
+        tokens = re.findall(r"\S+\s*", self._reply(prompt, json_format=False))
+        for token in tokens:
+            if interval:
+                await asyncio.sleep(interval)
+            if call is not None:
+                call.token()
+            yield token
+        if call is not None:
+            call.update(self._usage(prompt, len(tokens), len(tokens) * interval))
+
+    def _usage(self, prompt: str, tokens: int, eval_seconds: float) -> dict:
+        # Roughly four characters per prompt token
+        return {
+            "prompt_eval_count": len(prompt) // 4,
+            "eval_count": tokens,
+            "total_duration": round((self.latency_seconds + eval_seconds) * 1e9),
+            "load_duration": 0,
+            "eval_duration": round(eval_seconds * 1e9),
+        }
+
+    def _reply(self, prompt: str, json_format: bool) -> str:
+        match = _REMAINING_WORDS.search(prompt)
+        words = [word.strip() for word in match.group(1).split(",")] if match else []
+        rng = random.Random(hashlib.sha1(prompt.encode("utf-8")).digest())
+        picked = rng.sample(words, 4) if len(words) >= 4 else words
+
+        if json_format:
+            return json.dumps({
+                "hint": f"Think about what {picked[0] if picked else 'these words'} has in common with others.",
+                "confidence": 0.5,
+                "suggested_words": picked,
+            })
+        return (
+            f"OBSERVATIONS: There are {len(words)} words left on the board.\n"
+            f"ANALYSIS: {', '.join(picked)} look like they could belong together.\n"
+            "REASONING: This is the stub backend, so the group is picked at random.\n"
+            f"GUESS: {json.dumps(picked)}\n"
+        )
+
+
+class ReplayMiss(LookupError):
+    """No recorded response matches the prompt."""
+
+
+class RecordingBackend(LLMBackend):
+    """Record responses of another backend to a JSON-lines file, or replay them.
+
+    Responses are keyed by model, mode and prompt. In ``record`` mode every
+    reply from ``inner`` is appended to the file (a stream as the chunks the
+    caller consumed, with their offsets in seconds); in ``replay`` mode the
+    file is the only source and a prompt that was never recorded raises
+    ``ReplayMiss``. ``realtime`` replays streams at their recorded pace.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        model: str,
+        inner: Optional[LLMBackend] = None,
+        realtime: bool = False,
+    ):
+        self.path = path
+        self.model = model
+        self.inner = inner
+        self.realtime = realtime
+        self._recordings: dict[str, dict] = {}
+        if inner is None:
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.inner is not None
+
+    def key(self, prompt: str, kind: str) -> str:
+        return hashlib.sha1(f"{self.model}\0{kind}\0{prompt}".encode("utf-8")).hexdigest()
+
+    async def complete(self, prompt: str, json_format: bool = False, call: Optional[LLMCall] = None) -> str:
+        kind = "json" if json_format else "text"
+        key = self.key(prompt, kind)
+        if not self.recording:
+            entry = self._recorded(key)
+            if call is not None:
+                call.update(entry.get("usage", {}))
+            return entry["content"]
+
+        call = call if call is not None else LLMCall("record")
+        content = await self.inner.complete(prompt, json_format, call)
+        self._append({"key": key, "kind": kind, "content": content, "usage": call.usage()})
+        return content
+
+    async def stream(self, prompt: str, call: Optional[LLMCall] = None) -> AsyncIterator[str]:
+        key = self.key(prompt, "stream")
+        if not self.recording:
+            entry = self._recorded(key)
+            started = time.monotonic()
+            for offset, chunk in entry["chunks"]:
+                if self.realtime:
+                    wait = started + offset - time.monotonic()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                if call is not None and chunk:
+                    call.token()
+                yield chunk
+            if call is not None:
+                call.update(entry.get("usage", {}))
+            return
+
+        call = call if call is not None else LLMCall("record")
+        chunks: list[tuple[float, str]] = []
+        started = time.monotonic()
+        source = self.inner.stream(prompt, call)
+        try:
+            async for chunk in source:
+                chunks.append((round(time.monotonic() - started, 4), chunk))
+                yield chunk
+        finally:
+            await source.aclose()
+            # Record what the caller consumed; a replay stops at the same point
+            if chunks:
+                self._append({"key": key, "kind": "stream", "chunks": chunks, "usage": call.usage()})
+
+    def _recorded(self, key: str) -> dict:
+        try:
+            return self._recordings[key]
+        except KeyError:
+            raise ReplayMiss(f"No recorded LLM response for {key} in {self.path}") from None
+
+    def _load(self) -> None:
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except OSError as e:
+            print(f"LLM recording load error: {e}")
+            return
+        for line in lines:
+            if line.strip():
+                entry = json.loads(line)
+                self._recordings[entry["key"]] = entry
+
+    def _append(self, entry: dict) -> None:
+        self._recordings[entry["key"]] = entry
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        except OSError as e:
+            print(f"LLM recording write error: {e}")
+
+
+def create_backend(name: Optional[str] = None) -> LLMBackend:
+    """Backend for ``settings.llm_backend``: ollama, stub, record or replay."""
+    name = name or settings.llm_backend
+    if name == "ollama":
+        return OllamaBackend(settings.ollama_url, settings.ollama_model)
+    if name == "stub":
+        return StubBackend(settings.llm_stub_latency_seconds, settings.llm_stub_tokens_per_second)
+    if name == "record":
+        return RecordingBackend(
+            Path(settings.llm_recording_path),
+            settings.ollama_model,
+            inner=OllamaBackend(settings.ollama_url, settings.ollama_model),
+        )
+    if name == "replay":
+        return RecordingBackend(
+            Path(settings.llm_recording_path),
+            settings.ollama_model,
+            realtime=settings.llm_replay_realtime,
+        )
+    raise ValueError(f"Unknown LLM backend: {name}")
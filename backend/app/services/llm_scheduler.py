@@ -0,0 +1,180 @@
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import socket
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from app.config import settings
+from app.core.metrics import Counter, Gauge, Histogram
+from app.services.cache_service import redis_cache
+
+# Lower runs first
+PRIORITY_HINT = 0
+PRIORITY_SOLVE = 1
+
+# A shared slot outlives its request's deadline by this much before it lapses
+_SLOT_GRACE_SECONDS = 5.0
+
+llm_queue_depth = Gauge("llm_queue_depth", "LLM requests waiting for a slot")
+llm_in_flight = Gauge("llm_in_flight", "LLM requests currently running")
+llm_queue_wait = Histogram(
+    "llm_queue_wait_seconds",
+    "Time LLM requests spent waiting for a slot",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+llm_rejected = Counter(
+    "llm_rejected_total",
+    "LLM requests turned away before running",
+    labels=("reason",),
+)
+
+
+class LLMOverloaded(Exception):
+    """The LLM cannot take the request now; retry after ``retry_after`` seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"LLM is overloaded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class LLMScheduler:
+    """Concurrency limit and bounded priority queue in front of the LLM.
+
+    At most ``llm_max_concurrency`` requests run at once across all
+    replicas: a request holding one of this replica's slots also takes one
+    of the slots shared in Redis, polling until one frees up (without Redis
+    the limit is per replica). Others wait in a per-replica queue of at most
+    ``llm_queue_size``, ordered by (priority, prompt length, arrival), so
+    hints go before auto-solves and short prompts before long ones. A full
+    queue rejects new requests immediately, and each request must finish by
+    its deadline, so overload turns into fast rejections instead of everyone
+    timing out.
+    """
+
+    def __init__(self):
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._running = 0
+        self._queue: list[tuple[int, int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        # Moving average of how long a slot is held, for Retry-After
+        self._avg_service_seconds = 5.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained."""
+        backlog = (len(self._queue) + 1) / settings.llm_max_concurrency
+        return max(1, math.ceil(backlog * self._avg_service_seconds))
+
+    def check_capacity(self) -> None:
+        """Fail fast if a new request would be rejected right now."""
+        if self._running >= settings.llm_max_concurrency and len(self._queue) >= settings.llm_queue_size:
+            llm_rejected.inc("queue_full")
+            raise LLMOverloaded(self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self, priority: int, cost: int, timeout: float) -> AsyncIterator[float]:
+        """Hold one of the LLM slots.
+
+        Yields the request's deadline (event loop time), ``timeout`` seconds
+        after it was queued, which the caller enforces on its LLM call.
+        Raises LLMOverloaded if the queue is full or the deadline passes
+        while waiting.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        enqueued_at = time.monotonic()
+        await self._acquire(priority, cost, deadline)
+        try:
+            holder = await self._acquire_shared(deadline)
+        except BaseException:
+            self._release()
+            raise
+        started_at = time.monotonic()
+        llm_queue_wait.observe(value=started_at - enqueued_at)
+        try:
+            yield deadline
+        finally:
+            elapsed = time.monotonic() - started_at
+            self._avg_service_seconds += (elapsed - self._avg_service_seconds) * 0.2
+            if holder is not None:
+                await redis_cache.release_llm_slot(holder)
+            self._release()
+
+    async def _acquire_shared(self, deadline: float) -> Optional[str]:
+        """Take a slot shared by all replicas; None if Redis cannot coordinate them."""
+        loop = asyncio.get_running_loop()
+        holder = f"{self._owner}:{next(self._seq)}"
+        delay = 0.02
+        while True:
+            ttl_ms = int((deadline - loop.time() + _SLOT_GRACE_SECONDS) * 1000)
+            acquired = await redis_cache.acquire_llm_slot(holder, settings.llm_max_concurrency, ttl_ms)
+            if acquired is None:
+                return None
+            if acquired:
+                return holder
+            if loop.time() + delay >= deadline:
+                llm_rejected.inc("deadline")
+                raise LLMOverloaded(self.retry_after())
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    async def _acquire(self, priority: int, cost: int, deadline: float) -> None:
+        if self._running < settings.llm_max_concurrency and not self._queue:
+            self._running += 1
+            llm_in_flight.set(value=self._running)
+            return
+
+        if len(self._queue) >= settings.llm_queue_size:
+            llm_rejected.inc("queue_full")
+            raise LLMOverloaded(self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, cost, next(self._seq), waiter))
+        llm_queue_depth.set(value=len(self._queue))
+        try:
+            async with asyncio.timeout_at(deadline):
+                await waiter
+        except TimeoutError:
+            self._forget(waiter)
+            llm_rejected.inc("deadline")
+            raise LLMOverloaded(self.retry_after())
+        except asyncio.CancelledError:
+            self._forget(waiter)
+            raise
+
+    def _forget(self, waiter: asyncio.Future) -> None:
+        """Drop an abandoned waiter, passing on a slot it was already handed."""
+        if waiter.done() and not waiter.cancelled():
+            self._release()
+            return
+        waiter.cancel()
+        self._queue = [entry for entry in self._queue if entry[3] is not waiter]
+        heapq.heapify(self._queue)
+        llm_queue_depth.set(value=len(self._queue))
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next live waiter
+        while self._queue:
+            *_, waiter = heapq.heappop(self._queue)
+            if not waiter.done():
+                waiter.set_result(None)
+                llm_queue_depth.set(value=len(self._queue))
+                return
+        self._running -= 1
+        llm_in_flight.set(value=self._running)
+        llm_queue_depth.set(value=0)
+
+
+# Singleton instance
+llm_scheduler = LLMScheduler()
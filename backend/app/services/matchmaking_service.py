@@ -0,0 +1,234 @@
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import Counter
+from app.models.multiplayer import MultiplayerRoom
+from app.services.cache_service import redis_cache
+from app.services.multiplayer_service import Room, multiplayer_engine
+
+multiplayer_matches = Counter(
+    "multiplayer_quick_matches_total",
+    "Quick-match requests by outcome (joined, created)",
+    labels=("outcome",),
+)
+multiplayer_reaped = Counter(
+    "multiplayer_reaped_rooms_total",
+    "Stale multiplayer rooms cleaned up, by action (closed, deleted)",
+    labels=("action",),
+)
+
+
+class Matchmaker:
+    """Quick-match: groups players into rooms of ``multiplayer_match_size``.
+
+    Every replica fills the same room, whose code is kept in Redis and moved
+    on with a compare-and-set once that room is full or started; without
+    Redis each replica fills its own. Joining the current room takes no lock
+    at all, and only opening the next one is serialized on this replica.
+    A room starts once it is full, or ``multiplayer_match_wait_seconds``
+    after it opened if at least two players are in.
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        # Current room when Redis is unavailable
+        self._code: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def quick_match(self, db: AsyncSession, user_id: str) -> Room:
+        # Only rooms lost to another replica count; any other retry means a room moved on
+        lost = 0
+        while lost < 3:
+            code = await self._current()
+            room = await multiplayer_engine.get_room(code) if code else None
+            if room is not None and room.quick_match:
+                try:
+                    await multiplayer_engine.join(db, room, user_id)
+                except ValueError:
+                    # Full or started; open the next room
+                    pass
+                else:
+                    multiplayer_matches.inc("joined")
+                    if room.status == "waiting" and len(room.players) >= room.max_players:
+                        await multiplayer_engine.submit(room, room.host_id, {"type": "start"})
+                    return room
+
+            async with self._lock:
+                if await self._current() != code:
+                    # Someone opened the next room while we waited
+                    continue
+                room = await multiplayer_engine.create_room(
+                    db, user_id, max_players=settings.multiplayer_match_size, quick_match=True
+                )
+                if await self._swap(code, room.code):
+                    multiplayer_matches.inc("created")
+                    return room
+            # Another replica opened one first; play there instead
+            await multiplayer_engine.close(room)
+            lost += 1
+        raise ValueError("No quick-match room available, try again")
+
+    async def _current(self) -> Optional[str]:
+        if not redis_cache.available:
+            return self._code
+        return await redis_cache.get_match_room()
+
+    async def _swap(self, expected: Optional[str], code: str) -> bool:
+        ttl_ms = int(settings.multiplayer_waiting_ttl_seconds * 1000)
+        swapped = await redis_cache.swap_match_room(expected, code, ttl_ms)
+        if swapped is False:
+            return False
+        self._code = code
+        return True
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(1.0)
+            try:
+                await self.start_due()
+            except Exception as e:
+                print(f"Quick-match error: {e}")
+
+    async def start_due(self) -> None:
+        """Start quick-match rooms owned here that waited long enough."""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.multiplayer_match_wait_seconds)
+        for room in multiplayer_engine:
+            if (
+                room.owned
+                and room.quick_match
+                and room.status == "waiting"
+                and len(room.players) >= 2
+                and room.created_at <= cutoff
+            ):
+                try:
+                    await multiplayer_engine.start_race(room, room.host_id)
+                except ValueError:
+                    pass
+
+
+class RoomReaper:
+    """Closes rooms nobody plays any more and cleans up their rows.
+
+    Every replica closes the idle rooms it owns: waiting rooms after
+    ``multiplayer_waiting_ttl_seconds`` without an event, races after
+    ``multiplayer_playing_ttl_seconds``. One replica at a time, holding a
+    lease in Redis, also sweeps rows of rooms no replica owns any more:
+    rooms that never started are deleted together with their
+    ``room_players`` rows, and abandoned races are marked closed.
+    """
+
+    def __init__(self):
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        lease_ms = int(settings.multiplayer_reap_interval_seconds * 1000)
+        while True:
+            await asyncio.sleep(settings.multiplayer_reap_interval_seconds)
+            try:
+                await self.close_idle()
+                if await redis_cache.claim_room_reaper(self._owner, lease_ms):
+                    await self.sweep()
+            except Exception as e:
+                print(f"Room reaper error: {e}")
+
+    async def close_idle(self) -> int:
+        now = datetime.utcnow()
+        waiting = now - timedelta(seconds=settings.multiplayer_waiting_ttl_seconds)
+        playing = now - timedelta(seconds=settings.multiplayer_playing_ttl_seconds)
+        closed = 0
+        for room in multiplayer_engine:
+            if not room.owned or not room.open:
+                continue
+            if room.active_at < (waiting if room.status == "waiting" else playing):
+                await multiplayer_engine.close(room, "closed")
+                closed += 1
+        multiplayer_reaped.inc("closed", amount=closed)
+        return closed
+
+    async def sweep(self) -> int:
+        """Clean up one batch of stale room rows. Returns how many were touched."""
+        now = datetime.utcnow()
+        waiting = now - timedelta(seconds=settings.multiplayer_waiting_ttl_seconds)
+        playing = now - timedelta(seconds=settings.multiplayer_playing_ttl_seconds)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(MultiplayerRoom.id, MultiplayerRoom.room_code, MultiplayerRoom.started_at)
+                .where(
+                    or_(
+                        and_(
+                            MultiplayerRoom.started_at.is_(None),
+                            MultiplayerRoom.status.in_(("waiting", "closed")),
+                            MultiplayerRoom.created_at < waiting,
+                        ),
+                        and_(
+                            MultiplayerRoom.status == "playing",
+                            MultiplayerRoom.started_at < playing,
+                        ),
+                    )
+                )
+                .limit(settings.multiplayer_reap_batch_size)
+            )
+            rows = result.all()
+            owned = await redis_cache.owned_rooms([row.room_code for row in rows])
+            if owned is None:
+                # Cannot tell which rooms are still live elsewhere
+                return 0
+            stale = [
+                row for row, live in zip(rows, owned)
+                if not live and row.room_code not in multiplayer_engine
+            ]
+            unstarted = [row.id for row in stale if row.started_at is None]
+            abandoned = [row.id for row in stale if row.started_at is not None]
+            if unstarted:
+                # room_players rows go with them (ON DELETE CASCADE)
+                await db.execute(delete(MultiplayerRoom).where(MultiplayerRoom.id.in_(unstarted)))
+            if abandoned:
+                await db.execute(
+                    update(MultiplayerRoom)
+                    .where(MultiplayerRoom.id.in_(abandoned))
+                    .values(status="closed")
+                )
+            await db.commit()
+        multiplayer_reaped.inc("deleted", amount=len(unstarted))
+        multiplayer_reaped.inc("closed", amount=len(abandoned))
+        return len(stale)
+
+
+# Singleton instances
+matchmaker = Matchmaker()
+room_reaper = RoomReaper()
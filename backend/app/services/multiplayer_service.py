@@ -0,0 +1,1017 @@
+import asyncio
+import hashlib
+import os
+import random
+import secrets
+import socket
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterator, Optional
+from uuid import uuid4
+
+from fastapi import WebSocket
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import Counter, Gauge
+from app.core.singleflight import SingleFlight
+from app.models.multiplayer import MultiplayerRoom, RoomPlayer
+from app.models.user import User
+from app.services.cache_service import redis_cache
+from app.services.puzzle_cache import PuzzleSnapshot
+from app.services.puzzle_service import PuzzleService
+from app.services.room_bus import RoomBus
+from app.services.room_protocol import Codec, Frame, decode_message
+
+# No 0/O or 1/I, so codes survive being read aloud
+ROOM_CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+ROOM_CODE_LENGTH = 6
+MAX_MISTAKES = 4
+
+# Codes are 30 bits, five per character, permuted as two 15-bit halves
+_CODE_BITS = 5 * ROOM_CODE_LENGTH
+_HALF_BITS = _CODE_BITS // 2
+_HALF_MASK = (1 << _HALF_BITS) - 1
+_CODE_KEY = hashlib.blake2b(settings.jwt_secret.encode("utf-8"), digest_size=16, person=b"room-codes").digest()
+
+multiplayer_rooms = Gauge("multiplayer_rooms", "Multiplayer rooms held in memory")
+multiplayer_connections = Gauge("multiplayer_connections", "Open multiplayer WebSocket connections")
+multiplayer_guesses = Counter(
+    "multiplayer_guesses_total",
+    "Multiplayer guesses by result",
+    labels=("result",),
+)
+multiplayer_sent_bytes = Counter(
+    "multiplayer_sent_bytes_total",
+    "Bytes of multiplayer events sent, by protocol",
+    labels=("protocol",),
+)
+multiplayer_dropped = Counter(
+    "multiplayer_dropped_connections_total",
+    "Multiplayer connections closed for falling behind",
+)
+
+_player_table = RoomPlayer.__table__
+
+# Written for every player still in the room when it closes
+_CLOSE_PLAYER_STATEMENT = (
+    update(_player_table)
+    .where(_player_table.c.id == bindparam("_id"))
+    .values(
+        game_state=bindparam("game_state"),
+        mistakes=bindparam("mistakes"),
+        is_finished=bindparam("is_finished"),
+        finish_time_ms=bindparam("finish_time_ms"),
+    )
+)
+
+
+class RoomCodeUnavailable(Exception):
+    """No free room code was found; the caller may retry."""
+
+
+def generate_room_code() -> str:
+    return "".join(secrets.choice(ROOM_CODE_ALPHABET) for _ in range(ROOM_CODE_LENGTH))
+
+
+def encode_room_code(number: int) -> str:
+    """The code of room ``number``, through a keyed permutation of the code space.
+
+    Distinct numbers below 2**30 always get distinct codes, and neighbouring
+    numbers get unrelated ones, so codes do not give away which others exist.
+    """
+    left, right = (number >> _HALF_BITS) & _HALF_MASK, number & _HALF_MASK
+    for round_ in range(4):
+        digest = hashlib.blake2b(
+            right.to_bytes(2, "big") + bytes([round_]), key=_CODE_KEY, digest_size=2
+        ).digest()
+        left, right = right, left ^ (int.from_bytes(digest, "big") & _HALF_MASK)
+    value = (left << _HALF_BITS) | right
+    return "".join(ROOM_CODE_ALPHABET[(value >> shift) & 31] for shift in range(_CODE_BITS - 5, -1, -5))
+
+
+async def allocate_room_code() -> str:
+    """A code for a new room, numbered by a counter shared in Redis.
+
+    The counter is not persisted. When it is lost with Redis, it restarts
+    from a random point, so it rarely lands on codes still stored in
+    ``multiplayer_rooms``; ``create_room`` falls back to random codes when
+    it does.
+    """
+    number = await redis_cache.next_room_number(secrets.randbelow(1 << _CODE_BITS))
+    if number is None:
+        # No shared counter; the unique index on room_code catches collisions
+        return generate_room_code()
+    return encode_room_code(number % (1 << _CODE_BITS))
+
+
+@dataclass(slots=True)
+class PlayerState:
+    id: str  # room_players row
+    user_id: str
+    username: str
+    slot: int = 0  # join order, which the binary protocol uses to name players
+    solved_mask: int = 0
+    mistakes: int = 0
+    guesses: list[dict] = field(default_factory=list)
+    finished: bool = False
+    finish_time_ms: Optional[int] = None
+
+    @classmethod
+    def from_model(cls, player: RoomPlayer, username: str, slot: int) -> "PlayerState":
+        state = player.game_state or {}
+        return cls(
+            id=player.id,
+            user_id=player.user_id,
+            username=username,
+            slot=slot,
+            solved_mask=state.get("solved_mask", 0),
+            mistakes=player.mistakes or 0,
+            guesses=list(state.get("guesses", [])),
+            finished=player.is_finished,
+            finish_time_ms=player.finish_time_ms,
+        )
+
+    @property
+    def won(self) -> bool:
+        return self.finished and self.mistakes < MAX_MISTAKES
+
+    def game_state(self) -> dict:
+        """The ``room_players.game_state`` JSON."""
+        return {"solved_mask": self.solved_mask, "guesses": self.guesses}
+
+    def progress(self) -> dict:
+        """What other players see: no words, only how far along this player is."""
+        return {
+            "user_id": self.user_id,
+            "username": self.username,
+            "slot": self.slot,
+            "solved_mask": self.solved_mask,
+            "mistakes": self.mistakes,
+            "finished": self.finished,
+            "won": self.won,
+            "finish_time_ms": self.finish_time_ms,
+        }
+
+
+class RoomConnection:
+    """One player's socket in a room.
+
+    Events are queued and written by a sender task, so broadcasting never
+    waits on a client. A client whose queue fills up is disconnected
+    instead of buffering without bound; it can reconnect and resync from
+    the snapshot sent on connect. Events arrive already encoded with the
+    connection's ``codec``.
+    """
+
+    def __init__(self, websocket: WebSocket, user_id: str, codec: Codec):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.codec = codec
+        self.closed = False
+        self._outbox: asyncio.Queue[Optional[Frame]] = asyncio.Queue(
+            maxsize=settings.multiplayer_send_queue_size
+        )
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._send_loop())
+
+    def send(self, frame: Frame) -> bool:
+        if self.closed:
+            return False
+        try:
+            self._outbox.put_nowait(frame)
+        except asyncio.QueueFull:
+            multiplayer_dropped.inc()
+            self.closed = True
+            if self._task is not None:
+                self._task.cancel()
+            return False
+        return True
+
+    async def close(self, flush: bool = False) -> None:
+        """Stop sending; with ``flush`` the queued events go out first."""
+        if self._task is None:
+            return
+        if flush and not self.closed:
+            try:
+                self._outbox.put_nowait(None)
+            except asyncio.QueueFull:
+                self._task.cancel()
+        else:
+            self._task.cancel()
+        self.closed = True
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _send_loop(self) -> None:
+        try:
+            while True:
+                frame = await self._outbox.get()
+                if frame is None:
+                    break
+                if isinstance(frame, bytes):
+                    await self.websocket.send_bytes(frame)
+                else:
+                    await self.websocket.send_text(frame)
+                multiplayer_sent_bytes.inc(self.codec.name, amount=len(frame))
+        except Exception:
+            pass
+        finally:
+            self.closed = True
+            try:
+                await self.websocket.close()
+            except Exception:
+                pass
+
+
+class Room:
+    """In-memory state of one multiplayer race.
+
+    ``lock`` serializes everything that changes the room, so guesses are
+    checked against the cached puzzle and broadcast in order without any
+    database round trip. Exactly one replica ``owned`` the room and applies
+    changes; the others keep a mirror updated from the owner's events.
+    """
+
+    def __init__(
+        self,
+        id: str,
+        code: str,
+        puzzle: PuzzleSnapshot,
+        host_id: Optional[str],
+        status: str,
+        max_players: int,
+        started_at: Optional[datetime] = None,
+        created_at: Optional[datetime] = None,
+        quick_match: bool = False,
+    ):
+        self.id = id
+        self.code = code
+        self.puzzle = puzzle
+        self.host_id = host_id
+        self.status = status
+        self.max_players = max_players
+        self.started_at = started_at
+        self.created_at = created_at or datetime.utcnow()
+        # Last room-wide event, for reaping rooms nobody plays any more
+        self.active_at = datetime.utcnow()
+        # Filled by the matchmaker and started automatically
+        self.quick_match = quick_match
+        # Word table for the binary protocol; seeded by the room, so every
+        # replica agrees on it, and shuffled, so indices say nothing about groups
+        self.words = list(puzzle.words)
+        random.Random(id).shuffle(self.words)
+        self.word_index = {word: index for index, word in enumerate(self.words)}
+        self.players: dict[str, PlayerState] = {}
+        self.connections: dict[str, set[RoomConnection]] = {}
+        # Spectators watching on this replica; they keep a mirror subscribed
+        self.spectators = 0
+        self.lock = asyncio.Lock()
+        self.seq = 0
+        self.owned = True
+        # Set when a mirror missed events and must reload the owner's checkpoint
+        self.stale = False
+
+    @property
+    def solved_all(self) -> int:
+        return (1 << len(self.puzzle.categories)) - 1
+
+    @property
+    def open(self) -> bool:
+        return self.status in ("waiting", "playing")
+
+    def elapsed_ms(self) -> int:
+        if self.started_at is None:
+            return 0
+        return int((datetime.utcnow() - self.started_at).total_seconds() * 1000)
+
+    def broadcast(self, event: dict) -> dict:
+        """Number an event in room order and queue it for every local socket."""
+        self.seq += 1
+        self.active_at = datetime.utcnow()
+        event = {**event, "seq": self.seq}
+        self.deliver(event)
+        return event
+
+    def deliver(self, event: dict, user_id: Optional[str] = None) -> None:
+        """Queue an event for local sockets: everyone's, or one player's.
+
+        The event is encoded once per protocol in use, not once per socket.
+        """
+        if user_id is not None:
+            connections = self.connections.get(user_id, ())
+        else:
+            connections = [c for conns in self.connections.values() for c in conns]
+        frames: dict[str, Frame] = {}
+        for connection in connections:
+            frame = frames.get(connection.codec.name)
+            if frame is None:
+                frame = frames[connection.codec.name] = connection.codec.encode(event, self)
+            connection.send(frame)
+
+    def send(self, connection: RoomConnection, event: dict) -> None:
+        connection.send(connection.codec.encode(event, self))
+
+    def apply(self, event: dict) -> None:
+        """Update a mirror from one of the owner's room-wide events."""
+        seq = event.get("seq", 0)
+        if seq <= self.seq:
+            return
+        if seq > self.seq + 1:
+            self.stale = True
+        self.seq = seq
+        self.active_at = datetime.utcnow()
+
+        kind = event.get("type")
+        if kind in ("player_joined", "progress"):
+            progress = event["player"]
+            player = self.players.get(progress["user_id"])
+            if player is None:
+                player = PlayerState(progress.get("id", ""), progress["user_id"], progress["username"])
+                self.players[player.user_id] = player
+            player.slot = progress["slot"]
+            player.solved_mask = progress["solved_mask"]
+            player.mistakes = progress["mistakes"]
+            player.finished = progress["finished"]
+            player.finish_time_ms = progress["finish_time_ms"]
+        elif kind == "players":
+            for progress in event["players"]:
+                player = self.players.get(progress["user_id"])
+                if player is not None:
+                    player.solved_mask = progress["solved_mask"]
+                    player.mistakes = progress["mistakes"]
+                    player.finished = progress["finished"]
+                    player.finish_time_ms = progress["finish_time_ms"]
+        elif kind == "started":
+            self.status = event["room"]["status"]
+            self.started_at = datetime.fromisoformat(event["room"]["started_at"])
+        elif kind == "closed":
+            self.status = event["status"]
+        self.deliver(event)
+
+    def info(self) -> dict:
+        return {
+            "room_code": self.code,
+            "puzzle_id": self.puzzle.id,
+            "puzzle_number": self.puzzle.puzzle_number,
+            "host_id": self.host_id,
+            "status": self.status,
+            "max_players": self.max_players,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+        }
+
+    def to_dict(self) -> dict:
+        """Checkpoint of the owner's state, enough for a peer to take over."""
+        return {
+            "id": self.id,
+            "code": self.code,
+            "puzzle_id": self.puzzle.id,
+            "host_id": self.host_id,
+            "status": self.status,
+            "max_players": self.max_players,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "created_at": self.created_at.isoformat(),
+            "quick_match": self.quick_match,
+            "seq": self.seq,
+            "players": [
+                {
+                    "id": p.id,
+                    "user_id": p.user_id,
+                    "username": p.username,
+                    "slot": p.slot,
+                    "solved_mask": p.solved_mask,
+                    "mistakes": p.mistakes,
+                    "guesses": p.guesses,
+                    "finished": p.finished,
+                    "finish_time_ms": p.finish_time_ms,
+                }
+                for p in self.players.values()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, puzzle: PuzzleSnapshot) -> "Room":
+        room = cls(data["id"], data["code"], puzzle, None, "waiting", 0)
+        room.restore(data)
+        return room
+
+    def restore(self, data: dict) -> None:
+        """Replace the room's state with a checkpoint, keeping its sockets."""
+        self.host_id = data["host_id"]
+        self.status = data["status"]
+        self.max_players = data["max_players"]
+        self.started_at = datetime.fromisoformat(data["started_at"]) if data["started_at"] else None
+        self.created_at = datetime.fromisoformat(data["created_at"])
+        self.quick_match = data["quick_match"]
+        self.seq = data["seq"]
+        self.players = {p["user_id"]: PlayerState(**p) for p in data["players"]}
+        self.stale = False
+
+    def standings(self) -> list[dict]:
+        """Winners by finish time, then everyone else by categories solved and mistakes."""
+        players = sorted(
+            self.players.values(),
+            key=lambda p: (
+                not p.won,
+                p.finish_time_ms if p.won else 0,
+                -bin(p.solved_mask).count("1"),
+                p.mistakes,
+            ),
+        )
+        return [player.progress() for player in players]
+
+    def snapshot(self, user_id: str) -> dict:
+        """Full room state for a (re)connecting player, including their own board."""
+        player = self.players.get(user_id)
+        solved_mask = player.solved_mask if player else 0
+        solved = []
+        remaining = []
+        for index, category in enumerate(self.puzzle.categories):
+            if solved_mask & (1 << index):
+                solved.append({
+                    "id": category.id,
+                    "name": category.name,
+                    "difficulty": category.difficulty,
+                    "words": list(category.words),
+                    "color": category.color,
+                })
+            else:
+                remaining.extend(category.words)
+        secrets.SystemRandom().shuffle(remaining)
+        return {
+            "type": "state",
+            "seq": self.seq,
+            "room": self.info(),
+            "players": [p.progress() for p in self.players.values()],
+            "remaining_words": remaining,
+            "solved_categories": solved,
+        }
+
+
+class MultiplayerEngine:
+    """Multiplayer races held in memory, one lock per room, across replicas.
+
+    Guesses never touch the database. Only joins, the start of a race, each
+    player's finish and the room closing are written to
+    ``multiplayer_rooms`` / ``room_players``.
+
+    Each room is owned by one replica, which holds a lease on it in Redis,
+    applies every change and publishes it on the room's channel. Replicas
+    with players of a room they do not own mirror it from those events and
+    forward their players' moves to the owner. The owner checkpoints the
+    room to Redis after each change; when its lease lapses (e.g. the pod
+    died) a mirroring replica claims the room and resumes from the
+    checkpoint. Without Redis every replica simply serves its own rooms.
+    """
+
+    def __init__(self):
+        self._rooms: dict[str, Room] = {}
+        self._loads: SingleFlight[Optional[Room]] = SingleFlight()
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.bus = RoomBus(self._owner)
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._rooms
+
+    def __iter__(self) -> Iterator[Room]:
+        return iter(list(self._rooms.values()))
+
+    @property
+    def lease_ms(self) -> int:
+        return int(settings.multiplayer_lease_seconds * 1000)
+
+    def start(self) -> None:
+        self.bus.start(self._on_message)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Hand owned rooms over: final checkpoint, then release the leases."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        owned = [room for room in self._rooms.values() if room.owned]
+        for room in owned:
+            self.bus.checkpoint(room.code, room.to_dict())
+        await self.bus.stop()
+        for room in owned:
+            await redis_cache.release_room(room.code, self._owner)
+
+    async def create_room(
+        self,
+        db: AsyncSession,
+        host_id: str,
+        puzzle_id: Optional[str] = None,
+        max_players: int = 4,
+        quick_match: bool = False,
+    ) -> Room:
+        puzzle_service = PuzzleService(db)
+        if puzzle_id:
+            puzzle = await puzzle_service.get_puzzle_by_id(puzzle_id)
+        else:
+            puzzle = await puzzle_service.get_latest_puzzle()
+        if not puzzle:
+            raise ValueError("Puzzle not found")
+
+        username = await db.scalar(select(User.username).where(User.id == host_id))
+        for attempt in range(5):
+            # After a collision (e.g. the counter restarted with Redis) draw random codes
+            code = await allocate_room_code() if attempt == 0 else generate_room_code()
+            if code in self._rooms:
+                continue
+            row = MultiplayerRoom(
+                room_code=code,
+                puzzle_id=puzzle.id,
+                host_id=host_id,
+                status="waiting",
+                max_players=max_players,
+            )
+            host = RoomPlayer(room=row, user_id=host_id, game_state={})
+            db.add_all([row, host])
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Code taken by a room this replica has not loaded
+                await db.rollback()
+                continue
+
+            room = Room(row.id, code, puzzle, host_id, "waiting", max_players, quick_match=quick_match)
+            room.players[host_id] = PlayerState(host.id, host_id, username or "")
+            await redis_cache.claim_room(code, self._owner, self.lease_ms)
+            await self._add(room)
+            self.bus.checkpoint(code, room.to_dict())
+            return room
+        raise RoomCodeUnavailable("Could not allocate a room code")
+
+    async def get_room(self, code: str) -> Optional[Room]:
+        """The open room with this code, loaded if this replica does not have it."""
+        code = code.upper()
+        room = self._rooms.get(code)
+        if room is not None:
+            return room
+        return await self._loads.do(code, lambda: self._load(code))
+
+    async def _load(self, code: str) -> Optional[Room]:
+        # Subscribe before reading state, so no event falls in between
+        await self.bus.subscribe(code)
+        try:
+            room = await self._read_room(code)
+        except Exception:
+            await self.bus.unsubscribe(code)
+            raise
+        if room is None:
+            await self.bus.unsubscribe(code)
+            return None
+
+        room.owned = await redis_cache.claim_room(code, self._owner, self.lease_ms) is not False
+        await self._add(room)
+        return room
+
+    async def _read_room(self, code: str) -> Optional[Room]:
+        """The room from the owner's checkpoint, else from the database."""
+        state = await redis_cache.get_room_state(code)
+        async with AsyncSessionLocal() as db:
+            if state is not None:
+                puzzle = await PuzzleService(db).get_puzzle_by_id(state["puzzle_id"])
+                return Room.from_dict(state, puzzle) if puzzle else None
+
+            row = await db.scalar(
+                select(MultiplayerRoom).where(
+                    MultiplayerRoom.room_code == code,
+                    MultiplayerRoom.status.in_(("waiting", "playing")),
+                )
+            )
+            if row is None:
+                return None
+            puzzle = await PuzzleService(db).get_puzzle_by_id(row.puzzle_id) if row.puzzle_id else None
+            if puzzle is None:
+                return None
+            result = await db.execute(
+                select(RoomPlayer, User.username)
+                .join(User, User.id == RoomPlayer.user_id)
+                .where(RoomPlayer.room_id == row.id)
+                .order_by(RoomPlayer.joined_at)
+            )
+            room = Room(
+                row.id, code, puzzle, row.host_id, row.status, row.max_players, row.started_at, row.created_at
+            )
+            for slot, (player, username) in enumerate(result.all()):
+                room.players[player.user_id] = PlayerState.from_model(player, username, slot)
+            return room
+
+    async def join(self, db: AsyncSession, room: Room, user_id: str) -> PlayerState:
+        """Add a player to a waiting room.
+
+        The ``room_players`` row is written before taking the room lock, so
+        the race never waits on the database; it is deleted again if the
+        seat went to someone else in the meantime.
+        """
+        player = room.players.get(user_id)
+        if player is not None:
+            return player
+        self._check_seat(room)
+
+        username = await db.scalar(select(User.username).where(User.id == user_id))
+        row = RoomPlayer(id=str(uuid4()), room_id=room.id, user_id=user_id, game_state={})
+        db.add(row)
+        await db.commit()
+
+        async with room.lock:
+            if user_id not in room.players and room.status == "waiting" and len(room.players) < room.max_players:
+                player = PlayerState(row.id, user_id, username or "")
+                if room.owned:
+                    self._add_player(room, player)
+                    self.bus.checkpoint(room.code, room.to_dict())
+                else:
+                    # The owner announces the player; the mirror shows them right away
+                    player.slot = len(room.players)
+                    room.players[user_id] = player
+                    self.bus.publish(room.code, {
+                        "kind": "command",
+                        "user_id": user_id,
+                        "message": {
+                            "type": "add_player",
+                            "player": {"id": row.id, "username": player.username, "replica": self._owner},
+                        },
+                    })
+                return player
+
+        # Joined twice at once, or the seat went to someone else
+        await db.execute(delete(RoomPlayer).where(RoomPlayer.id == row.id))
+        await db.commit()
+        player = room.players.get(user_id)
+        if player is None:
+            self._check_seat(room)
+        return player
+
+    @staticmethod
+    def _check_seat(room: Room) -> None:
+        if room.status != "waiting":
+            raise ValueError("Race already started")
+        if len(room.players) >= room.max_players:
+            raise ValueError("Room is full")
+
+    def _add_player(self, room: Room, player: PlayerState) -> None:
+        player.slot = len(room.players)
+        room.players[player.user_id] = player
+        self._emit(room, {"type": "player_joined", "player": player.progress()})
+
+    async def connect(self, room: Room, user_id: str, websocket: WebSocket, codec: Codec) -> RoomConnection:
+        connection = RoomConnection(websocket, user_id, codec)
+        connection.start()
+        async with room.lock:
+            room.connections.setdefault(user_id, set()).add(connection)
+            room.send(connection, room.snapshot(user_id))
+        multiplayer_connections.inc()
+        return connection
+
+    async def disconnect(self, room: Room, connection: RoomConnection) -> None:
+        async with room.lock:
+            connections = room.connections.get(connection.user_id)
+            registered = connections is not None and connection in connections
+            if registered:
+                connections.discard(connection)
+                if not connections:
+                    del room.connections[connection.user_id]
+        await connection.close()
+        if registered:
+            # Connections released by close() were already counted out there
+            multiplayer_connections.dec()
+
+    async def handle(self, room: Room, connection: RoomConnection, frame: Frame) -> None:
+        """Act on one client message; errors go back to that client only."""
+        try:
+            message = decode_message(frame, room)
+            kind = message.get("type")
+            if kind == "sync":
+                async with room.lock:
+                    room.send(connection, room.snapshot(connection.user_id))
+            elif kind == "ping":
+                room.send(connection, {"type": "pong"})
+            elif kind in ("guess", "start"):
+                await self.submit(room, connection.user_id, message)
+            else:
+                raise ValueError(f"Unknown message type: {kind}")
+        except (ValueError, AttributeError) as e:
+            room.send(connection, {"type": "error", "detail": str(e)})
+
+    async def submit(self, room: Room, user_id: str, message: dict) -> None:
+        """Apply a player's move here if this replica owns the room, else forward it."""
+        if room.owned:
+            await self._command(room, user_id, message)
+        else:
+            self.bus.publish(room.code, {"kind": "command", "user_id": user_id, "message": message})
+
+    async def _command(self, room: Room, user_id: str, message: dict) -> None:
+        """Apply a player's move on the owning replica; errors are sent to that player."""
+        try:
+            kind = message.get("type")
+            if kind == "guess":
+                words = message.get("words")
+                if not isinstance(words, list) or not all(isinstance(word, str) for word in words):
+                    raise ValueError("Guess must be a list of words")
+                await self.guess(room, user_id, words)
+            elif kind == "start":
+                await self.start_race(room, user_id)
+            elif kind == "add_player":
+                await self._seat_remote_player(room, user_id, message["player"])
+            else:
+                raise ValueError(f"Unknown message type: {kind}")
+        except (ValueError, AttributeError, KeyError) as e:
+            self._send_to(room, user_id, {"type": "error", "detail": str(e)})
+
+    async def _seat_remote_player(self, room: Room, user_id: str, player: dict) -> None:
+        """Seat a player who joined through a mirroring replica, or turn them away.
+
+        A rejection is published so the mirror drops the player it showed
+        early and deletes the ``room_players`` row it wrote.
+        """
+        async with room.lock:
+            seated = room.players.get(user_id)
+            if seated is not None:
+                if seated.id != player["id"]:
+                    # Joined through two replicas at once; only the row is extra
+                    self.bus.publish(room.code, {"kind": "rejected", "user_id": user_id, "player": player})
+                return
+            try:
+                self._check_seat(room)
+            except ValueError as e:
+                self.bus.publish(room.code, {
+                    "kind": "rejected",
+                    "user_id": user_id,
+                    "player": player,
+                    "detail": str(e),
+                })
+                raise
+            self._add_player(room, PlayerState(player["id"], user_id, player["username"]))
+            self.bus.checkpoint(room.code, room.to_dict())
+
+    async def _rejected(self, room: Room, data: dict) -> None:
+        """Undo a join the owner turned away: the early local seat and its row."""
+        player = data["player"]
+        if data.get("detail") is not None:
+            async with room.lock:
+                seated = room.players.get(data["user_id"])
+                if seated is not None and seated.id == player["id"]:
+                    del room.players[data["user_id"]]
+        if player.get("replica") != self._owner:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(RoomPlayer).where(RoomPlayer.id == player["id"]))
+                await db.commit()
+        except Exception as e:
+            print(f"Multiplayer join rollback error: {e}")
+
+    async def start_race(self, room: Room, user_id: str) -> None:
+        async with room.lock:
+            if user_id != room.host_id:
+                raise ValueError("Only the host can start the race")
+            if room.status != "waiting":
+                raise ValueError("Race already started")
+            room.status = "playing"
+            room.started_at = datetime.utcnow()
+            await self._write_room(room)
+            self._emit(room, {"type": "started", "room": room.info()})
+            self.bus.checkpoint(room.code, room.to_dict())
+
+    async def guess(self, room: Room, user_id: str, words: list[str]) -> dict:
+        """Check a guess in memory and broadcast the player's progress.
+
+        The result goes to the guesser ahead of the broadcast, so they hear
+        it even when their guess ends the race.
+        """
+        async with room.lock:
+            if room.status != "playing":
+                raise ValueError("Race is not in progress")
+            player = room.players.get(user_id)
+            if player is None:
+                raise ValueError("Not a player in this room")
+            if player.finished:
+                raise ValueError("You already finished")
+
+            category, one_away = room.puzzle.evaluate_guess(words, player.solved_mask)
+            player.guesses.append({
+                "words": words,
+                "result": "correct" if category else "wrong",
+                "one_away": one_away if not category else None,
+            })
+            if category:
+                player.solved_mask |= 1 << room.puzzle.category_index[category.id]
+            else:
+                player.mistakes += 1
+            multiplayer_guesses.inc("correct" if category else "wrong")
+
+            if player.solved_mask == room.solved_all or player.mistakes >= MAX_MISTAKES:
+                player.finished = True
+                player.finish_time_ms = room.elapsed_ms()
+
+            result = {
+                "type": "guess_result",
+                "result": "correct" if category else "wrong",
+                "one_away": one_away if not category else None,
+                "category": {
+                    "id": category.id,
+                    "name": category.name,
+                    "difficulty": category.difficulty,
+                    "words": list(category.words),
+                    "color": category.color,
+                } if category else None,
+                "mistakes": player.mistakes,
+                "finished": player.finished,
+            }
+            self._send_to(room, user_id, result)
+            self._emit(room, {"type": "progress", "player": player.progress()})
+            self.bus.checkpoint(room.code, room.to_dict())
+            everyone_finished = all(p.finished for p in room.players.values())
+
+        if player.finished:
+            await self._write_finish(player)
+        if everyone_finished:
+            await self.close(room, "finished")
+        return result
+
+    async def close(self, room: Room, status: str = "closed") -> None:
+        """End the room: persist it, send final standings and drop it from memory."""
+        async with room.lock:
+            if not room.open:
+                return
+            room.status = status
+            self._emit(room, {"type": "closed", "status": status, "standings": room.standings()})
+            await self._write_room(room, players=True)
+            self.bus.checkpoint(room.code, None)
+        await self._drop(room)
+        await redis_cache.release_room(room.code, self._owner)
+
+    def _emit(self, room: Room, event: dict) -> None:
+        """Broadcast a room-wide event locally and to the other replicas.
+
+        Every ``multiplayer_snapshot_every`` events the progress of all
+        players follows, so clients that missed a delta catch up without
+        asking for a full ``sync``.
+        """
+        event = room.broadcast(event)
+        self.bus.publish(room.code, {"kind": "event", "event": event})
+        if room.seq % settings.multiplayer_snapshot_every == 0 and room.open:
+            players = room.broadcast({"type": "players", "players": [p.progress() for p in room.players.values()]})
+            self.bus.publish(room.code, {"kind": "event", "event": players})
+
+    def _send_to(self, room: Room, user_id: str, event: dict) -> None:
+        """Send an event to one player's sockets, wherever they are connected."""
+        room.deliver(event, user_id)
+        if room.owned:
+            self.bus.publish(room.code, {"kind": "event", "event": event, "to": user_id})
+
+    def _on_message(self, code: str, data: dict) -> None:
+        """Handle a message from another replica on a room's channel."""
+        room = self._rooms.get(code)
+        if room is None:
+            return
+        if data.get("kind") == "command":
+            if room.owned:
+                # Off the bus reader, which must keep draining other rooms
+                asyncio.create_task(self._command(room, data["user_id"], data["message"]))
+            return
+        if data.get("kind") == "rejected":
+            if not room.owned:
+                asyncio.create_task(self._rejected(room, data))
+            return
+
+        event = data["event"]
+        if room.owned:
+            return
+        if data.get("to"):
+            room.deliver(event, data["to"])
+            return
+        room.apply(event)
+        if event.get("type") == "closed":
+            asyncio.create_task(self._drop(room))
+
+    async def _add(self, room: Room) -> None:
+        self._rooms[room.code] = room
+        multiplayer_rooms.set(value=len(self._rooms))
+        await self.bus.subscribe(room.code)
+
+    async def _drop(self, room: Room) -> None:
+        """Forget a room on this replica and close its local sockets after the last events."""
+        if self._rooms.get(room.code) is room:
+            del self._rooms[room.code]
+            multiplayer_rooms.set(value=len(self._rooms))
+            await self.bus.unsubscribe(room.code)
+        connections = [c for conns in room.connections.values() for c in conns]
+        room.connections.clear()
+        for connection in connections:
+            await connection.close(flush=True)
+        multiplayer_connections.dec(amount=len(connections))
+
+    async def _run(self) -> None:
+        interval = settings.multiplayer_lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._maintain()
+            except Exception as e:
+                print(f"Multiplayer lease error: {e}")
+
+    async def _maintain(self) -> None:
+        """Renew leases on owned rooms; take over or resync mirrored ones."""
+        owned = [room for room in self._rooms.values() if room.owned]
+        renewed = await redis_cache.renew_rooms([room.code for room in owned], self._owner, self.lease_ms)
+        if renewed is not None:
+            for room, ok in zip(owned, renewed):
+                if not ok:
+                    # Another replica took over while we could not renew
+                    room.owned = False
+                    room.stale = True
+
+        for room in [room for room in self._rooms.values() if not room.owned]:
+            if not room.connections and not room.spectators:
+                # Nobody here plays or watches this room any more
+                await self._drop(room)
+                continue
+            claimed = await redis_cache.claim_room(room.code, self._owner, self.lease_ms)
+            if claimed or room.stale:
+                await self._resync(room, owned=bool(claimed))
+
+    async def _resync(self, room: Room, owned: bool) -> None:
+        state = await redis_cache.get_room_state(room.code)
+        async with room.lock:
+            if state is not None:
+                room.restore(state)
+            elif owned:
+                # No checkpoint to resume from; rebuild from the database
+                fresh = await self._read_room(room.code)
+                if fresh is None:
+                    room.status = "closed"
+                else:
+                    room.restore(fresh.to_dict())
+            room.owned = owned
+            if owned:
+                self.bus.checkpoint(room.code, room.to_dict())
+            for user_id in room.connections:
+                room.deliver(room.snapshot(user_id), user_id)
+        if not room.open:
+            await self._drop(room)
+
+    async def _write_finish(self, player: PlayerState) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(RoomPlayer)
+                    .where(RoomPlayer.id == player.id)
+                    .values(
+                        game_state=player.game_state(),
+                        mistakes=player.mistakes,
+                        is_finished=True,
+                        finish_time_ms=player.finish_time_ms,
+                    )
+                )
+                await db.commit()
+        except Exception as e:
+            print(f"Multiplayer finish write error: {e}")
+
+    async def _write_room(self, room: Room, players: bool = False) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(MultiplayerRoom)
+                    .where(MultiplayerRoom.id == room.id)
+                    .values(status=room.status, started_at=room.started_at)
+                )
+                if players and room.players:
+                    await db.execute(
+                        _CLOSE_PLAYER_STATEMENT,
+                        [
+                            {
+                                "_id": player.id,
+                                "game_state": player.game_state(),
+                                "mistakes": player.mistakes,
+                                "is_finished": player.finished,
+                                "finish_time_ms": player.finish_time_ms,
+                            }
+                            for player in room.players.values()
+                        ],
+                    )
+                await db.commit()
+        except Exception as e:
+            print(f"Multiplayer room write error: {e}")
+
+
+# Singleton instance
+multiplayer_engine = MultiplayerEngine()
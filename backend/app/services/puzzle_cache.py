@@ -0,0 +1,249 @@
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.config import settings
+from app.models.puzzle import Puzzle
+
+
+@dataclass(frozen=True, slots=True)
+class CategorySnapshot:
+    id: str
+    name: str
+    difficulty: int
+    words: tuple[str, ...]
+    color: str
+    word_set: frozenset[str]
+
+
+# Guess tallies pack one 3-bit counter per category into a single int
+_TALLY_BITS = 3
+_TALLY_MASK = (1 << _TALLY_BITS) - 1
+
+
+@dataclass(frozen=True, slots=True)
+class PuzzleSnapshot:
+    id: str
+    puzzle_number: int
+    date: date
+    categories: tuple[CategorySnapshot, ...]
+    # Derived lookup tables for guess evaluation
+    words: tuple[str, ...] = field(init=False, repr=False, compare=False)
+    word_position: Mapping[str, int] = field(init=False, repr=False, compare=False)
+    position_category: tuple[int, ...] = field(init=False, repr=False, compare=False)
+    category_index: Mapping[str, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        words = tuple(word for category in self.categories for word in category.words)
+        position_category = tuple(
+            index
+            for index, category in enumerate(self.categories)
+            for _ in category.words
+        )
+        word_position = {word: position for position, word in enumerate(words)}
+        category_index = {category.id: index for index, category in enumerate(self.categories)}
+        object.__setattr__(self, "words", words)
+        object.__setattr__(self, "word_position", MappingProxyType(word_position))
+        object.__setattr__(self, "position_category", position_category)
+        object.__setattr__(self, "category_index", MappingProxyType(category_index))
+
+    def solved_mask(self, solved_categories: Iterable[dict]) -> int:
+        """Bitmask of category indices already solved in a session."""
+        mask = 0
+        for solved in solved_categories:
+            index = self.category_index.get(solved.get("id"))
+            if index is not None:
+                mask |= 1 << index
+        return mask
+
+    def evaluate_guess(
+        self,
+        words: Iterable[str],
+        solved_mask: int = 0,
+    ) -> tuple[Optional[CategorySnapshot], bool]:
+        """
+        Evaluate a guess in a single pass over its words.
+        Returns: (category_if_correct, one_away)
+        Raises ValueError for words that are unknown, repeated or already solved.
+        """
+        word_position = self.word_position
+        position_category = self.position_category
+        tally = 0
+        seen = 0
+        count = 0
+        for word in words:
+            position = word_position.get(word)
+            if position is None:
+                raise ValueError(f"'{word}' is not on the board")
+            if seen & (1 << position):
+                raise ValueError(f"'{word}' is repeated in the guess")
+            index = position_category[position]
+            if solved_mask & (1 << index):
+                raise ValueError(f"'{word}' is already solved")
+            seen |= 1 << position
+            tally += 1 << (index * _TALLY_BITS)
+            count += 1
+
+        one_away = False
+        for index, category in enumerate(self.categories):
+            matching = (tally >> (index * _TALLY_BITS)) & _TALLY_MASK
+            if matching == len(category.words) == count:
+                return category, False
+            if matching == 3:
+                one_away = True
+        return None, one_away
+
+    @classmethod
+    def from_model(cls, puzzle: Puzzle) -> "PuzzleSnapshot":
+        """Freeze a puzzle (with its categories loaded) into a snapshot."""
+        categories = tuple(
+            CategorySnapshot(
+                id=category.id,
+                name=category.name,
+                difficulty=category.difficulty,
+                words=tuple(category.words),
+                color=category.color,
+                word_set=frozenset(category.words),
+            )
+            for category in sorted(puzzle.categories, key=lambda c: c.difficulty)
+        )
+        return cls(
+            id=puzzle.id,
+            puzzle_number=puzzle.puzzle_number,
+            date=puzzle.date,
+            categories=categories,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PuzzleSnapshot":
+        categories = tuple(
+            CategorySnapshot(
+                id=category["id"],
+                name=category["name"],
+                difficulty=category["difficulty"],
+                words=tuple(category["words"]),
+                color=category["color"],
+                word_set=frozenset(category["words"]),
+            )
+            for category in data["categories"]
+        )
+        return cls(
+            id=data["id"],
+            puzzle_number=data["puzzle_number"],
+            date=date.fromisoformat(data["date"]),
+            categories=categories,
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "puzzle_number": self.puzzle_number,
+            "date": self.date.isoformat(),
+            "categories": [
+                {
+                    "id": category.id,
+                    "name": category.name,
+                    "difficulty": category.difficulty,
+                    "words": list(category.words),
+                    "color": category.color,
+                }
+                for category in self.categories
+            ],
+        }
+
+
+class PuzzleCache:
+    """Process-local cache of immutable puzzle snapshots.
+
+    Puzzles never change once synced, so snapshots are kept for the lifetime
+    of the process and indexed by id, date and puzzle number.
+    """
+
+    def __init__(self):
+        self._by_id: dict[str, PuzzleSnapshot] = {}
+        self._by_date: dict[date, PuzzleSnapshot] = {}
+        self._by_number: dict[int, PuzzleSnapshot] = {}
+        self._latest: Optional[PuzzleSnapshot] = None
+        self._latest_checked_at = 0.0
+        self._total: Optional[int] = None
+        self._total_checked_at = 0.0
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def snapshots(self) -> list[PuzzleSnapshot]:
+        return list(self._by_id.values())
+
+    def get_by_id(self, puzzle_id: str) -> Optional[PuzzleSnapshot]:
+        return self._by_id.get(puzzle_id)
+
+    def get_by_date(self, puzzle_date: date) -> Optional[PuzzleSnapshot]:
+        return self._by_date.get(puzzle_date)
+
+    def get_by_number(self, puzzle_number: int) -> Optional[PuzzleSnapshot]:
+        return self._by_number.get(puzzle_number)
+
+    def get_latest(self) -> Optional[PuzzleSnapshot]:
+        """Latest cached puzzle, or None if it is due for a recheck."""
+        age = time.monotonic() - self._latest_checked_at
+        if age > settings.puzzle_cache_latest_ttl_seconds:
+            return None
+        return self._latest
+
+    def get_total(self) -> Optional[int]:
+        """Cached archive size, or None if it is due for a recount."""
+        age = time.monotonic() - self._total_checked_at
+        if age > settings.puzzle_cache_latest_ttl_seconds:
+            return None
+        return self._total
+
+    def set_total(self, total: Optional[int]) -> None:
+        """Record a fresh count (None forces a recount on next use)."""
+        self._total = total
+        self._total_checked_at = time.monotonic() if total is not None else 0.0
+
+    def add(self, snapshot: PuzzleSnapshot) -> PuzzleSnapshot:
+        """Index a snapshot and return the cached instance."""
+        existing = self._by_id.get(snapshot.id)
+        if existing:
+            return existing
+
+        self._by_id[snapshot.id] = snapshot
+        self._by_date[snapshot.date] = snapshot
+        self._by_number[snapshot.puzzle_number] = snapshot
+        if self._latest is None or snapshot.date > self._latest.date:
+            self._latest = snapshot
+        return snapshot
+
+    def add_puzzle(self, puzzle: Puzzle) -> PuzzleSnapshot:
+        return self.add(PuzzleSnapshot.from_model(puzzle))
+
+    def set_latest(self, snapshot: Optional[PuzzleSnapshot]) -> None:
+        """Record the result of a fresh latest-puzzle lookup."""
+        if snapshot is not None:
+            snapshot = self.add(snapshot)
+        self._latest = snapshot
+        self._latest_checked_at = time.monotonic()
+
+    async def load(self, db: AsyncSession) -> int:
+        """Load every puzzle with its categories into the cache."""
+        result = await db.execute(
+            select(Puzzle).options(selectinload(Puzzle.categories))
+        )
+        for puzzle in result.scalars().all():
+            self.add_puzzle(puzzle)
+
+        self._latest_checked_at = time.monotonic()
+        self.loaded = True
+        return len(self._by_id)
+
+
+# Singleton instance
+puzzle_cache = PuzzleCache()
@@ -1,14 +1,23 @@
+import base64
+import json
 import random
-from datetime import date, datetime
+import time
+from datetime import date
 from typing import Optional
+from uuid import UUID, uuid4
 
-import httpx
-from sqlalchemy import select
+from sqlalchemy import and_, func, insert, literal, null, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.config import settings
+from app.models.game import GameSession
 from app.models.puzzle import Puzzle, Category
+from app.models.sync import SyncCheckpoint
+from app.services.cache_service import redis_cache
+from app.services.cooccurrence_index import cooccurrence_index
+from app.services.puzzle_cache import PuzzleSnapshot, puzzle_cache
+from app.services.puzzle_source import SourceStream, iter_json_array
 
 # Difficulty color mapping
 DIFFICULTY_COLORS = {
@@ -19,116 +28,373 @@ DIFFICULTY_COLORS = {
 }
 
 
+def encode_archive_cursor(puzzle_date: date, puzzle_id: str) -> str:
+    raw = json.dumps([puzzle_date.isoformat(), puzzle_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_archive_cursor(cursor: str) -> tuple[date, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        puzzle_date, puzzle_id = json.loads(raw)
+        return date.fromisoformat(puzzle_date), str(UUID(puzzle_id))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid archive cursor")
+
+
 class PuzzleService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def sync_puzzles_from_github(self) -> int:
-        """Fetch all puzzles from GitHub and sync to database."""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(settings.puzzle_source_url)
-            response.raise_for_status()
-            puzzles_data = response.json()
+    async def sync_puzzles(self, source: Optional[str] = None, full: bool = False) -> dict:
+        """
+        Stream puzzles from the source and bulk insert the ones not yet stored.
+
+        Unless ``full`` is set, the source is requested conditionally against
+        the stored checkpoint and only puzzles past its highest synced number
+        are considered.
+        Returns a report with inserted/skipped counts and timings.
+        """
+        source = source or settings.puzzle_source_url
+        started = time.perf_counter()
+
+        result = await self.db.execute(
+            select(SyncCheckpoint).where(SyncCheckpoint.source_url == source[:500])
+        )
+        checkpoint = result.scalar_one_or_none()
+        if checkpoint is None:
+            checkpoint = SyncCheckpoint(source_url=source[:500], max_puzzle_number=0)
+            self.db.add(checkpoint)
+        after_number = 0 if full else checkpoint.max_puzzle_number
+
+        inserted: list[PuzzleSnapshot] = []
+        puzzle_rows: list[dict] = []
+        category_rows: list[dict] = []
+        skipped = 0
+        db_seconds = 0.0
+        known: Optional[tuple[set[int], set[date]]] = None
+
+        stream = SourceStream(
+            source,
+            etag=None if full else checkpoint.etag,
+            last_modified=None if full else checkpoint.last_modified,
+        )
+        async with stream:
+            if stream.not_modified:
+                await self.db.rollback()
+                return self._sync_report(0, 0, 0.0, started, status="not_modified")
+
+            async for puzzle_data in iter_json_array(stream.chunks()):
+                if puzzle_data["id"] <= after_number:
+                    skipped += 1
+                    continue
+
+                # Load what is already stored past the checkpoint, once
+                if known is None:
+                    known = await self._known_puzzles(after_number)
+                known_numbers, known_dates = known
 
-        synced_count = 0
-        for puzzle_data in puzzles_data:
-            existing = await self.get_puzzle_by_number(puzzle_data["id"])
-            if not existing:
-                await self._create_puzzle(puzzle_data)
-                synced_count += 1
+                puzzle_date = date.fromisoformat(puzzle_data.get("date", "2024-01-01"))
+                if puzzle_data["id"] in known_numbers or puzzle_date in known_dates:
+                    skipped += 1
+                    continue
+                known_numbers.add(puzzle_data["id"])
+                known_dates.add(puzzle_date)
 
+                snapshot = self._build_rows(puzzle_data, puzzle_date, source, puzzle_rows, category_rows)
+                inserted.append(snapshot)
+
+                if len(puzzle_rows) >= settings.puzzle_sync_batch_size:
+                    db_seconds += await self._insert_rows(puzzle_rows, category_rows)
+
+        db_seconds += await self._insert_rows(puzzle_rows, category_rows)
+
+        status = "synced"
+        if stream.content_hash == checkpoint.content_hash:
+            status = "unchanged"
+
+        # The checkpoint commits in the same transaction as the new puzzles
+        checkpoint.etag = stream.etag
+        checkpoint.last_modified = stream.last_modified
+        checkpoint.content_hash = stream.content_hash
+        checkpoint.max_puzzle_number = max(
+            [checkpoint.max_puzzle_number or 0] + [s.puzzle_number for s in inserted]
+        )
+
+        commit_started = time.perf_counter()
         await self.db.commit()
-        return synced_count
-
-    async def _create_puzzle(self, puzzle_data: dict) -> Puzzle:
-        """Create a puzzle from GitHub JSON data."""
-        # Parse date from puzzle data
-        # The GitHub data has format like "2024-01-15"
-        puzzle_date = date.fromisoformat(puzzle_data.get("date", "2024-01-01"))
-
-        puzzle = Puzzle(
-            puzzle_number=puzzle_data["id"],
-            date=puzzle_date,
-            source_url=settings.puzzle_source_url,
+        db_seconds += time.perf_counter() - commit_started
+
+        recycled = 0
+        if inserted:
+            # Categories that mostly repeat an earlier one, before reindexing
+            previous = cooccurrence_index.current()
+            if previous is not None:
+                recycled = sum(
+                    1
+                    for snapshot in inserted
+                    for category in snapshot.categories
+                    if previous.find_recycled(list(category.words))
+                )
+
+            # Pick up the new puzzles in the in-process and shared caches
+            for snapshot in inserted:
+                puzzle_cache.add(snapshot)
+            puzzle_cache.set_total(None)
+            await redis_cache.invalidate_puzzles()
+            await cooccurrence_index.rebuild(self.db)
+
+        report = self._sync_report(len(inserted), skipped, db_seconds, started, status=status)
+        report["recycled_categories"] = recycled
+        return report
+
+    async def _known_puzzles(self, after_number: int) -> tuple[set[int], set[date]]:
+        """Numbers and dates already stored past a checkpoint, in one query."""
+        result = await self.db.execute(
+            select(Puzzle.puzzle_number, Puzzle.date)
+            .where(Puzzle.puzzle_number > after_number)
         )
-        self.db.add(puzzle)
-        await self.db.flush()
+        numbers = set()
+        dates = set()
+        for number, puzzle_date in result.all():
+            numbers.add(number)
+            dates.add(puzzle_date)
+        return numbers, dates
+
+    def _sync_report(
+        self,
+        inserted: int,
+        skipped: int,
+        db_seconds: float,
+        started: float,
+        status: str,
+    ) -> dict:
+        return {
+            "status": status,
+            "inserted": inserted,
+            "skipped": skipped,
+            "db_ms": int(db_seconds * 1000),
+            "total_ms": int((time.perf_counter() - started) * 1000),
+        }
 
-        # Create categories
+    def _build_rows(
+        self,
+        puzzle_data: dict,
+        puzzle_date: date,
+        source: str,
+        puzzle_rows: list[dict],
+        category_rows: list[dict],
+    ) -> PuzzleSnapshot:
+        """Append insert rows for a puzzle from the source JSON and snapshot it."""
+        puzzle_id = str(uuid4())
+        puzzle_rows.append({
+            "id": puzzle_id,
+            "puzzle_number": puzzle_data["id"],
+            "date": puzzle_date,
+            "source_url": source[:500],
+        })
+
+        categories = []
         for i, group in enumerate(puzzle_data.get("answers", [])):
-            category = Category(
-                puzzle_id=puzzle.id,
-                name=group.get("group", f"Category {i+1}"),
-                difficulty=group.get("level", i),
-                words=group.get("members", []),
-                color=DIFFICULTY_COLORS.get(group.get("level", i), "yellow"),
-            )
-            self.db.add(category)
+            category = {
+                "id": str(uuid4()),
+                "puzzle_id": puzzle_id,
+                "name": group.get("group", f"Category {i+1}"),
+                "difficulty": group.get("level", i),
+                "words": group.get("members", []),
+                "color": DIFFICULTY_COLORS.get(group.get("level", i), "yellow"),
+            }
+            category_rows.append(category)
+            categories.append(category)
+
+        return PuzzleSnapshot.from_dict({
+            "id": puzzle_id,
+            "puzzle_number": puzzle_data["id"],
+            "date": puzzle_date.isoformat(),
+            "categories": sorted(categories, key=lambda c: c["difficulty"]),
+        })
+
+    async def _insert_rows(self, puzzle_rows: list[dict], category_rows: list[dict]) -> float:
+        """Flush buffered rows as multi-row INSERTs and clear the buffers."""
+        if not puzzle_rows:
+            return 0.0
 
-        return puzzle
+        started = time.perf_counter()
+        await self.db.execute(insert(Puzzle), puzzle_rows)
+        if category_rows:
+            await self.db.execute(insert(Category), category_rows)
+        puzzle_rows.clear()
+        category_rows.clear()
+        return time.perf_counter() - started
 
-    async def get_todays_puzzle(self) -> Optional[Puzzle]:
+    async def get_todays_puzzle(self) -> Optional[PuzzleSnapshot]:
         """Get today's puzzle."""
         today = date.today()
         return await self.get_puzzle_by_date(today)
 
-    async def get_puzzle_by_date(self, puzzle_date: date) -> Optional[Puzzle]:
+    async def get_puzzle_by_date(self, puzzle_date: date) -> Optional[PuzzleSnapshot]:
         """Get puzzle for a specific date."""
+        cached = puzzle_cache.get_by_date(puzzle_date)
+        if cached:
+            return cached
+
+        shared = await redis_cache.get_puzzle_by_date(puzzle_date)
+        if shared:
+            return puzzle_cache.add(shared)
+
         result = await self.db.execute(
             select(Puzzle)
             .where(Puzzle.date == puzzle_date)
             .options(selectinload(Puzzle.categories))
         )
-        return result.scalar_one_or_none()
+        return await self._cache(result.scalar_one_or_none())
 
-    async def get_puzzle_by_number(self, puzzle_number: int) -> Optional[Puzzle]:
+    async def get_puzzle_by_number(self, puzzle_number: int) -> Optional[PuzzleSnapshot]:
         """Get puzzle by puzzle number."""
+        cached = puzzle_cache.get_by_number(puzzle_number)
+        if cached:
+            return cached
+
+        shared = await redis_cache.get_puzzle_by_number(puzzle_number)
+        if shared:
+            return puzzle_cache.add(shared)
+
         result = await self.db.execute(
             select(Puzzle)
             .where(Puzzle.puzzle_number == puzzle_number)
             .options(selectinload(Puzzle.categories))
         )
-        return result.scalar_one_or_none()
+        return await self._cache(result.scalar_one_or_none())
+
+    async def get_puzzle_by_id(self, puzzle_id: str) -> Optional[PuzzleSnapshot]:
+        """Get puzzle by ID; None if it is not a valid UUID."""
+        try:
+            puzzle_id = str(UUID(puzzle_id))
+        except ValueError:
+            return None
+
+        cached = puzzle_cache.get_by_id(puzzle_id)
+        if cached:
+            return cached
+
+        shared = await redis_cache.get_puzzle_by_id(puzzle_id)
+        if shared:
+            return puzzle_cache.add(shared)
 
-    async def get_puzzle_by_id(self, puzzle_id: str) -> Optional[Puzzle]:
-        """Get puzzle by ID."""
         result = await self.db.execute(
             select(Puzzle)
             .where(Puzzle.id == puzzle_id)
             .options(selectinload(Puzzle.categories))
         )
-        return result.scalar_one_or_none()
+        return await self._cache(result.scalar_one_or_none())
 
-    async def get_latest_puzzle(self) -> Optional[Puzzle]:
+    async def get_latest_puzzle(self) -> Optional[PuzzleSnapshot]:
         """Get the most recent puzzle."""
+        cached = puzzle_cache.get_latest()
+        if cached:
+            return cached
+
+        shared = await redis_cache.get_latest_puzzle()
+        if shared:
+            puzzle_cache.set_latest(shared)
+            return puzzle_cache.get_by_id(shared.id)
+
         result = await self.db.execute(
             select(Puzzle)
             .order_by(Puzzle.date.desc())
             .limit(1)
             .options(selectinload(Puzzle.categories))
         )
-        return result.scalar_one_or_none()
+        snapshot = await self._cache(result.scalar_one_or_none(), latest=True)
+        puzzle_cache.set_latest(snapshot)
+        return snapshot
 
-    async def get_archive(self, limit: int = 50, offset: int = 0) -> tuple[list[Puzzle], int]:
-        """Get list of all puzzles for archive."""
-        # Get total count
-        count_result = await self.db.execute(
-            select(Puzzle.id)
-        )
-        total = len(count_result.all())
+    async def _cache(
+        self,
+        puzzle: Optional[Puzzle],
+        latest: bool = False,
+    ) -> Optional[PuzzleSnapshot]:
+        """Freeze a puzzle loaded from Postgres into the process and Redis caches."""
+        if puzzle is None:
+            return None
+        snapshot = puzzle_cache.add_puzzle(puzzle)
+        await redis_cache.set_puzzle(snapshot, latest=latest)
+        return snapshot
+
+    async def count_puzzles(self) -> int:
+        """Total number of puzzles, counted server-side and cached."""
+        total = puzzle_cache.get_total()
+        if total is None:
+            result = await self.db.execute(select(func.count()).select_from(Puzzle))
+            total = result.scalar_one()
+            puzzle_cache.set_total(total)
+        return total
+
+    async def get_archive(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> tuple[list[tuple[Puzzle, Optional[str]]], int, Optional[str]]:
+        """
+        Get a page of the puzzle archive, newest first.
+
+        Pages are keyed on (date, id) via opaque cursors; ``offset`` is only
+        honoured when no cursor is given. With ``user_id`` each puzzle comes
+        with that user's status ("won", "lost", "in_progress" or None),
+        resolved in the same query.
+        Returns: (puzzles_with_status, total, next_cursor)
+        """
+        total = await self.count_puzzles()
+
+        if user_id:
+            query = (
+                select(Puzzle, GameSession.id, GameSession.completed_at, GameSession.is_won)
+                .outerjoin(
+                    GameSession,
+                    and_(
+                        GameSession.puzzle_id == Puzzle.id,
+                        GameSession.user_id == user_id,
+                    ),
+                )
+            )
+        else:
+            query = select(Puzzle, null(), null(), null())
+
+        if cursor:
+            cursor_date, cursor_id = decode_archive_cursor(cursor)
+            query = query.where(
+                tuple_(Puzzle.date, Puzzle.id)
+                < tuple_(literal(cursor_date, Puzzle.date.type), literal(cursor_id, Puzzle.id.type))
+            )
+        elif offset:
+            query = query.offset(offset)
 
-        # Get puzzles
         result = await self.db.execute(
-            select(Puzzle)
-            .order_by(Puzzle.date.desc())
+            query
+            .order_by(Puzzle.date.desc(), Puzzle.id.desc())
             .limit(limit)
-            .offset(offset)
         )
-        puzzles = result.scalars().all()
 
-        return list(puzzles), total
+        page = []
+        for puzzle, session_id, completed_at, is_won in result.all():
+            if session_id is None:
+                status = None
+            elif completed_at is None:
+                status = "in_progress"
+            else:
+                status = "won" if is_won else "lost"
+            page.append((puzzle, status))
+
+        next_cursor = None
+        if len(page) == limit:
+            last = page[-1][0]
+            next_cursor = encode_archive_cursor(last.date, last.id)
+
+        return page, total, next_cursor
 
-    def get_shuffled_words(self, puzzle: Puzzle) -> list[str]:
+    def get_shuffled_words(self, puzzle: PuzzleSnapshot) -> list[str]:
         """Get all words from puzzle categories, shuffled."""
         all_words = []
         for category in puzzle.categories:
@@ -0,0 +1,135 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+
+
+def is_remote(source: str) -> bool:
+    return urlparse(source).scheme in ("http", "https")
+
+
+class SourceStream:
+    """Conditional, hashing reader for a puzzle source.
+
+    Remote sources are requested with If-None-Match / If-Modified-Since and
+    local files are compared by modification time; either way
+    ``not_modified`` is set when the source is known to be unchanged and no
+    body is read. ``content_hash`` is the SHA-256 of everything streamed.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        self.source = source
+        self.etag = etag
+        self.last_modified = last_modified
+        self.not_modified = False
+        self._hash = hashlib.sha256()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._response: Optional[httpx.Response] = None
+        self._path: Optional[Path] = None
+
+    @property
+    def content_hash(self) -> str:
+        return self._hash.hexdigest()
+
+    async def __aenter__(self) -> "SourceStream":
+        if is_remote(self.source):
+            headers = {}
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+
+            self._client = httpx.AsyncClient()
+            try:
+                request = self._client.build_request("GET", self.source, headers=headers)
+                self._response = await self._client.send(request, stream=True)
+                if self._response.status_code == 304:
+                    self.not_modified = True
+                else:
+                    self._response.raise_for_status()
+                    self.etag = self._response.headers.get("ETag")
+                    self.last_modified = self._response.headers.get("Last-Modified")
+            except Exception:
+                await self.__aexit__(None, None, None)
+                raise
+            return self
+
+        path = urlparse(self.source).path if self.source.startswith("file://") else self.source
+        self._path = Path(path)
+        mtime = str(self._path.stat().st_mtime_ns)
+        self.not_modified = mtime == self.last_modified
+        self.etag = None
+        self.last_modified = mtime
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._response is not None:
+            await self._response.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def chunks(self) -> AsyncIterator[str]:
+        """Stream the source text, hashing it along the way."""
+        if self._response is not None:
+            async for chunk in self._response.aiter_text():
+                self._hash.update(chunk.encode("utf-8"))
+                yield chunk
+            return
+
+        with self._path.open(encoding="utf-8") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                self._hash.update(chunk.encode("utf-8"))
+                yield chunk
+
+
+async def iter_json_array(chunks: AsyncIterator[str]) -> AsyncIterator[dict]:
+    """Yield the items of a top-level JSON array as soon as each one is complete.
+
+    Only the current partial item is buffered, so memory stays bounded by the
+    largest item rather than the whole document.
+    """
+    buffer = ""
+    started = False
+    async for chunk in chunks:
+        buffer += chunk
+        pos = 0
+        while True:
+            # Skip whitespace and separators between items
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                break
+
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Puzzle source is not a JSON array")
+                started = True
+                pos += 1
+                continue
+
+            if buffer[pos] == "]":
+                return
+
+            try:
+                item, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Item continues in the next chunk
+                break
+            yield item
+            pos = end
+        buffer = buffer[pos:]
+
+    if not started or buffer.strip():
+        raise ValueError("Puzzle source ended before the JSON array was closed")
@@ -0,0 +1,164 @@
+import bisect
+import math
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.stats import PuzzleStats
+from app.services.game_state import GameState
+from app.services.puzzle_cache import PuzzleSnapshot
+
+MISTAKE_BUCKETS = 5  # 0..4 mistakes
+CATEGORY_COUNT = 4
+
+# Solve time sketch: log-scaled bucket bounds from 5s up to ~2h (20% wide),
+# so percentiles are accurate to within one bucket at fixed size.
+_SOLVE_TIME_BASE_MS = 5_000
+_SOLVE_TIME_RATIO = 1.2
+SOLVE_TIME_BOUNDS = [
+    round(_SOLVE_TIME_BASE_MS * _SOLVE_TIME_RATIO ** i)
+    for i in range(math.ceil(math.log(7_200_000 / _SOLVE_TIME_BASE_MS, _SOLVE_TIME_RATIO)) + 1)
+]
+SOLVE_TIME_BUCKETS = len(SOLVE_TIME_BOUNDS) + 1
+
+
+def solve_time_bucket(solve_time_ms: int) -> int:
+    """Bucket index: 0 below the first bound, last one above the final bound."""
+    return bisect.bisect_right(SOLVE_TIME_BOUNDS, solve_time_ms)
+
+
+def _bucket_range(bucket: int) -> tuple[int, int]:
+    low = SOLVE_TIME_BOUNDS[bucket - 1] if bucket > 0 else 0
+    high = SOLVE_TIME_BOUNDS[bucket] if bucket < len(SOLVE_TIME_BOUNDS) else low * 2
+    return low, high
+
+
+def solve_time_quantile(histogram: list[int], q: float) -> Optional[int]:
+    """Approximate quantile, interpolating linearly inside the bucket."""
+    total = sum(histogram)
+    if not total:
+        return None
+    target = q * total
+    seen = 0
+    for bucket, count in enumerate(histogram):
+        if count and seen + count >= target:
+            low, high = _bucket_range(bucket)
+            return round(low + (high - low) * (target - seen) / count)
+        seen += count
+    return _bucket_range(len(histogram) - 1)[0]
+
+
+def fraction_slower(histogram: list[int], solve_time_ms: int) -> float:
+    """Approximate share of recorded solve times slower than ``solve_time_ms``."""
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    bucket = solve_time_bucket(solve_time_ms)
+    low, high = _bucket_range(bucket)
+    slower = sum(histogram[bucket + 1:])
+    # Assume times are spread evenly inside the caller's own bucket
+    if high > low:
+        slower += histogram[bucket] * max(0.0, min(1.0, (high - solve_time_ms) / (high - low)))
+    return slower / total
+
+
+class PuzzleStatsService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record_game(self, session: GameState, puzzle: PuzzleSnapshot) -> None:
+        """Fold a finished game into the puzzle's stats row (committed by the caller)."""
+        await self.db.execute(
+            insert(PuzzleStats)
+            .values(
+                puzzle_id=puzzle.id,
+                plays=0,
+                wins=0,
+                hint_uses=0,
+                mistakes_histogram=[0] * MISTAKE_BUCKETS,
+                solve_time_histogram=[0] * SOLVE_TIME_BUCKETS,
+                solve_order=[0] * (CATEGORY_COUNT * CATEGORY_COUNT),
+            )
+            .on_conflict_do_nothing(index_elements=[PuzzleStats.puzzle_id])
+        )
+
+        # Single atomic UPDATE of counters and histogram cells
+        mistakes = min(session.mistakes, MISTAKE_BUCKETS - 1)
+        values = {
+            PuzzleStats.plays: PuzzleStats.plays + 1,
+            PuzzleStats.mistakes_histogram[mistakes]: PuzzleStats.mistakes_histogram[mistakes] + 1,
+            PuzzleStats.updated_at: datetime.utcnow(),
+        }
+        if session.is_won:
+            values[PuzzleStats.wins] = PuzzleStats.wins + 1
+            if session.solve_time_ms is not None:
+                bucket = solve_time_bucket(session.solve_time_ms)
+                values[PuzzleStats.solve_time_histogram[bucket]] = (
+                    PuzzleStats.solve_time_histogram[bucket] + 1
+                )
+        if session.used_ai_hint:
+            values[PuzzleStats.hint_uses] = PuzzleStats.hint_uses + 1
+        for position, solved in enumerate(session.categories_solved[:CATEGORY_COUNT]):
+            index = puzzle.category_index.get(solved.get("id"))
+            if index is not None and index < CATEGORY_COUNT:
+                cell = position * CATEGORY_COUNT + index
+                values[PuzzleStats.solve_order[cell]] = PuzzleStats.solve_order[cell] + 1
+
+        await self.db.execute(
+            update(PuzzleStats)
+            .where(PuzzleStats.puzzle_id == puzzle.id)
+            .values(values)
+        )
+
+    async def get_stats(
+        self,
+        puzzle: PuzzleSnapshot,
+        solve_time_ms: Optional[int] = None,
+    ) -> dict:
+        """Summarize a puzzle's stats from its single row."""
+        result = await self.db.execute(
+            select(PuzzleStats).where(PuzzleStats.puzzle_id == puzzle.id)
+        )
+        stats = result.scalar_one_or_none()
+
+        plays = stats.plays if stats else 0
+        wins = stats.wins if stats else 0
+        mistakes = list(stats.mistakes_histogram) if stats else [0] * MISTAKE_BUCKETS
+        times = list(stats.solve_time_histogram) if stats else [0] * SOLVE_TIME_BUCKETS
+        order = list(stats.solve_order) if stats else [0] * (CATEGORY_COUNT * CATEGORY_COUNT)
+
+        summary = {
+            "puzzle_id": puzzle.id,
+            "plays": plays,
+            "wins": wins,
+            "solve_rate": wins / plays if plays else None,
+            "hint_rate": stats.hint_uses / plays if plays else None,
+            "mistakes_histogram": mistakes,
+            "solve_time_percentiles_ms": {
+                f"p{int(q * 100)}": solve_time_quantile(times, q)
+                for q in (0.25, 0.5, 0.75, 0.9)
+            },
+            "categories": [
+                {
+                    "id": category.id,
+                    "name": category.name,
+                    "color": category.color,
+                    # How often this category was solved 1st, 2nd, 3rd, 4th
+                    "solve_order": [
+                        order[position * CATEGORY_COUNT + index]
+                        for position in range(CATEGORY_COUNT)
+                    ],
+                }
+                for index, category in enumerate(puzzle.categories[:CATEGORY_COUNT])
+            ],
+        }
+
+        if solve_time_ms is not None and plays:
+            # Beaten: every loss plus every win slower than the caller's time
+            slower_wins = fraction_slower(times, solve_time_ms) * sum(times)
+            summary["beat_percent"] = round(100 * ((plays - wins) + slower_wins) / plays)
+
+        return summary
@@ -0,0 +1,147 @@
+import asyncio
+import json
+from typing import Callable, Optional
+
+from redis.asyncio.client import PubSub
+from redis.exceptions import RedisError
+
+from app.core.redis import get_redis
+from app.services.cache_service import redis_cache
+
+# Outgoing operations written to Redis in one pipeline
+MAX_BATCH = 200
+
+MessageHandler = Callable[[str, dict], None]
+
+
+class RoomBus:
+    """Redis pub/sub between replicas, one channel per multiplayer room.
+
+    A replica holds exactly one subscription per room it has in memory, all
+    multiplexed over a single pub/sub connection read by one task. Outgoing
+    events and the owner's state checkpoints share one queue and writer
+    task, so they reach Redis in the order they were sent. Every message
+    carries the sending replica's id, and a replica ignores its own.
+    """
+
+    def __init__(self, replica_id: str):
+        self.replica_id = replica_id
+        self._handler: Optional[MessageHandler] = None
+        self._pubsub: Optional[PubSub] = None
+        self._codes: set[str] = set()
+        self._outbox: asyncio.Queue[tuple[str, str, Optional[dict]]] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        # Wakes the reader when the first room is subscribed
+        self._subscribed = asyncio.Event()
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._codes
+
+    def start(self, handler: MessageHandler) -> None:
+        self._handler = handler
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._read_loop()),
+                asyncio.create_task(self._write_loop()),
+            ]
+
+    async def stop(self) -> None:
+        """Flush what is queued, then stop reading and writing."""
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self._outbox.join(), timeout=2.0)
+            except TimeoutError:
+                pass
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.aclose()
+            except (RedisError, OSError):
+                pass
+            self._pubsub = None
+        self._codes.clear()
+
+    async def subscribe(self, code: str) -> None:
+        if code in self._codes:
+            return
+        self._codes.add(code)
+        if not redis_cache.available:
+            # Resubscribed by the pub/sub connection once it reconnects
+            return
+        try:
+            if self._pubsub is None:
+                self._pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            await self._pubsub.subscribe(redis_cache.room_channel(code))
+            self._subscribed.set()
+        except (RedisError, OSError) as e:
+            print(f"Room bus subscribe error: {e}")
+
+    async def unsubscribe(self, code: str) -> None:
+        if code not in self._codes:
+            return
+        self._codes.discard(code)
+        if self._pubsub is None:
+            return
+        try:
+            await self._pubsub.unsubscribe(redis_cache.room_channel(code))
+        except (RedisError, OSError) as e:
+            print(f"Room bus unsubscribe error: {e}")
+
+    def publish(self, code: str, message: dict) -> None:
+        self._outbox.put_nowait(("publish", code, {**message, "from": self.replica_id}))
+
+    def checkpoint(self, code: str, state: Optional[dict]) -> None:
+        """Queue the owner's room state (None clears it once the room closes)."""
+        self._outbox.put_nowait(("state", code, state))
+
+    async def _write_loop(self) -> None:
+        while True:
+            ops = [await self._outbox.get()]
+            while len(ops) < MAX_BATCH and not self._outbox.empty():
+                ops.append(self._outbox.get_nowait())
+            try:
+                # Dropped while Redis is down; rooms are then served by whoever holds them
+                await redis_cache.write_rooms(ops)
+            except Exception as e:
+                print(f"Room bus write error: {e}")
+            finally:
+                for _ in ops:
+                    self._outbox.task_done()
+
+    async def _read_loop(self) -> None:
+        while True:
+            if self._pubsub is None or not self._codes:
+                self._subscribed.clear()
+                try:
+                    await asyncio.wait_for(self._subscribed.wait(), timeout=1.0)
+                except TimeoutError:
+                    pass
+                if self._pubsub is None and self._codes and redis_cache.available:
+                    await self._resubscribe()
+                continue
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except (RedisError, OSError, RuntimeError) as e:
+                print(f"Room bus read error: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+
+            try:
+                data = json.loads(message["data"])
+                if data.get("from") == self.replica_id:
+                    continue
+                # Channel is "<prefix>:room:<code>:events"
+                self._handler(message["channel"].split(":")[-2], data)
+            except Exception as e:
+                print(f"Room bus message error: {e}")
+
+    async def _resubscribe(self) -> None:
+        codes = list(self._codes)
+        self._codes.clear()
+        for code in codes:
+            await self.subscribe(code)
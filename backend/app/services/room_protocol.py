@@ -0,0 +1,219 @@
+import json
+import struct
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional, Union
+
+if TYPE_CHECKING:
+    from app.services.multiplayer_service import Room
+
+Frame = Union[str, bytes]
+
+# WebSocket subprotocols, in order of preference
+BINARY_SUBPROTOCOL = "connections.v1.binary"
+JSON_SUBPROTOCOL = "connections.v1.json"
+
+# Server -> client event types
+EVENT_CODES = {
+    "state": 1,
+    "player_joined": 2,
+    "started": 3,
+    "progress": 4,
+    "guess_result": 5,
+    "closed": 6,
+    "error": 7,
+    "pong": 8,
+    "players": 9,
+    "spectate": 10,
+}
+# Client -> server message types
+MESSAGE_TYPES = {1: "guess", 2: "start", 3: "sync", 4: "ping"}
+STATUS_CODES = {"waiting": 0, "playing": 1, "finished": 2, "closed": 3}
+
+NO_SLOT = 0xFF
+NO_TIME = 0xFFFFFFFF
+
+_HEADER = struct.Struct("!BI")  # event type, seq (0 for events outside room order)
+_PLAYER = struct.Struct("!BBBBI")  # slot, solved mask, mistakes, flags, finish time ms
+_ROOM = struct.Struct("!BBIQB")  # status, max players, puzzle number, started at ms, host slot
+_CATEGORY = struct.Struct("!BBH")  # mask bit, difficulty, four 4-bit word indices
+_RESULT = struct.Struct("!BB")  # flags, mistakes
+_STARTED = struct.Struct("!Q")
+_GUESS = struct.Struct("!BH")  # message type, four 4-bit word indices
+
+_EPOCH = datetime(1970, 1, 1)
+
+_FINISHED = 1
+_WON = 2
+_CORRECT = 1
+_ONE_AWAY = 2
+_RESULT_FINISHED = 4
+
+
+class JsonCodec:
+    """Events as JSON text frames, the protocol every client understands."""
+
+    name = "json"
+    subprotocol = JSON_SUBPROTOCOL
+
+    def encode(self, event: dict, room: "Room") -> Frame:
+        return json.dumps(event, separators=(",", ":"))
+
+
+class BinaryCodec:
+    """Events as compact binary frames.
+
+    Every frame starts with a one-byte event type and the room sequence
+    number. Players are referred to by their slot in the room and carry only
+    their solved-category bitmask, mistakes and finish time; words are
+    indices 0-15 into the room's word table, which the ``state`` snapshot
+    sends once per connection. Strings are UTF-8 with a length prefix. A
+    ``progress`` delta is 13 bytes against about 150 as JSON.
+    """
+
+    name = "binary"
+    subprotocol = BINARY_SUBPROTOCOL
+
+    def encode(self, event: dict, room: "Room") -> Frame:
+        kind = event["type"]
+        out = bytearray(_HEADER.pack(EVENT_CODES[kind], event.get("seq", 0)))
+        if kind == "progress":
+            _pack_player(out, event["player"])
+        elif kind == "player_joined":
+            _pack_identity(out, event["player"])
+        elif kind == "started":
+            out += _STARTED.pack(_epoch_ms(event["room"]["started_at"]))
+        elif kind == "guess_result":
+            flags = _CORRECT if event["result"] == "correct" else 0
+            flags |= _ONE_AWAY if event["one_away"] else 0
+            flags |= _RESULT_FINISHED if event["finished"] else 0
+            out += _RESULT.pack(flags, event["mistakes"])
+            if event["category"] is not None:
+                _pack_category(out, event["category"], room)
+        elif kind in ("players", "closed"):
+            players = event["players"] if kind == "players" else event["standings"]
+            if kind == "closed":
+                out.append(STATUS_CODES[event["status"]])
+            out.append(len(players))
+            for player in players:
+                _pack_player(out, player)
+        elif kind == "state":
+            self._pack_state(out, event, room)
+        elif kind == "spectate":
+            self._pack_room(out, event["room"], room)
+            out.append(len(event["players"]))
+            for player in event["players"]:
+                _pack_identity(out, player)
+        elif kind == "error":
+            _pack_string(out, event["detail"], wide=True)
+        return bytes(out)
+
+    def _pack_state(self, out: bytearray, event: dict, room: "Room") -> None:
+        self._pack_room(out, event["room"], room)
+        for word in room.words:
+            _pack_string(out, word)
+        out.append(len(event["solved_categories"]))
+        for category in event["solved_categories"]:
+            _pack_category(out, category, room)
+        out.append(len(event["players"]))
+        for player in event["players"]:
+            _pack_identity(out, player)
+
+    def _pack_room(self, out: bytearray, info: dict, room: "Room") -> None:
+        host = room.players.get(info["host_id"]) if info["host_id"] else None
+        out += _ROOM.pack(
+            STATUS_CODES[info["status"]],
+            info["max_players"],
+            info["puzzle_number"],
+            _epoch_ms(info["started_at"]),
+            host.slot if host else NO_SLOT,
+        )
+        _pack_string(out, info["room_code"])
+
+
+JSON = JsonCodec()
+BINARY = BinaryCodec()
+Codec = Union[JsonCodec, BinaryCodec]
+
+
+def negotiate(offered: list[str]) -> Codec:
+    """The codec for the subprotocols a client offered; JSON unless it asked for binary."""
+    return BINARY if BINARY_SUBPROTOCOL in offered else JSON
+
+
+def decode_message(frame: Frame, room: "Room") -> dict:
+    """A client message from a text (JSON) or binary frame.
+
+    Binary clients may send text frames too; only ``guess`` benefits from
+    the binary form, which is the message type and four word indices.
+    """
+    if isinstance(frame, str):
+        message = json.loads(frame)
+        if not isinstance(message, dict):
+            raise ValueError("Message must be an object")
+        return message
+    if not frame:
+        raise ValueError("Empty message")
+    kind = MESSAGE_TYPES.get(frame[0])
+    if kind is None:
+        raise ValueError(f"Unknown message type: {frame[0]}")
+    if kind != "guess":
+        return {"type": kind}
+    if len(frame) != _GUESS.size:
+        raise ValueError("Guess must be four word indices")
+    _, packed = _GUESS.unpack(frame)
+    indices = _unpack_indices(packed)
+    if any(index >= len(room.words) for index in indices):
+        raise ValueError("Unknown word index")
+    return {"type": "guess", "words": [room.words[index] for index in indices]}
+
+
+def _pack_player(out: bytearray, player: dict) -> None:
+    flags = (_FINISHED if player["finished"] else 0) | (_WON if player["won"] else 0)
+    finish = player["finish_time_ms"]
+    out += _PLAYER.pack(
+        player["slot"],
+        player["solved_mask"],
+        player["mistakes"],
+        flags,
+        NO_TIME if finish is None else min(finish, NO_TIME - 1),
+    )
+
+
+def _pack_identity(out: bytearray, player: dict) -> None:
+    _pack_player(out, player)
+    _pack_string(out, player["user_id"])
+    _pack_string(out, player["username"])
+
+
+def _pack_category(out: bytearray, category: dict, room: "Room") -> None:
+    out += _CATEGORY.pack(
+        room.puzzle.category_index[category["id"]],
+        category["difficulty"],
+        _pack_indices(room.word_index[word] for word in category["words"]),
+    )
+    _pack_string(out, category["name"])
+    _pack_string(out, category["color"])
+
+
+def _pack_string(out: bytearray, text: str, wide: bool = False) -> None:
+    data = text.encode("utf-8")[:0xFFFF if wide else 0xFF]
+    out += struct.pack("!H" if wide else "!B", len(data))
+    out += data
+
+
+def _pack_indices(indices) -> int:
+    packed = 0
+    for index in indices:
+        packed = (packed << 4) | index
+    return packed
+
+
+def _unpack_indices(packed: int) -> list[int]:
+    return [(packed >> shift) & 0xF for shift in (12, 8, 4, 0)]
+
+
+def _epoch_ms(timestamp: Optional[str]) -> int:
+    if not timestamp:
+        return 0
+    # Room times are naive UTC
+    return int((datetime.fromisoformat(timestamp) - _EPOCH).total_seconds() * 1000)
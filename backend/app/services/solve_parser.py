@@ -0,0 +1,135 @@
+import json
+import re
+from typing import Optional
+
+SECTIONS = ("observations", "analysis", "reasoning", "guess")
+
+# A section header, optionally wrapped in markdown emphasis: "**ANALYSIS:**"
+_HEADER = re.compile(r"(?:[*#]+ *)?\b(OBSERVATIONS|ANALYSIS|REASONING|GUESS) *\** *:\**", re.IGNORECASE)
+_HEADER_TEXTS = tuple(f"{name.upper()}:" for name in SECTIONS)
+_LONGEST_HEADER = max(len(text) for text in _HEADER_TEXTS) + 8  # room for emphasis/spacing
+_QUOTED = re.compile(r"\"([^\"]+)\"|'([^']+)'")
+
+# The guess section never needs more than this; anything longer is not a guess
+MAX_GUESS_CHARS = 400
+
+
+def parse_guess(text: str) -> Optional[list[str]]:
+    """Four words from a ``["a", "b", "c", "d"]`` list (or a bare comma list)."""
+    start = text.find("[")
+    end = text.find("]", start + 1)
+    if start != -1 and end != -1:
+        body = text[start:end + 1]
+        try:
+            words = json.loads(body)
+        except ValueError:
+            words = [a or b for a, b in _QUOTED.findall(body)] or body[1:-1].split(",")
+    elif start == -1:
+        line = text.strip().splitlines()[0] if text.strip() else ""
+        words = line.split(",")
+    else:
+        return None
+
+    words = [str(word).strip().strip("\"'").strip() for word in words]
+    words = [word for word in words if word]
+    return words[:4] if len(words) >= 4 else None
+
+
+class SolveStreamParser:
+    """Incremental parser for the OBSERVATIONS/ANALYSIS/REASONING/GUESS format.
+
+    ``feed`` takes each streamed chunk and returns the events it completes:
+    ``section`` when a header starts a new section, ``thinking`` for text
+    within a section and ``guess`` as soon as the guess list is closed.
+    Only a possible partial header (and the short guess section) is held
+    back between chunks, so parsing is linear in the stream length. Once
+    ``done`` is set the rest of the stream can be dropped.
+    """
+
+    def __init__(self):
+        self.section: Optional[str] = None
+        self.guess: Optional[list[str]] = None
+        self._pending = ""
+        self._guess_text = ""
+        self._section_start = False
+
+    @property
+    def done(self) -> bool:
+        return self.guess is not None
+
+    def feed(self, chunk: str) -> list[dict]:
+        if self.done or not chunk:
+            return []
+        events: list[dict] = []
+        text = self._pending + chunk
+        self._pending = ""
+
+        position = 0
+        for match in _HEADER.finditer(text):
+            self._text(text[position:match.start()], events)
+            if self.done:
+                return events
+            self.section = match.group(1).lower()
+            self._section_start = True
+            events.append({"type": "section", "section": self.section})
+            position = match.end()
+
+        rest = text[position:]
+        hold = self._partial_header(rest)
+        self._text(rest[:len(rest) - hold], events)
+        if not self.done:
+            self._pending = rest[len(rest) - hold:]
+        return events
+
+    def finish(self) -> list[dict]:
+        """Flush held-back text at the end of the stream and try a last parse."""
+        if self.done:
+            return []
+        events: list[dict] = []
+        text, self._pending = self._pending, ""
+        self._text(text, events)
+        if not self.done and self.section == "guess":
+            self._set_guess(parse_guess(self._guess_text), events)
+        return events
+
+    def _text(self, text: str, events: list[dict]) -> None:
+        if self._section_start:
+            # Closing emphasis of a header split across chunks: "GUESS:" + "**"
+            text = text.lstrip("*")
+            self._section_start = not text
+        if not text:
+            return
+        if self.section != "guess":
+            events.append({"type": "thinking", "section": self.section, "content": text})
+            return
+
+        self._guess_text += text
+        events.append({"type": "thinking", "section": self.section, "content": text})
+        if "]" in self._guess_text:
+            self._set_guess(parse_guess(self._guess_text), events)
+        elif len(self._guess_text) > MAX_GUESS_CHARS:
+            self._guess_text = self._guess_text[-MAX_GUESS_CHARS:]
+
+    def _set_guess(self, words: Optional[list[str]], events: list[dict]) -> None:
+        if words is None:
+            # Unparseable list; keep listening for another attempt
+            self._guess_text = ""
+            return
+        self.guess = words
+        events.append({"type": "guess", "content": "Making my guess...", "words": words})
+
+    @staticmethod
+    def _partial_header(text: str) -> int:
+        """Length of the suffix of ``text`` that could still grow into a header."""
+        tail = text[-_LONGEST_HEADER:].upper()
+        for size in range(len(tail), 0, -1):
+            candidate = tail[-size:].lstrip("*# ")
+            if not candidate:
+                # Bare emphasis markers may open the next header
+                return size
+            if size < len(text) and text[-size - 1].isalpha():
+                continue
+            prefix = candidate.rstrip("* ")
+            if prefix and any(header.startswith(prefix) for header in _HEADER_TEXTS):
+                return size
+        return 0
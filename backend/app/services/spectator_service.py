@@ -0,0 +1,202 @@
+import asyncio
+from typing import Optional
+
+from fastapi import WebSocket
+
+from app.config import settings
+from app.core.metrics import Counter, Gauge
+from app.services.multiplayer_service import Room, multiplayer_sent_bytes
+from app.services.room_protocol import Codec, Frame
+
+multiplayer_spectators = Gauge("multiplayer_spectators", "Open spectator WebSocket connections")
+multiplayer_spectator_dropped = Counter(
+    "multiplayer_spectator_dropped_frames_total",
+    "Spectator snapshots replaced by a newer one before they were sent",
+)
+
+
+class Spectator:
+    """One read-only socket watching a room.
+
+    It holds at most one unsent snapshot: a newer one replaces it, so a slow
+    client skips frames instead of buffering them.
+    """
+
+    def __init__(self, websocket: WebSocket, codec: Codec):
+        self.websocket = websocket
+        self.codec = codec
+        self.closed = False
+        self._frame: Optional[Frame] = None
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._send_loop())
+
+    def offer(self, frame: Frame) -> None:
+        if self.closed:
+            return
+        if self._frame is not None:
+            multiplayer_spectator_dropped.inc()
+        self._frame = frame
+        self._ready.set()
+
+    async def close(self, flush: bool = False) -> None:
+        """Stop sending; with ``flush`` the pending snapshot gets a second to go out."""
+        if self._task is None:
+            return
+        self.closed = True
+        if flush:
+            self._ready.set()
+            await asyncio.wait({self._task}, timeout=1.0)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _send_loop(self) -> None:
+        try:
+            while True:
+                await self._ready.wait()
+                self._ready.clear()
+                frame, self._frame = self._frame, None
+                if frame is not None:
+                    if isinstance(frame, bytes):
+                        await self.websocket.send_bytes(frame)
+                    else:
+                        await self.websocket.send_text(frame)
+                    multiplayer_sent_bytes.inc(self.codec.name, amount=len(frame))
+                if self.closed:
+                    break
+        except Exception:
+            pass
+        finally:
+            self.closed = True
+            try:
+                await self.websocket.close()
+            except Exception:
+                pass
+
+
+class SpectatorFeed:
+    """The spectators of one room on this replica.
+
+    A snapshot is built and encoded (once per protocol in use) only when the
+    room changed since the last tick, then offered to every spectator.
+    """
+
+    def __init__(self, room: Room):
+        self.room = room
+        self.spectators: set[Spectator] = set()
+        self._seq = -1
+        self._frames: dict[str, Frame] = {}
+        # Room seq of the last snapshot offered to everyone
+        self._ticked = -1
+
+    def frame(self, codec: Codec) -> Frame:
+        """The current snapshot in ``codec``, encoded on first use."""
+        if self.room.seq != self._seq:
+            self._seq = self.room.seq
+            self._frames = {}
+        frame = self._frames.get(codec.name)
+        if frame is None:
+            event = {
+                "type": "spectate",
+                "seq": self.room.seq,
+                "room": self.room.info(),
+                "players": self.room.standings(),
+            }
+            frame = self._frames[codec.name] = codec.encode(event, self.room)
+        return frame
+
+    def tick(self) -> None:
+        if self.room.seq == self._ticked:
+            return
+        self._ticked = self.room.seq
+        for spectator in self.spectators:
+            spectator.offer(self.frame(spectator.codec))
+
+
+class SpectatorHub:
+    """Read-only subscriptions to multiplayer rooms.
+
+    Spectators get progress snapshots (no words) at most
+    ``multiplayer_spectator_rate`` times a second, coalescing whatever
+    happened in between. Rooms reach every replica through the owner's
+    events, so each replica encodes a room's snapshot once per tick for all
+    of its spectators, and the cost grows with rooms rather than viewers.
+    """
+
+    def __init__(self):
+        self._feeds: dict[str, SpectatorFeed] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return sum(len(feed.spectators) for feed in self._feeds.values())
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for feed in list(self._feeds.values()):
+            await self._close(feed)
+
+    async def watch(self, room: Room, websocket: WebSocket, codec: Codec) -> Spectator:
+        feed = self._feeds.get(room.code)
+        if feed is not None and feed.room is not room:
+            # The room was reloaded; its old copy sends nothing more
+            await self._close(feed)
+            feed = None
+        if feed is None:
+            feed = self._feeds[room.code] = SpectatorFeed(room)
+        spectator = Spectator(websocket, codec)
+        spectator.start()
+        feed.spectators.add(spectator)
+        room.spectators += 1
+        multiplayer_spectators.inc()
+        spectator.offer(feed.frame(codec))
+        return spectator
+
+    async def unwatch(self, room: Room, spectator: Spectator) -> None:
+        feed = self._feeds.get(room.code)
+        if feed is not None and spectator in feed.spectators:
+            feed.spectators.discard(spectator)
+            room.spectators -= 1
+            multiplayer_spectators.dec()
+            if not feed.spectators:
+                del self._feeds[room.code]
+        await spectator.close()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(1 / settings.multiplayer_spectator_rate)
+            for feed in list(self._feeds.values()):
+                try:
+                    feed.tick()
+                    if not feed.room.open:
+                        # Final standings went out with this tick
+                        await self._close(feed)
+                except Exception as e:
+                    print(f"Spectator feed error: {e}")
+
+    async def _close(self, feed: SpectatorFeed) -> None:
+        if self._feeds.get(feed.room.code) is feed:
+            del self._feeds[feed.room.code]
+        spectators = list(feed.spectators)
+        feed.spectators.clear()
+        feed.room.spectators -= len(spectators)
+        multiplayer_spectators.dec(amount=len(spectators))
+        await asyncio.gather(*(spectator.close(flush=True) for spectator in spectators))
+
+
+# Singleton instance
+spectator_hub = SpectatorHub()